@@ -3,6 +3,7 @@ import functools
 import json
 import os
 import sqlite3
+import time
 import uuid
 import werkzeug.security
 import werkzeug.utils
@@ -12,6 +13,7 @@ import nyaruhodo
 server                              = flask.Flask(__name__)
 server.config["FILES"]              = os.path.join(os.path.dirname(__file__), "data", "files")
 server.config["MAX_CONTENT_LENGTH"] = 100 * 1024 * 1024
+server.config["CACHE_SIZE"]         = 64 * 1024 * 1024
 server.secret_key                   = os.environ.get("SECRET_KEY") or os.urandom(24)
 
 def GetDatabase():
@@ -48,8 +50,58 @@ def InitialiseDatabase():
         database.execute("CREATE TABLE IF NOT EXISTS users (user_id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL COLLATE NOCASE, display_name TEXT NOT NULL, password TEXT NOT NULL, virustotal_api_key TEXT, priviledge INTEGER DEFAULT 0, password_history TEXT DEFAULT '[]')")
         database.execute("CREATE TABLE IF NOT EXISTS records (record_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, filename TEXT NOT NULL, filetype TEXT, status TEXT, created DATETIME DEFAULT CURRENT_TIMESTAMP, FOREIGN KEY (user_id) REFERENCES users (user_id))")
         database.execute("CREATE TABLE IF NOT EXISTS events (event_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, filename TEXT, outcome TEXT NOT NULL, created DATETIME DEFAULT CURRENT_TIMESTAMP)")
+        database.execute("CREATE TABLE IF NOT EXISTS cache (filehash TEXT NOT NULL, version TEXT NOT NULL, result TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (filehash, version))")
+        database.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+        database.execute("CREATE TABLE IF NOT EXISTS cache_usage (usage_id INTEGER PRIMARY KEY CHECK (usage_id = 1), size INTEGER NOT NULL)")
+        database.execute("CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN UPDATE cache_usage SET size = size + NEW.size; END")
+        database.execute("CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF size ON cache BEGIN UPDATE cache_usage SET size = size + NEW.size - OLD.size; END")
+        database.execute("CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN UPDATE cache_usage SET size = size - OLD.size; END")
+        database.execute("INSERT OR REPLACE INTO cache_usage (usage_id, size) SELECT 1, COALESCE(SUM(size), 0) FROM cache")
         database.commit()
 
+def ReadCache(database, filehash):
+
+    version     = nyaruhodo.core.SignatureVersion()
+    cache_entry = database.execute("SELECT result FROM cache WHERE filehash = ? AND version = ?", (filehash, version)).fetchone()
+
+    if cache_entry is None:
+
+        return None
+
+    database.execute("UPDATE cache SET accessed = ? WHERE filehash = ? AND version = ?", (time.time(), filehash, version))
+    cached_analysis = json.loads(cache_entry["result"])
+    cached_analysis.pop("virustotal", None)
+
+    return cached_analysis
+
+def WriteCache(database, filehash, analysis):
+
+    cached_analysis = {key: value for key, value in analysis.items() if key not in ("filename", "original_filetype", "mismatch", "message", "cached", "virustotal")}
+    result          = json.dumps(cached_analysis)
+    version         = nyaruhodo.core.SignatureVersion()
+    database.execute("INSERT INTO cache (filehash, version, result, size, accessed) VALUES (?, ?, ?, ?, ?) ON CONFLICT (filehash, version) DO UPDATE SET result = excluded.result, size = excluded.size, accessed = excluded.accessed", (filehash, version, result, len(result), time.time()))
+
+    excess_size = database.execute("SELECT size FROM cache_usage WHERE usage_id = 1").fetchone()[0] - server.config["CACHE_SIZE"]
+
+    if excess_size > 0:
+
+        EvictCache(database, excess_size, filehash, version)
+
+def EvictCache(database, excess_size, filehash, version):
+
+    evicted = []
+
+    for cache_entry in database.execute("SELECT filehash, version, size FROM cache WHERE NOT (filehash = ? AND version = ?) ORDER BY accessed", (filehash, version)):
+
+        evicted.append((cache_entry["filehash"], cache_entry["version"]))
+        excess_size -= cache_entry["size"]
+
+        if excess_size <= 0:
+
+            break
+
+    database.executemany("DELETE FROM cache WHERE filehash = ? AND version = ?", evicted)
+
 def RequireSignIn(authfunction):
 
     @functools.wraps(authfunction)
@@ -244,28 +296,49 @@ def AnalyseFile():
     filepath          = os.path.join(server.config["FILES"], unique_filename)
     file.save(filepath)
     nyaruhodo.telemetry.Info(username, f"Analysis started '{filename}'")
-    analysis          = nyaruhodo.core.AnalyseFile(filepath, filename)
-    detected_filetype = analysis.get("detected_filetype")
-    metadata          = nyaruhodo.properties.Read(filepath, detected_filetype)
 
-    if metadata:
+    with nyaruhodo.context.AnalysisContext(filepath) as context:
+
+        filehash   = context.Hash()
+        cache_hit  = ReadCache(database, filehash)
+        virustotal = flask.request.form.get("virustotal") == "true"
+
+        if cache_hit:
+
+            analysis           = cache_hit
+            analysis["cached"] = True
+            analysis.update(nyaruhodo.core.CompareFileType(filename, analysis["detected_filetype"], analysis["description"]))
+
+        else:
+
+            analysis          = nyaruhodo.core.AnalyseFile(filepath, filename, context)
+            detected_filetype = analysis.get("detected_filetype")
+            metadata          = nyaruhodo.properties.Read(filepath, detected_filetype, context)
+
+            if metadata:
+
+                analysis["metadata"] = metadata
+
+            nyaruhodo.members.AnalyseArchive(analysis, context)
 
-        analysis["metadata"] = metadata
+        if virustotal:
 
-    if flask.request.form.get("virustotal") == "true":
+            virustotal_api_key = None
 
-        virustotal_api_key = None
+            if "user_id" in flask.session:
 
-        if "user_id" in flask.session:
+                userdata           = database.execute("SELECT virustotal_api_key FROM users WHERE user_id = ?", (flask.session["user_id"],)).fetchone()
+                virustotal_api_key = userdata["virustotal_api_key"] if userdata and userdata["virustotal_api_key"] else None
 
-            userdata           = database.execute("SELECT virustotal_api_key FROM users WHERE user_id = ?", (flask.session["user_id"],)).fetchone()
-            virustotal_api_key = userdata["virustotal_api_key"] if userdata and userdata["virustotal_api_key"] else None
+            if not virustotal_api_key:
 
-        if not virustotal_api_key:
+                virustotal_api_key = os.environ.get("VIRUSTOTAL_API_KEY")
 
-            virustotal_api_key = os.environ.get("VIRUSTOTAL_API_KEY")
+            analysis["virustotal"] = nyaruhodo.services.VirusTotalLookup(filepath, virustotal_api_key, context)
 
-        analysis["virustotal"] = nyaruhodo.services.VirusTotalLookup(filepath, virustotal_api_key)
+        if not cache_hit:
+
+            WriteCache(database, filehash, analysis)
 
     if "user_id" in flask.session:
 
@@ -352,6 +425,7 @@ def AdminDashboard():
     event_data   = {event["outcome"]: event["cnt"] for event in events}
     records      = database.execute("SELECT status, COUNT(*) AS cnt FROM records GROUP BY status").fetchall()
     record_data  = {record["status"]: record["cnt"] for record in records}
+    cache_data   = database.execute("SELECT COUNT(*) AS entries, COALESCE(SUM(size), 0) AS size FROM cache").fetchone()
     users        = database.execute("SELECT u.user_id, u.username, u.display_name, u.priviledge, COUNT(r.record_id) AS file_count, COALESCE(SUM(CASE WHEN r.status = 'Mismatch' THEN 1 ELSE 0 END), 0) AS mismatch_count, COALESCE(SUM(CASE WHEN r.status = 'Unknown' THEN 1 ELSE 0 END), 0) AS unknown_count, MAX(r.created) AS last_scan FROM users u LEFT JOIN records r ON u.user_id = r.user_id GROUP BY u.user_id ORDER BY u.username COLLATE NOCASE").fetchall()
     user_records = {}
 
@@ -365,7 +439,7 @@ def AdminDashboard():
     display_name    = flask.session.get("display_name", flask.session.get("username", ""))
     nyaruhodo.telemetry.Info(flask.session.get("username", "anonymous"), "Admin dashboard access")
 
-    return flask.render_template("admin-dashboard.html", display_name = display_name, normal_users = normal_users, admin_users = admin_users, scans = scans, scans_completed = scans_completed, scans_failed = scans_failed, record_data = record_data, users = users, user_records = user_records, current_user_id = flask.session["user_id"])
+    return flask.render_template("admin-dashboard.html", display_name = display_name, normal_users = normal_users, admin_users = admin_users, scans = scans, scans_completed = scans_completed, scans_failed = scans_failed, record_data = record_data, cache_entries = cache_data["entries"], cache_size = f"{cache_data['size'] / 1048576:.1f} MB", users = users, user_records = user_records, current_user_id = flask.session["user_id"])
 
 @server.route("/dashboard/admin/toggle-admin/<int:user_id>", methods = ["POST"])
 @RequireAdmin
@@ -422,6 +496,17 @@ def AdminDeleteEvents():
 
     return flask.redirect(flask.url_for("AdminDashboard"))
 
+@server.route("/admin/purge-cache", methods = ["POST"])
+@RequireAdmin
+def AdminPurgeCache():
+
+    database = GetDatabase()
+    database.execute("DELETE FROM cache")
+    database.commit()
+    nyaruhodo.telemetry.Info(flask.session.get("username", "anonymous"), "Analysis cache purged by admin")
+
+    return flask.redirect(flask.url_for("AdminDashboard"))
+
 if __name__ == "__main__":
 
     nyaruhodo.init.PaintScreen()
@@ -1,6 +1,25 @@
-from . import nyaruhodo_core       as core
-from . import nyaruhodo_initialise as init
-from . import nyaruhodo_properties as properties
-from . import nyaruhodo_services   as services
-from . import nyaruhodo_signatures as Signatures
-from . import nyaruhodo_telemetry  as telemetry
\ No newline at end of file
+import importlib
+
+MODULES = {
+    "batch":      "nyaruhodo_batch",
+    "context":    "nyaruhodo_context",
+    "core":       "nyaruhodo_core",
+    "entropy":    "nyaruhodo_entropy",
+    "init":       "nyaruhodo_initialise",
+    "members":    "nyaruhodo_members",
+    "properties": "nyaruhodo_properties",
+    "services":   "nyaruhodo_services",
+    "Signatures": "nyaruhodo_signatures",
+    "telemetry":  "nyaruhodo_telemetry",
+}
+
+def __getattr__(name):
+
+    if name not in MODULES:
+
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    module          = importlib.import_module(f".{MODULES[name]}", __name__)
+    globals()[name] = module
+
+    return module
\ No newline at end of file
@@ -0,0 +1,40 @@
+import argparse
+import sys
+
+from . import nyaruhodo_batch as batch
+from . import nyaruhodo_core  as core
+from . import nyaruhodo_scan  as scan
+
+from .nyaruhodo_properties import nyaruhodo_tables as tables
+
+def Main(argv=None):
+
+    parser      = argparse.ArgumentParser(prog="nyaruhodo")
+    subparsers  = parser.add_subparsers(dest="command", required=True)
+    scan_parser = subparsers.add_parser("scan", help="recursively analyse a directory and write one JSON line per file")
+    scan_parser.add_argument("directory")
+    scan_parser.add_argument("--include",  action="append", default=[], metavar="GLOB", help="only analyse files matching this glob (repeatable)")
+    scan_parser.add_argument("--exclude",  action="append", default=[], metavar="GLOB", help="skip files and directories matching this glob (repeatable)")
+    scan_parser.add_argument("--max-size", type=scan.ParseSize, default=None, metavar="SIZE", help="skip files larger than SIZE (e.g. 500K, 100M, 2G)")
+    scan_parser.add_argument("--workers",  type=int, default=None, help="number of worker processes (default: CPU count)")
+    scan_parser.add_argument("--timeout",  type=float, default=batch.DEFAULT_TIMEOUT, metavar="SECONDS", help=f"abandon the analysis of a single file after this many seconds (default: {batch.DEFAULT_TIMEOUT}, 0 disables)")
+    subparsers.add_parser("compile", help="rebuild the precompiled signature and lookup-table artifact")
+    arguments   = parser.parse_args(argv)
+
+    if arguments.command == "scan":
+
+        return scan.Scan(arguments)
+
+    if arguments.command == "compile":
+
+        core.SignatureIndex(rebuild=True)
+        core.SignatureVersion(rebuild=True)
+        tables.CompileLookupTables(rebuild=True)
+
+        return 0
+
+    return 2
+
+if __name__ == "__main__":
+
+    sys.exit(Main())
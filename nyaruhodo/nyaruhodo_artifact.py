@@ -0,0 +1,103 @@
+import marshal
+import os
+
+RESET            = "\033[0m"
+RED              = "\033[91m"
+ARTIFACT_VERSION = 1
+ARTIFACT_PATH    = os.path.join(os.path.dirname(__file__), "..", "data", "compiled.marshal")
+ARTIFACT         = None
+
+def SourceStamp(sources):
+
+    stamp = []
+
+    for source in sources:
+
+        try:
+
+            source_stat = os.stat(source)
+            stamp.append((os.path.basename(source), source_stat.st_mtime_ns, source_stat.st_size))
+
+        except OSError:
+
+            stamp.append((os.path.basename(source), 0, 0))
+
+    return tuple(stamp)
+
+def ReadArtifact():
+
+    global ARTIFACT
+
+    if ARTIFACT is None:
+
+        ARTIFACT = {}
+
+        try:
+
+            with open(ARTIFACT_PATH, "rb") as file:
+
+                version, marshal_version, sections = marshal.loads(file.read())
+
+            if version == ARTIFACT_VERSION and marshal_version == marshal.version and isinstance(sections, dict):
+
+                ARTIFACT = sections
+
+        except FileNotFoundError:
+
+            pass
+
+        except Exception as exception:
+
+            exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+            print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+
+    return ARTIFACT
+
+def RemoveTemporary(temporary_path):
+
+    try:
+
+        os.unlink(temporary_path)
+
+    except OSError:
+
+        pass
+
+def WriteArtifact(sections):
+
+    temporary_path = f"{ARTIFACT_PATH}.{os.getpid()}.tmp"
+
+    try:
+
+        with os.fdopen(os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644), "wb") as file:
+
+            file.write(marshal.dumps((ARTIFACT_VERSION, marshal.version, sections)))
+
+        os.replace(temporary_path, ARTIFACT_PATH)
+
+    except OSError:
+
+        RemoveTemporary(temporary_path)
+
+    except Exception as exception:
+
+        RemoveTemporary(temporary_path)
+
+        exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+        print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+
+def LoadSection(name, sources, builder, rebuild=False):
+
+    sections = ReadArtifact()
+    stamp    = SourceStamp(sources)
+    section  = sections.get(name)
+
+    if not rebuild and section is not None and section[0] == stamp:
+
+        return section[1]
+
+    value          = builder()
+    sections[name] = (stamp, value)
+    WriteArtifact(sections)
+
+    return value
@@ -0,0 +1,226 @@
+import concurrent.futures
+import concurrent.futures.process
+import itertools
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import time
+
+from . import nyaruhodo_context
+from . import nyaruhodo_core       as core
+from . import nyaruhodo_members    as members
+from . import nyaruhodo_properties as properties
+
+RESET               = "\033[0m"
+RED                 = "\033[91m"
+HARD_TIMEOUT_FACTOR = 2
+DEFAULT_TIMEOUT     = 60
+START_QUEUE         = None
+
+class AnalysisTimeout(BaseException):
+
+    pass
+
+def RaiseTimeout(signal_number, stack_frame):
+
+    raise AnalysisTimeout()
+
+def InitialiseWorker(start_queue=None):
+
+    global START_QUEUE
+
+    sys.stdout  = sys.stderr
+    START_QUEUE = start_queue
+
+def AnalyseWorker(filepath, timeout=None, token=None):
+
+    filename = os.path.basename(filepath)
+    alarm    = bool(timeout) and hasattr(signal, "setitimer")
+
+    if START_QUEUE is not None:
+
+        START_QUEUE.put((token, os.getpid(), time.monotonic()))
+
+    if alarm:
+
+        signal.signal(signal.SIGALRM, RaiseTimeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    try:
+
+        with nyaruhodo_context.AnalysisContext(filepath) as context:
+
+            analysis = core.AnalyseFile(filepath, filename, context)
+            metadata = properties.Read(filepath, analysis["detected_filetype"], context)
+            members.AnalyseArchive(analysis, context)
+
+        return analysis, metadata
+
+    except AnalysisTimeout:
+
+        return {"filename": filename, "error": "Analysis timed out.", "message": f"The analysis exceeded {timeout} seconds."}, {}
+
+    except Exception as exception:
+
+        return {"filename": filename, "error": "Analysis failed.", "message": str(exception)}, {}
+
+    finally:
+
+        if alarm:
+
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+def ReadStarts(start_queue, started):
+
+    while True:
+
+        try:
+
+            token, process_id, start_time = start_queue.get_nowait()
+
+        except queue.Empty:
+
+            return started
+
+        started[token] = (process_id, start_time)
+
+def TerminateWorker(process_id):
+
+    try:
+
+        os.kill(process_id, getattr(signal, "SIGKILL", signal.SIGTERM))
+
+    except OSError:
+
+        pass
+
+def CreateExecutor(workers, start_queue):
+
+    return concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=InitialiseWorker, initargs=(start_queue,))
+
+def AnalyseFiles(filepaths, workers=None, inflight=None, timeout=DEFAULT_TIMEOUT):
+
+    workers     = workers or os.cpu_count() or 1
+    inflight    = inflight or workers * 4
+    filepaths   = iter(filepaths)
+    start_queue = multiprocessing.Queue()
+    executor    = CreateExecutor(workers, start_queue)
+    counter     = itertools.count()
+    pending     = {}
+    tokens      = {}
+    started     = {}
+    isolated    = {}
+    terminated  = set()
+    suspects    = []
+    exhausted   = False
+
+    try:
+
+        while True:
+
+            while suspects and len(isolated) < workers:
+
+                token             = next(counter)
+                isolated_executor = CreateExecutor(1, start_queue)
+                future            = isolated_executor.submit(AnalyseWorker, suspects[-1], timeout, token)
+                pending[future]   = suspects.pop()
+                tokens[future]    = token
+                isolated[future]  = isolated_executor
+
+            while not exhausted and len(pending) < inflight:
+
+                filepath = next(filepaths, None)
+
+                if filepath is None:
+
+                    exhausted = True
+
+                    break
+
+                token           = next(counter)
+                future          = executor.submit(AnalyseWorker, filepath, timeout, token)
+                pending[future] = filepath
+                tokens[future]  = token
+
+            if not pending:
+
+                return
+
+            completed, _ = concurrent.futures.wait(pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+            broken       = False
+
+            if timeout:
+
+                ReadStarts(start_queue, started)
+                now = time.monotonic()
+
+                for future in pending:
+
+                    process_id, start_time = started.get(tokens[future], (None, now))
+
+                    if not future.done() and now - start_time > timeout * HARD_TIMEOUT_FACTOR:
+
+                        TerminateWorker(process_id)
+                        started.pop(tokens[future])
+                        terminated.add(tokens[future])
+
+            for future in completed:
+
+                filepath          = pending.pop(future)
+                token             = tokens.pop(future)
+                isolated_executor = isolated.pop(future, None)
+                started.pop(token, None)
+
+                if isolated_executor is not None:
+
+                    isolated_executor.shutdown(wait=False)
+
+                try:
+
+                    analysis, metadata = future.result()
+
+                except concurrent.futures.process.BrokenProcessPool as exception:
+
+                    if isolated_executor is None:
+
+                        broken = True
+
+                        suspects.append(filepath)
+
+                        continue
+
+                    if token in terminated:
+
+                        analysis, metadata = {"filename": os.path.basename(filepath), "error": "Analysis timed out.", "message": f"The analysis exceeded {timeout * HARD_TIMEOUT_FACTOR} seconds and its worker process was terminated."}, {}
+
+                    else:
+
+                        exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+                        print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}", file=sys.stderr)
+                        analysis, metadata = {"filename": os.path.basename(filepath), "error": "Analysis failed.", "message": "The worker process analysing this file terminated abruptly."}, {}
+
+                terminated.discard(token)
+
+                yield filepath, analysis, metadata
+
+            if broken:
+
+                for future in [future for future in pending if future not in isolated]:
+
+                    suspects.append(pending.pop(future))
+                    started.pop(tokens.pop(future), None)
+
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = CreateExecutor(workers, start_queue)
+
+    finally:
+
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        for isolated_executor in isolated.values():
+
+            isolated_executor.shutdown(wait=False, cancel_futures=True)
+
+        start_queue.close()
@@ -0,0 +1,106 @@
+import io
+import os
+
+PREFIX_SIZE = 65536
+BLOCK_SIZE  = 1048576
+
+class AnalysisContext:
+
+    def __init__(self, filepath, prefix_size=PREFIX_SIZE, buffer=None):
+
+        self.filepath = filepath
+        self.buffer   = buffer
+        self.file     = open(filepath, "rb") if buffer is None else io.BytesIO(buffer)
+        self.sha256   = None
+        self.source   = None
+
+        try:
+
+            self.size   = os.fstat(self.file.fileno()).st_size if buffer is None else len(buffer)
+            self.prefix = self.ReadAt(0, prefix_size)
+
+        except BaseException:
+
+            self.file.close()
+
+            raise
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exception_type, exception_value, exception_traceback):
+
+        self.Close()
+
+    def ReadAt(self, offset, count):
+
+        if self.buffer is not None:
+
+            return bytes(self.buffer[offset: offset + count])
+
+        if hasattr(os, "pread"):
+
+            return os.pread(self.file.fileno(), count, offset)
+
+        self.file.seek(offset)
+
+        return self.file.read(count)
+
+    def Read(self, offset=0, count=None):
+
+        if offset < 0:
+
+            offset = max(self.size + offset, 0)
+
+        if count is None:
+
+            count = max(self.size - offset, 0)
+
+        if offset + count <= len(self.prefix) or len(self.prefix) == self.size:
+
+            return self.prefix[offset: offset + count]
+
+        return self.ReadAt(offset, count)
+
+    def Hash(self):
+
+        if self.sha256 is None:
+
+            import hashlib
+
+            hashdigest = hashlib.sha256(self.prefix)
+            offset     = len(self.prefix)
+
+            while offset < self.size:
+
+                datablock = self.ReadAt(offset, BLOCK_SIZE)
+
+                if not datablock:
+
+                    break
+
+                hashdigest.update(datablock)
+                offset += len(datablock)
+
+            self.sha256 = hashdigest.hexdigest()
+
+        return self.sha256
+
+    def Map(self):
+
+        if self.source is None:
+
+            from .nyaruhodo_properties import nyaruhodo_common as common
+
+            self.source = common.ByteSource(self if self.buffer is None else self.buffer)
+
+        return self.source
+
+    def Close(self):
+
+        if self.source is not None:
+
+            self.source.Close()
+
+        self.file.close()
@@ -1,21 +1,60 @@
-import csv
-import io
-import json
 import os
-import sys
 
-sys.path.insert(0, os.path.dirname(__file__))
-
-import nyaruhodo_signatures as signatures
-
-RESET      = "\033[0m"
-RED        = "\033[91m"
-YELLOW     = "\033[93m"
-SIGNATURES = None
-EXTENSIONS = {
+from . import nyaruhodo_artifact   as artifact
+from . import nyaruhodo_context
+from . import nyaruhodo_entropy    as entropy
+from . import nyaruhodo_signatures as signatures
+from . import nyaruhodo_text       as text
+from . import nyaruhodo_zip        as ziparchive
+
+RESET             = "\033[0m"
+RED               = "\033[91m"
+YELLOW            = "\033[93m"
+SIGNATURES        = None
+SIGNATURE_INDEX   = None
+SIGNATURE_VERSION = None
+EXTENSIONS        = {
     frozenset({"JPG", "JPEG"}),
     frozenset({"HTM", "HTML"}),
     frozenset({"TIF", "TIFF"}),
+    frozenset({"YML", "YAML"}),
+    frozenset({"NDJSON", "JSONL"}),
+    frozenset({"C", "H"}),
+    frozenset({"BAT", "CMD"}),
+    frozenset({"HEIC", "HEIF"}),
+}
+OFFICE_TYPES      = {
+    "word/": (("DOCX", "Microsoft Word Document"),           ("DOCM", "Microsoft Word Macro-Enabled Document")),
+    "xl/":   (("XLSX", "Microsoft Excel Spreadsheet"),       ("XLSM", "Microsoft Excel Macro-Enabled Spreadsheet")),
+    "ppt/":  (("PPTX", "Microsoft PowerPoint Presentation"), ("PPTM", "Microsoft PowerPoint Macro-Enabled Presentation")),
+}
+FTYP_BRANDS       = {
+    b"heic": ("HEIC", "High Efficiency Image Container"),
+    b"heix": ("HEIC", "High Efficiency Image Container"),
+    b"heim": ("HEIC", "High Efficiency Image Container"),
+    b"heis": ("HEIC", "High Efficiency Image Container"),
+    b"hevc": ("HEIC", "High Efficiency Image Container"),
+    b"hevx": ("HEIC", "High Efficiency Image Container"),
+    b"avif": ("AVIF", "AV1 Image File"),
+    b"avis": ("AVIF", "AV1 Image File"),
+    b"qt  ": ("MOV",  "QuickTime Movie"),
+    b"M4A ": ("M4A",  "MPEG-4 Audio"),
+    b"M4B ": ("M4A",  "MPEG-4 Audio"),
+    b"M4P ": ("M4A",  "MPEG-4 Audio"),
+    b"M4V ": ("M4V",  "MPEG-4 Video"),
+    b"M4VH": ("M4V",  "MPEG-4 Video"),
+    b"M4VP": ("M4V",  "MPEG-4 Video"),
+    b"3gp4": ("3GP",  "3GPP Multimedia"),
+    b"3gp5": ("3GP",  "3GPP Multimedia"),
+    b"3gp6": ("3GP",  "3GPP Multimedia"),
+    b"3g2a": ("3GP",  "3GPP Multimedia"),
+}
+MIMETYPES         = {
+    b"application/vnd.oasis.opendocument.text":         ("ODT",  "OpenDocument Text"),
+    b"application/vnd.oasis.opendocument.spreadsheet":  ("ODS",  "OpenDocument Spreadsheet"),
+    b"application/vnd.oasis.opendocument.presentation": ("ODP",  "OpenDocument Presentation"),
+    b"application/vnd.oasis.opendocument.graphics":     ("ODG",  "OpenDocument Drawing"),
+    b"application/epub+zip":                            ("EPUB", "EPUB Electronic Publication"),
 }
 
 def Signatures():
@@ -28,13 +67,31 @@ def Signatures():
     
     return SIGNATURES
 
-def GetHeader(filepath, bytecount=32):
+def SignatureIndex(rebuild=False):
 
-    try:
+    global SIGNATURE_INDEX
+
+    if SIGNATURE_INDEX is None or rebuild:
+
+        SIGNATURE_INDEX = artifact.LoadSection("signatures", signatures.SOURCES[:1], lambda: signatures.CompileSignatures(Signatures()), rebuild)
+
+    return SIGNATURE_INDEX
+
+def SignatureVersion(rebuild=False):
 
-        with open(filepath, "rb") as file:
+    global SIGNATURE_VERSION
 
-            return file.read(bytecount)
+    if SIGNATURE_VERSION is None or rebuild:
+
+        SIGNATURE_VERSION = artifact.LoadSection("version", signatures.SOURCES, signatures.SignatureVersion, rebuild)
+
+    return SIGNATURE_VERSION
+
+def GetHeader(context, bytecount=32):
+
+    try:
+
+        return context.Read(0, bytecount)
 
     except Exception as exception:
 
@@ -43,7 +100,7 @@ def GetHeader(filepath, bytecount=32):
 
         return None
 
-def ComposeCompoundFile(filepath, header):
+def ComposeCompoundFile(context, header):
 
     if header[:4] == b"RIFF":
 
@@ -59,28 +116,48 @@ def ComposeCompoundFile(filepath, header):
 
             return "WAV", "Waveform Audio"
 
+    if header[4:8] == b"ftyp":
+
+        box_size = min(len(header), int.from_bytes(header[:4], "big"))
+        brands   = [header[8:12]] + [header[offset: offset + 4] for offset in range(16, box_size - 3, 4)]
+
+        for brand in brands:
+
+            if brand in FTYP_BRANDS:
+
+                return FTYP_BRANDS[brand]
+
+        if b"mif1" in brands or b"msf1" in brands:
+
+            return "HEIF", "High Efficiency Image File"
+
+        return "MP4", "MP4 Video"
+
     if header[:4] == b"PK\x03\x04":
 
         try:
 
-            with open(filepath, "rb") as file:
+            compound_filetype, compound_description = ComposeZipArchive(context)
+
+            if compound_filetype:
 
-                file.seek(0)
-                file_content = file.read(2048)
+                return compound_filetype, compound_description
 
-                if b"word/" in file_content:
+            file_content = context.Read(0, 2048)
 
-                    return "DOCX", "Microsoft Word Document"
+            if b"word/" in file_content:
 
-                if b"xl/" in file_content:
+                return "DOCX", "Microsoft Word Document"
 
-                    return "XLSX", "Microsoft Excel Spreadsheet"
+            if b"xl/" in file_content:
 
-                if b"ppt/" in file_content:
+                return "XLSX", "Microsoft Excel Spreadsheet"
 
-                    return "PPTX", "Microsoft PowerPoint Presentation"
+            if b"ppt/" in file_content:
 
-                return "ZIP", "Zip Archive"
+                return "PPTX", "Microsoft PowerPoint Presentation"
+
+            return "ZIP", "Zip Archive"
 
         except Exception as exception:
 
@@ -91,75 +168,134 @@ def ComposeCompoundFile(filepath, header):
 
     return None, None
 
-def DetectTextType(file_content):
+def ComposeZipArchive(context):
 
-    file_content = file_content.strip()
+    directory = ziparchive.FindCentralDirectory(context.Read, context.size)
 
-    if file_content.startswith(("{", "[")):
+    if directory is None:
 
-        try:
+        return None, None
 
-            json.loads(file_content)
+    office_part   = None
+    content_types = False
+    macros        = False
+    android       = False
+    java_manifest = False
+    mimetype      = None
 
-            return "JSON", "JavaScript Object Notation File"
+    for name, flags, method, compressed_size, file_size, local_offset in ziparchive.IterateCentralDirectory(context.Read, directory):
 
-        except (json.JSONDecodeError, ValueError) as exception:
+        if name == "mimetype" and method == 0:
 
-            exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
-            print(f"==> {RED}WARN{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+            mimetype = (local_offset, compressed_size)
 
-    try:
+        elif name == "[Content_Types].xml":
 
-        sample  = csv.reader(io.StringIO(file_content[:4096]), csv.Sniffer().sniff(file_content[:4096], delimiters=",\t;|"))
-        rows    = [row for row in sample if row]
+            content_types = True
 
-        if len(rows) >= 2 and len(rows[0]) >= 2:
+        elif name == "AndroidManifest.xml":
 
-            return "CSV", "Comma-Separated Values File"
+            android = True
 
-    except csv.Error as exception:
+        elif name.upper() == "META-INF/MANIFEST.MF":
 
-            exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
-            print(f"==> {RED}WARN{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+            java_manifest = True
+
+        elif name.endswith("/vbaProject.bin"):
+
+            macros = True
+
+        if office_part is None and name.split("/", 1)[0] + "/" in OFFICE_TYPES:
+
+            office_part = name.split("/", 1)[0] + "/"
+
+    if mimetype:
+
+        mimetype_content = ziparchive.ReadStoredMember(context.Read, *mimetype, limit=256)
+
+        if mimetype_content and mimetype_content.strip() in MIMETYPES:
 
-    return "TXT", "Text Document"
+            return MIMETYPES[mimetype_content.strip()]
 
-def FindFileType(filepath):
+    if content_types and office_part:
 
-    header = GetHeader(filepath)
+        return OFFICE_TYPES[office_part][1 if macros else 0]
+
+    if android:
+
+        return "APK", "Android Package"
+
+    if java_manifest:
+
+        return "JAR", "Java Archive"
+
+    return "ZIP", "Zip Archive"
+
+def DetectTextType(buffer, complete=False):
+
+    return text.ClassifyText(buffer, complete)
+
+def SignatureConfidence(signature):
+
+    return round(min(1.0, 0.6 + 0.1 * len(signature)), 2)
+
+def IdentifyFileType(filepath, context=None):
+
+    if context is None:
+
+        try:
+
+            with nyaruhodo_context.AnalysisContext(filepath) as context:
+
+                return IdentifyFileType(filepath, context)
+
+        except OSError as exception:
+
+            exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+            print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+
+            return None, "The file could not be read.", 0.0
+
+    header = GetHeader(context)
 
     if not header:
 
-        return None, "The file could not be read."
+        return None, "The file could not be read.", 0.0
 
-    for signature, (filetype, description) in Signatures().items():
+    match = signatures.MatchSignature(SignatureIndex(), context.Read)
 
-        if header.startswith(signature):
+    if match:
 
-            if signature in [b"RIFF", b"PK\x03\x04"]:
+        offset, signature, filetype, description = match
 
-                compound_filetype, compound_description = ComposeCompoundFile(filepath, header)
+        if (offset == 0 and signature[:4] in [b"RIFF", b"PK\x03\x04"]) or header[4:8] == b"ftyp":
 
-                if compound_filetype:
+            compound_filetype, compound_description = ComposeCompoundFile(context, header)
 
-                    return compound_filetype, compound_description
+            if compound_filetype:
 
-            return filetype, description
+                return compound_filetype, compound_description, 1.0
+
+        return filetype, description, SignatureConfidence(signature)
 
     try:
 
-        with open(filepath, "r", encoding="utf-8") as file:
+        text_type = DetectTextType(context.Read(0, text.SAMPLE_SIZE), context.size <= text.SAMPLE_SIZE)
 
-            file_content = file.read(1024)
+        if text_type:
 
-        return DetectTextType(file_content)
+            return text_type
 
     except Exception as exception:
 
         exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
         print(f"==> {YELLOW}WARNING{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
 
-    return "UNKNOWN", "Unknown File"
+    return "UNKNOWN", "Unknown File", 0.0
+
+def FindFileType(filepath, context=None):
+
+    return IdentifyFileType(filepath, context)[:2]
 
 def GetFileType(filename):
 
@@ -175,11 +311,10 @@ def ExtensionsMatch(variant_one, variant_two):
 
     return any(frozenset({variant_one, variant_two}) == item for item in EXTENSIONS)
 
-def AnalyseFile(filepath, filename):
+def CompareFileType(filename, detected_filetype, description):
 
-    original_filetype              = GetFileType(filename)
-    detected_filetype, description = FindFileType(filepath)
-    mismatch                       = False
+    original_filetype = GetFileType(filename)
+    mismatch          = False
 
     if detected_filetype == "UNKNOWN":
 
@@ -206,4 +341,34 @@ def AnalyseFile(filepath, filename):
         "description":       description,
         "mismatch":          mismatch,
         "message":           message,
-    }
\ No newline at end of file
+    }
+
+def AnalyseFile(filepath, filename, context=None):
+
+    if context is None:
+
+        try:
+
+            with nyaruhodo_context.AnalysisContext(filepath) as context:
+
+                return AnalyseFile(filepath, filename, context)
+
+        except OSError as exception:
+
+            exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+            print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+
+            analysis               = CompareFileType(filename, None, "The file could not be read.")
+            analysis["confidence"] = 0.0
+
+            return analysis
+
+    detected_filetype, description, confidence = IdentifyFileType(filepath, context)
+    analysis                                   = CompareFileType(filename, detected_filetype, description)
+    analysis["confidence"]                     = confidence
+
+    if detected_filetype == "UNKNOWN":
+
+        analysis.update(entropy.Analyse(context.Map()))
+
+    return analysis
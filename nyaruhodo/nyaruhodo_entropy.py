@@ -0,0 +1,167 @@
+import collections
+import math
+
+CHUNK_SIZE       = 1048576
+BINCOUNT_SIZE    = 65536
+WINDOW_SIZE      = 4096
+WINDOW_LIMIT     = 64
+SAMPLE_THRESHOLD = 64 * 1048576
+SAMPLE_BLOCKS    = 64
+SAMPLE_SIZE      = 65536
+# NumPy is optional and not a declared dependency. Without it, histograms fall back to collections.Counter,
+# which is much slower, so inputs above 4 MiB (not SAMPLE_THRESHOLD) are sampled in 16 KiB blocks instead.
+FALLBACK_LIMITS  = (4 * 1048576, 16384)
+TEXT_BYTES       = set(range(0x20, 0x7F)) | {0x09, 0x0A, 0x0D}
+NUMPY            = None
+
+def Numpy():
+
+    global NUMPY
+
+    if NUMPY is None:
+
+        try:
+
+            import numpy
+
+            NUMPY = numpy
+
+        except ImportError:
+
+            NUMPY = False
+
+    return NUMPY
+
+def Histogram(buffer, histogram=None):
+
+    numpy = Numpy()
+
+    if numpy:
+
+        values = numpy.frombuffer(buffer, dtype=numpy.uint8)
+        counts = sum((numpy.bincount(values[start: start + BINCOUNT_SIZE], minlength=256) for start in range(0, len(values), BINCOUNT_SIZE)), numpy.zeros(256, dtype=numpy.intp))
+
+        return counts if histogram is None else histogram + counts
+
+    counts = collections.Counter(bytes(buffer))
+    counts = [counts[value] for value in range(256)]
+
+    return counts if histogram is None else [total + count for total, count in zip(histogram, counts)]
+
+def Entropy(histogram):
+
+    total = sum(int(count) for count in histogram)
+
+    if not total:
+
+        return 0.0
+
+    return max(0.0, -sum(count / total * math.log2(count / total) for count in map(int, histogram) if count))
+
+def ChiSquare(histogram):
+
+    total    = sum(int(count) for count in histogram)
+    expected = total / 256
+
+    if not total:
+
+        return 0.0
+
+    return sum((int(count) - expected) ** 2 / expected for count in histogram)
+
+def RangeHistogram(source, offset=0, count=None):
+
+    end       = source.size if count is None else min(offset + count, source.size)
+    histogram = [0] * 256
+
+    while offset < end:
+
+        histogram  = Histogram(source.Slice(offset, min(CHUNK_SIZE, end - offset)), histogram)
+        offset    += CHUNK_SIZE
+
+    return histogram
+
+def SampledHistogram(source, offset=0, count=None, block_count=SAMPLE_BLOCKS, block_size=SAMPLE_SIZE):
+
+    end       = source.size if count is None else min(offset + count, source.size)
+    histogram = [0] * 256
+    stride    = max((end - offset - block_size) // max(block_count - 1, 1), block_size)
+
+    for block_index in range(block_count):
+
+        block_offset = min(offset + block_index * stride, max(end - block_size, offset))
+        histogram    = Histogram(source.Slice(block_offset, min(block_size, end - block_offset)), histogram)
+
+        if block_offset + block_size >= end:
+
+            break
+
+    return histogram
+
+def SampleLimits():
+
+    return (SAMPLE_THRESHOLD, SAMPLE_SIZE) if Numpy() else FALLBACK_LIMITS
+
+def RangeEntropy(source, offset=0, count=None):
+
+    count                        = source.size - offset if count is None else min(count, source.size - offset)
+    sample_threshold, block_size = SampleLimits()
+
+    if count > sample_threshold:
+
+        return Entropy(SampledHistogram(source, offset, count, block_size=block_size))
+
+    return Entropy(RangeHistogram(source, offset, count))
+
+def WindowProfile(source, window_size=WINDOW_SIZE, window_limit=WINDOW_LIMIT):
+
+    stride  = max(window_size, -(-source.size // window_limit))
+    profile = []
+
+    for offset in range(0, source.size, stride):
+
+        profile.append(round(Entropy(Histogram(source.Slice(offset, window_size))), 2))
+
+    return profile
+
+def ContentClass(histogram):
+
+    total = sum(int(count) for count in histogram)
+
+    if not total:
+
+        return "empty"
+
+    entropy    = Entropy(histogram)
+    text_share = sum(int(histogram[value]) for value in TEXT_BYTES) / total
+
+    if int(histogram[0]) / total > 0.5 or entropy < 1.0:
+
+        return "sparse"
+
+    if text_share > 0.95:
+
+        return "text"
+
+    if entropy > 7.9 and (total < SAMPLE_SIZE or ChiSquare(histogram) < 400):
+
+        return "encrypted"
+
+    if entropy > 7.2:
+
+        return "compressed"
+
+    return "binary"
+
+def Analyse(source):
+
+    sample_threshold, block_size = SampleLimits()
+    sampled                      = source.size > sample_threshold
+    histogram                    = SampledHistogram(source, block_size=block_size) if sampled else RangeHistogram(source)
+
+    return {
+        "entropy":         round(Entropy(histogram), 4),
+        "content_class":   ContentClass(histogram),
+        "entropy_profile": WindowProfile(source),
+        "sampled":         sampled,
+    }
@@ -0,0 +1,139 @@
+import concurrent.futures
+import os
+import threading
+
+from . import nyaruhodo_context
+from . import nyaruhodo_core       as core
+from . import nyaruhodo_properties as properties
+from . import nyaruhodo_zip        as ziparchive
+
+RESET         = "\033[0m"
+RED           = "\033[91m"
+DEPTH_LIMIT   = 3
+MEMBER_LIMIT  = 64
+MEMBER_SIZE   = 16 * 1048576
+TOTAL_SIZE    = 64 * 1048576
+WORKER_LIMIT  = 4
+ARCHIVE_TYPES = {filetype for filetype, module_name in properties.READERS.items() if module_name == "archive"}
+
+def Budget():
+
+    return {"members": MEMBER_LIMIT, "bytes": TOTAL_SIZE, "lock": threading.Lock()}
+
+def Reserve(budget, file_size):
+
+    with budget["lock"]:
+
+        if budget["members"] <= 0 or (file_size and budget["bytes"] <= 0):
+
+            return None
+
+        limit              = min(file_size, MEMBER_SIZE, budget["bytes"])
+        budget["members"] -= 1
+        budget["bytes"]   -= limit
+
+        return limit
+
+def AnalyseMember(read, entry, limit, depth, budget):
+
+    name, flags, method, compressed_size, file_size, local_offset = entry
+    member_name                                                   = name.rsplit("/", 1)[-1]
+
+    try:
+
+        memberbytes = ziparchive.ReadMember(read, local_offset, method, compressed_size, limit)
+
+        if memberbytes is None:
+
+            return {"filename": name, "size": file_size, "error": "The member could not be decompressed."}
+
+        with nyaruhodo_context.AnalysisContext(name, buffer=memberbytes) as context:
+
+            analysis = core.AnalyseFile(name, member_name, context)
+            metadata = properties.Read(name, analysis["detected_filetype"], context)
+
+            if metadata:
+
+                analysis["metadata"] = metadata
+
+            if depth + 1 < DEPTH_LIMIT:
+
+                AnalyseArchive(analysis, context, depth + 1, budget)
+
+        analysis["filename"]        = name
+        analysis["size"]            = file_size
+        analysis["compressed_size"] = compressed_size
+
+        if len(memberbytes) < file_size:
+
+            analysis["truncated"] = True
+
+        return analysis
+
+    except Exception as exception:
+
+        exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+        print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+
+        return {"filename": name, "size": file_size, "error": "Analysis failed.", "message": exception_string}
+
+def AnalyseArchive(analysis, context, depth=0, budget=None):
+
+    if analysis.get("detected_filetype") not in ARCHIVE_TYPES:
+
+        return analysis
+
+    budget    = budget or Budget()
+    source    = context.Map()
+    directory = ziparchive.FindCentralDirectory(source.Bytes, source.size)
+
+    if directory is None:
+
+        return analysis
+
+    members  = []
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=WORKER_LIMIT) if depth == 0 else None
+
+    try:
+
+        for entry in ziparchive.IterateCentralDirectory(source.Bytes, directory):
+
+            name, flags, method, compressed_size, file_size, local_offset = entry
+
+            if name.endswith("/") or not file_size:
+
+                continue
+
+            limit = Reserve(budget, 0 if flags & 0x1 or method not in (0, 8) else file_size)
+
+            if limit is None:
+
+                analysis["members_truncated"] = True
+
+                break
+
+            if flags & 0x1:
+
+                members.append({"filename": name, "size": file_size, "error": "The member is encrypted."})
+
+            elif method not in (0, 8):
+
+                members.append({"filename": name, "size": file_size, "error": f"The member uses an unsupported compression method ({method})."})
+
+            elif executor is not None:
+
+                members.append(executor.submit(AnalyseMember, source.Bytes, entry, limit, depth, budget))
+
+            else:
+
+                members.append(AnalyseMember(source.Bytes, entry, limit, depth, budget))
+
+        analysis["members"] = [member.result() if isinstance(member, concurrent.futures.Future) else member for member in members]
+
+    finally:
+
+        if executor is not None:
+
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return analysis
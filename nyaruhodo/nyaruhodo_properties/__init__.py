@@ -1,41 +1,89 @@
+import importlib
 import os
 
-from . import nyaruhodo_archive    as archive
-from . import nyaruhodo_audio      as audio
-from . import nyaruhodo_database   as database
-from . import nyaruhodo_document   as document
-from . import nyaruhodo_executable as executable
-from . import nyaruhodo_image      as image
-from . import nyaruhodo_markup     as markup
-
-RESET = "\033[0m"
-RED   = "\033[91m"
+from .. import nyaruhodo_context
 
+RESET   = "\033[0m"
+RED     = "\033[91m"
+MODULES = {
+    "archive":    "nyaruhodo_archive",
+    "audio":      "nyaruhodo_audio",
+    "common":     "nyaruhodo_common",
+    "database":   "nyaruhodo_database",
+    "document":   "nyaruhodo_document",
+    "executable": "nyaruhodo_executable",
+    "image":      "nyaruhodo_image",
+    "isobmff":    "nyaruhodo_isobmff",
+    "markup":     "nyaruhodo_markup",
+    "riff":       "nyaruhodo_riff",
+    "tables":     "nyaruhodo_tables",
+}
 READERS = {
-    "APK":    archive.Read,
-    "DLL":    executable.Read,
-    "DOCX":   archive.Read,
-    "ELF":    executable.Read,
-    "EXE":    executable.Read,
-    "HTM":    markup.Read,
-    "HTML":   markup.Read,
-    "JPEG":   image.Read,
-    "JPG":    image.Read,
-    "MP3":    audio.Read,
-    "PDF":    document.Read,
-    "PNG":    image.Read,
-    "PPTX":   archive.Read,
-    "SQLITE": database.Read,
-    "SVG":    markup.Read,
-    "XLSX":   archive.Read,
-    "XML":    markup.Read,
-    "ZIP":    archive.Read,
+    "3GP":    "isobmff",
+    "APK":    "archive",
+    "AVI":    "riff",
+    "AVIF":   "isobmff",
+    "DLL":    "executable",
+    "DOCM":   "archive",
+    "DOCX":   "archive",
+    "ELF":    "executable",
+    "EPUB":   "archive",
+    "EXE":    "executable",
+    "HEIC":   "isobmff",
+    "HEIF":   "isobmff",
+    "HTM":    "markup",
+    "HTML":   "markup",
+    "JAR":    "archive",
+    "JPEG":   "image",
+    "JPG":    "image",
+    "M4A":    "isobmff",
+    "M4V":    "isobmff",
+    "MOV":    "isobmff",
+    "MP3":    "audio",
+    "MP4":    "isobmff",
+    "ODG":    "archive",
+    "ODP":    "archive",
+    "ODS":    "archive",
+    "ODT":    "archive",
+    "PDF":    "document",
+    "PNG":    "image",
+    "PPTM":   "archive",
+    "PPTX":   "archive",
+    "SQLITE": "database",
+    "SVG":    "markup",
+    "WAV":    "riff",
+    "WEBP":   "riff",
+    "XLSM":   "archive",
+    "XLSX":   "archive",
+    "XML":    "markup",
+    "ZIP":    "archive",
 }
 
-def Read(filepath, filetype):
+def __getattr__(name):
+
+    if name not in MODULES:
+
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    module          = importlib.import_module(f".{MODULES[name]}", __name__)
+    globals()[name] = module
+
+    return module
+
+def Reader(filetype):
+
+    module_name = READERS.get((filetype or "").upper())
+
+    if module_name is None:
+
+        return None
+
+    return (globals().get(module_name) or __getattr__(module_name)).Read
+
+def Read(filepath, filetype, context=None):
 
     filetype       = (filetype or "").upper()
-    readerfunction = READERS.get(filetype)
+    readerfunction = Reader(filetype)
 
     if not readerfunction:
 
@@ -43,7 +91,15 @@ def Read(filepath, filetype):
 
     try:
 
-        properties = readerfunction(filepath, filetype)
+        if context is None:
+
+            with nyaruhodo_context.AnalysisContext(filepath) as context:
+
+                properties = readerfunction(context, filetype)
+
+        else:
+
+            properties = readerfunction(context, filetype)
 
         return {key: str(value) for key, value in properties.items() if value not in (None, "", [], {})}
 
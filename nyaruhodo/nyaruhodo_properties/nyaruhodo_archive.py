@@ -1,16 +1,14 @@
 import os
-import sys
 import xml.etree.ElementTree
-import zipfile
 
-sys.path.insert(0, os.path.dirname(__file__))
+from .. import nyaruhodo_zip as ziparchive
+from . import nyaruhodo_common as common
+from . import nyaruhodo_tables as tables
 
-import nyaruhodo_tables as tables
-
-RESET       = "\033[0m"
-RED         = "\033[91m"
-NAMESPACE   = "http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"
-CORE_FIELDS = {
+RESET              = "\033[0m"
+RED                = "\033[91m"
+NAMESPACE          = "http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"
+CORE_FIELDS        = {
     "dc:title":          ("Title",          "dc"),
     "dc:creator":        ("Author",         "dc"),
     "dc:description":    ("Description",    "dc"),
@@ -22,7 +20,7 @@ CORE_FIELDS = {
     "dcterms:created":   ("Created",        "dcterms"),
     "dcterms:modified":  ("Modified",       "dcterms"),
 }
-APP_FIELDS  = [
+APP_FIELDS         = [
     ("Application", "Application"),
     ("AppVersion",  "AppVersion"),
     ("Pages",       "PageCount"),
@@ -31,14 +29,26 @@ APP_FIELDS  = [
     ("Slides",      "SlideCount"),
     ("Company",     "Company"),
 ]
+OFFICE_PARTS       = {"docProps/core.xml", "docProps/app.xml"}
+OFFICE_PART_LIMIT  = 1048576
+LISTED_ENTRIES     = 8
+LISTED_EXTENSIONS  = 10
+TOP_LEVEL_LIMIT    = 4096
+EXTENSION_LIMIT    = 256
+BOMB_RATIO         = 100
+BOMB_MINIMUM_SIZE  = 1048576
+SPAN_LIMIT         = 65536
+NESTED_EXTENSIONS  = {"7z", "apk", "bz2", "cab", "gz", "iso", "jar", "rar", "tar", "tgz", "war", "xz", "zip", "zst"}
+
+def ReadMicrosoftOffice(read, office_parts, properties):
 
-def ReadMicrosoftOffice(archive, entry_names, properties):
+    if "docProps/core.xml" in office_parts:
 
-    if "docProps/core.xml" in entry_names:
+        partbytes = ziparchive.ReadMember(read, *office_parts["docProps/core.xml"], limit=OFFICE_PART_LIMIT)
 
-        with archive.open("docProps/core.xml") as file:
+        if partbytes:
 
-            xml_root = xml.etree.ElementTree.parse(file).getroot()
+            xml_root = xml.etree.ElementTree.fromstring(partbytes)
 
             for xml_tag, (field_label, _namespace_prefix) in CORE_FIELDS.items():
 
@@ -48,11 +58,13 @@ def ReadMicrosoftOffice(archive, entry_names, properties):
 
                     properties[field_label] = element.text.strip()
 
-    if "docProps/app.xml" in entry_names:
+    if "docProps/app.xml" in office_parts:
 
-        with archive.open("docProps/app.xml") as file:
+        partbytes = ziparchive.ReadMember(read, *office_parts["docProps/app.xml"], limit=OFFICE_PART_LIMIT)
 
-            xml_root = xml.etree.ElementTree.parse(file).getroot()
+        if partbytes:
+
+            xml_root = xml.etree.ElementTree.fromstring(partbytes)
 
             for xml_tag, field_label in APP_FIELDS:
 
@@ -62,44 +74,193 @@ def ReadMicrosoftOffice(archive, entry_names, properties):
 
                     properties[field_label] = element.text.strip()
 
-def ReadArchive(archive, entry_names, properties):
+def CountOverlaps(read, spans, directory_offset):
+
+    overlap_count = 0
+    maximum_end   = 0
+
+    for local_offset, compressed_size in sorted(spans):
+
+        data_offset = ziparchive.LocalDataOffset(read, local_offset)
+        end         = (local_offset + ziparchive.LOCAL_HEADER.size if data_offset is None else data_offset) + compressed_size
+
+        if local_offset < maximum_end or end > directory_offset:
+
+            overlap_count += 1
+
+        maximum_end = max(maximum_end, end)
+
+    return overlap_count
+
+def WalkArchive(read, directory):
+
+    entry_count      = 0
+    directory_count  = 0
+    encrypted_count  = 0
+    total_size       = 0
+    total_compressed = 0
+    maximum_ratio    = 0
+    nested_count     = 0
+    top_level        = {}
+    top_level_capped = False
+    extensions       = {}
+    office_parts     = {}
+    spans            = []
+
+    for name, flags, method, compressed_size, file_size, local_offset in ziparchive.IterateCentralDirectory(read, directory):
+
+        entry_count    += 1
+        separator       = name.find("/")
+        top_level_name  = name if separator == -1 else name[:separator + 1]
+
+        if top_level_name not in top_level:
+
+            if len(top_level) < TOP_LEVEL_LIMIT:
+
+                top_level[top_level_name] = None
+
+            else:
+
+                top_level_capped = True
+
+        if name in OFFICE_PARTS:
+
+            office_parts[name] = (local_offset, method, compressed_size)
+
+        if flags & 0x1:
+
+            encrypted_count += 1
+
+        if len(spans) < SPAN_LIMIT:
+
+            spans.append((local_offset, compressed_size))
+
+        if name[-1:] == "/":
+
+            directory_count += 1
+
+            continue
+
+        total_size       += file_size
+        total_compressed += compressed_size
+
+        if file_size >= BOMB_MINIMUM_SIZE:
+
+            maximum_ratio = max(maximum_ratio, file_size / max(compressed_size, 1))
 
-    entries                        = archive.infolist()
-    total_size                     = sum(entry.file_size for entry in entries)
-    compressed_size                = sum(entry.compress_size for entry in entries)
+        basename  = name[name.rfind("/") + 1:]
+        dot       = basename.rfind(".")
+        extension = basename[dot + 1:].lower() if dot > 0 else ""
+
+        if extension in NESTED_EXTENSIONS:
+
+            nested_count += 1
+
+        if extension not in extensions and len(extensions) >= EXTENSION_LIMIT:
+
+            extension = "other"
+
+        extensions[extension] = extensions.get(extension, 0) + 1
+
+    return {
+        "entry_count":      entry_count,
+        "directory_count":  directory_count,
+        "encrypted_count":  encrypted_count,
+        "total_size":       total_size,
+        "compressed_size":  total_compressed,
+        "maximum_ratio":    maximum_ratio,
+        "overlap_count":    CountOverlaps(read, spans, directory["directory_offset"]),
+        "nested_count":     nested_count,
+        "top_level":        top_level,
+        "top_level_capped": top_level_capped,
+        "extensions":       extensions,
+        "office_parts":     office_parts,
+    }
+
+def BombIndicators(summary):
+
+    indicators = []
+    total_size = summary["total_size"]
+
+    if total_size >= BOMB_MINIMUM_SIZE and total_size / max(summary["compressed_size"], 1) > BOMB_RATIO:
+
+        indicators.append(f"Extreme Ratio ({total_size / max(summary['compressed_size'], 1):,.0f}:1)")
+
+    elif summary["maximum_ratio"] > BOMB_RATIO:
+
+        indicators.append(f"Extreme Entry Ratio ({summary['maximum_ratio']:,.0f}:1)")
+
+    if summary["overlap_count"]:
+
+        indicators.append(f"Overlapping Entries ({summary['overlap_count']})")
+
+    if summary["nested_count"]:
+
+        indicators.append(f"Nested Archives ({summary['nested_count']})")
+
+    return indicators
+
+def ReadArchive(summary, properties):
+
+    total_size                     = summary["total_size"]
     properties["UncompressedSize"] = f"{total_size:,} bytes"
+    properties["CompressedSize"]   = f"{summary['compressed_size']:,} bytes"
 
     if total_size > 0:
 
-        compression_percentage         = (1 - compressed_size / total_size) * 100
+        compression_percentage         = (1 - summary["compressed_size"] / total_size) * 100
         properties["CompressionRatio"] = f"{compression_percentage:.1f}%"
 
-    if entry_names:
+    if summary["directory_count"]:
+
+        properties["DirectoryCount"] = summary["directory_count"]
 
-        top_level                     = [n for n in entry_names if n.count("/") == 0 or (n.count("/") == 1 and n.endswith("/"))]
-        display_names                 = top_level if top_level else entry_names
-        first_entries                 = display_names[:8]
-        overflow_suffix               = f" ... (+{len(display_names) - 8} more)" if len(display_names) > 8 else ""
+    if summary["encrypted_count"]:
+
+        properties["EncryptedEntries"] = summary["encrypted_count"]
+
+    if summary["top_level"]:
+
+        display_names                 = list(summary["top_level"])
+        first_entries                 = display_names[:LISTED_ENTRIES]
+        overflow_count                = f"{len(display_names) - LISTED_ENTRIES}{'+' if summary['top_level_capped'] else ''}"
+        overflow_suffix               = f" ... (+{overflow_count} more)" if len(display_names) > LISTED_ENTRIES else ""
         properties["TopLevelEntries"] = ", ".join(first_entries) + overflow_suffix
 
-def Read(filepath, filetype):
+    if summary["extensions"]:
+
+        extensions                    = sorted(summary["extensions"].items(), key=lambda item: (-item[1], item[0]))
+        properties["ExtensionCounts"] = ", ".join(f"{extension or '(none)'}: {count:,}" for extension, count in extensions[:LISTED_EXTENSIONS])
+
+def Read(context, filetype):
 
     properties = {}
 
     try:
 
-        with zipfile.ZipFile(filepath, "r") as archive:
+        source    = common.source(context)
+        directory = ziparchive.FindCentralDirectory(source.Bytes, source.size)
 
-            entry_names             = archive.namelist()
-            properties["FileCount"] = len(entry_names)
+        if directory is None:
 
-            if "docProps/core.xml" in entry_names:
+            raise ValueError("ZIP CENTRAL DIRECTORY NOT FOUND")
 
-                ReadMicrosoftOffice(archive, entry_names, properties)
+        summary                 = WalkArchive(source.Bytes, directory)
+        properties["FileCount"] = summary["entry_count"]
 
-            else:
+        if directory["zip64"]:
+
+            properties["Zip64"] = "Yes"
+
+        if "docProps/core.xml" in summary["office_parts"]:
+
+            ReadMicrosoftOffice(source.Bytes, summary["office_parts"], properties)
+
+        else:
+
+            ReadArchive(summary, properties)
 
-                ReadArchive(archive, entry_names, properties)
+        properties["ZipBombIndicators"] = ", ".join(BombIndicators(summary))
 
     except Exception as exception:
 
@@ -108,4 +269,4 @@ def Read(filepath, filetype):
 
     return properties
 
-read = Read
\ No newline at end of file
+read = Read
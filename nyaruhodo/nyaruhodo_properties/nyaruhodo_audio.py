@@ -1,119 +1,508 @@
 import os
 import struct
-import sys
 
-sys.path.insert(0, os.path.dirname(__file__))
+from . import nyaruhodo_common as common
+from . import nyaruhodo_tables as tables
+
+RESET              = "\033[0m"
+RED                = "\033[91m"
+MPEG_VERSIONS      = {0: "MPEG-2.5", 2: "MPEG-2", 3: "MPEG-1"}
+MPEG_LAYERS        = {1: "Layer III", 2: "Layer II", 3: "Layer I"}
+MPEG_BITRATES      = {
+    (3, 3): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (3, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (3, 1): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 3): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 1): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MPEG_SAMPLE_RATES  = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+MPEG_CHANNEL_MODES = ("Stereo", "Joint Stereo", "Dual Channel", "Mono")
+MPEG_SEARCH_SIZE   = 65536
+MPEG_SAMPLE_COUNT  = 16
+MPEG_SAMPLE_FRAMES = 4
+ID3_BINARY_FRAMES  = {"APIC", "PIC", "GEOB", "GEO", "PRIV"}
+ID3_TEXT_LIMIT     = 65536
+ID3_BINARY_LIMIT   = 256
+ID3_UNSYNC_BLOCK   = 65536
 
-import nyaruhodo_common as common
-import nyaruhodo_tables as tables
+def ReadIdentifierTagVersionOne(fieldbytes):
 
-RESET = "\033[0m"
-RED   = "\033[91m"
+    return str(fieldbytes, "latin1", errors="replace").split("\x00")[0].strip()
 
-def ReadIdentifierTagVersionOne(fieldbytes):
+def ReadSynchsafe(sizebytes):
 
-    return fieldbytes.split(b"\x00")[0].decode("latin1", errors="replace").strip()
+    return (sizebytes[0] & 0x7F) << 21 | (sizebytes[1] & 0x7F) << 14 | (sizebytes[2] & 0x7F) << 7 | (sizebytes[3] & 0x7F)
 
-def Read(filepath, filetype):
+def IsFrameIdentifier(identifierbytes):
 
-    properties   = {}
-    header = common.read(filepath, 10)
+    return len(identifierbytes) > 0 and all(0x30 <= character <= 0x39 or 0x41 <= character <= 0x5A for character in identifierbytes)
 
-    if len(header) < 10:
+def IterateFrames(tag, offset, end, version_major):
+
+    identifier_size = 3 if version_major == 2 else 4
+    header_size     = 6 if version_major == 2 else 10
+
+    while offset + header_size <= end:
+
+        identifierbytes = tag[offset: offset + identifier_size]
+
+        if not IsFrameIdentifier(identifierbytes):
+
+            return
+
+        if version_major == 2:
+
+            frame_size  = int.from_bytes(tag[offset + 3: offset + 6], "big")
+            frame_flags = 0
+
+        elif version_major == 4:
+
+            frame_size  = ReadSynchsafe(tag[offset + 4: offset + 8])
+            plain_size  = tag.UnpackValue(">I", offset + 4)
+            frame_flags = tag.UnpackValue(">H", offset + 8)
+
+            if any(sizebyte & 0x80 for sizebyte in tag[offset + 4: offset + 8]):
+
+                frame_size = plain_size
+
+            elif plain_size != frame_size and not IsFrameIdentifier(tag[offset + header_size + frame_size: offset + header_size + frame_size + 4]) and IsFrameIdentifier(tag[offset + header_size + plain_size: offset + header_size + plain_size + 4]):
+
+                frame_size = plain_size
+
+        else:
+
+            frame_size  = tag.UnpackValue(">I", offset + 4)
+            frame_flags = tag.UnpackValue(">H", offset + 8)
+
+        yield str(identifierbytes, "ascii"), offset + header_size, min(frame_size, end - offset - header_size), frame_flags
+
+        offset += header_size + frame_size
+
+def FrameLimit(frame_id, frame_label_map):
+
+    if frame_id in ID3_BINARY_FRAMES:
+
+        return ID3_BINARY_LIMIT
+
+    if frame_id in frame_label_map:
+
+        return ID3_TEXT_LIMIT + 10
+
+    return 0
+
+def ReadFrames(tag, offset, end, version_major, frame_label_map):
+
+    for frame_id, data_offset, frame_size, frame_flags in IterateFrames(tag, offset, end, version_major):
+
+        yield frame_id, tag.Bytes(data_offset, min(frame_size, FrameLimit(frame_id, frame_label_map))), frame_size, frame_flags
+
+def ReadUnsynchronised(source, offset, end, count, limit=None):
+
+    limit     = count if limit is None else limit
+    remaining = count
+    output    = bytearray()
+
+    while remaining > 0 and offset < end:
+
+        block = source.Bytes(offset, min(remaining, ID3_UNSYNC_BLOCK, end - offset))
+
+        if not block:
+
+            break
+
+        offset += len(block)
+
+        if block[-1:] == b"\xff" and offset < end and source[offset: offset + 1] == b"\x00":
+
+            offset += 1
+
+        decoded    = block.replace(b"\xff\x00", b"\xff")
+        remaining -= len(decoded)
+
+        if len(output) < limit:
+
+            output += decoded[:limit - len(output)]
+
+    return bytes(output), offset
+
+def ReadUnsynchronisedFrames(source, offset, end, version_major, frame_label_map):
+
+    identifier_size = 3 if version_major == 2 else 4
+    header_size     = 6 if version_major == 2 else 10
+
+    while offset + header_size <= end:
+
+        headerbytes, offset = ReadUnsynchronised(source, offset, end, header_size)
+
+        if len(headerbytes) < header_size or not IsFrameIdentifier(headerbytes[:identifier_size]):
+
+            return
+
+        if version_major == 2:
+
+            frame_size  = int.from_bytes(headerbytes[3:6], "big")
+            frame_flags = 0
+
+        else:
+
+            frame_size, frame_flags = struct.unpack_from(">IH", headerbytes, 4)
+
+        frame_id           = str(headerbytes[:identifier_size], "ascii")
+        framebytes, offset = ReadUnsynchronised(source, offset, end, frame_size, FrameLimit(frame_id, frame_label_map))
+
+        yield frame_id, framebytes, frame_size, frame_flags
+
+def DecodeTextFrame(frame_id, frame_data):
+
+    text_encoding = frame_data[0]
+    frame_text    = frame_data[1:]
+
+    if frame_id in ("COMM", "COM") and len(frame_text) > 3:
+
+        frame_text = frame_text[3:]
+
+    if text_encoding == 0:
+
+        value = str(frame_text, "latin1", errors="replace")
+
+    elif text_encoding == 1:
+
+        value = str(frame_text, "utf-16", errors="replace")
+
+    elif text_encoding == 2:
+
+        value = str(frame_text, "utf-16-be", errors="replace")
+
+    else:
+
+        value = str(frame_text, "utf-8", errors="replace")
+
+    if frame_id in ("COMM", "COM") and "\x00" in value:
+
+        value = value.split("\x00", 1)[1]
+
+    return value.strip("\x00\ufeff").strip()
+
+def DescribeBinaryFrame(frame_id, frame_data, frame_size):
+
+    if frame_id in ("APIC", "PIC"):
+
+        if frame_id == "PIC":
+
+            mime_type = f"image/{str(frame_data[1:4], 'latin1').lower().replace('jpg', 'jpeg')}"
+
+        else:
+
+            mime_type = str(frame_data[1:], "latin1", errors="replace").split("\x00")[0]
+
+        return "AttachedPictures", f"{mime_type or 'image'} ({frame_size} bytes)"
+
+    if frame_id in ("GEOB", "GEO"):
+
+        return "EmbeddedObjects", f"{str(frame_data[1:], 'latin1', errors='replace').split(chr(0))[0] or 'application/octet-stream'} ({frame_size} bytes)"
+
+    return "PrivateFrames", f"{str(frame_data, 'latin1', errors='replace').split(chr(0))[0]} ({frame_size} bytes)"
+
+def ReadIdentifierTagVersionTwo(source, version_major, tag_flags, tag_size):
+
+    properties      = {}
+    binary_frames   = {}
+    frame_label_map = tables.ID3v2_FRAMES_v22 if version_major == 2 else tables.ID3v2_FRAMES_v24
+    offset          = 10
+    end             = min(10 + tag_size, source.size)
+
+    if tag_flags & 0x80 and version_major < 4:
+
+        if tag_flags & 0x40 and version_major == 3:
+
+            sizebytes, offset = ReadUnsynchronised(source, offset, end, 4)
+            _, offset         = ReadUnsynchronised(source, offset, end, int.from_bytes(sizebytes, "big"), 0)
+
+        frames = ReadUnsynchronisedFrames(source, offset, end, version_major, frame_label_map)
+
+    else:
+
+        if tag_flags & 0x40 and version_major == 3:
+
+            offset += 4 + source.UnpackValue(">I", offset)
+
+        elif tag_flags & 0x40 and version_major == 4:
+
+            offset += ReadSynchsafe(source[offset: offset + 4])
+
+        frames = ReadFrames(source, offset, end, version_major, frame_label_map)
+
+    for frame_id, framebytes, frame_size, frame_flags in frames:
+
+        frame_label = frame_label_map.get(frame_id)
+
+        if frame_id in ID3_BINARY_FRAMES:
+
+            property_name, description = DescribeBinaryFrame(frame_id, framebytes, frame_size)
+            binary_frames.setdefault(property_name, []).append(description)
+
+            continue
+
+        if not frame_label or not frame_size:
+
+            continue
+
+        if version_major == 3:
+
+            compressed     = frame_flags & 0x80
+            prefix_size    = (4 if frame_flags & 0x80 else 0) + (1 if frame_flags & 0x40 else 0) + (1 if frame_flags & 0x20 else 0)
+            encrypted      = frame_flags & 0x40
+            unsynchronised = False
+
+        else:
+
+            compressed     = frame_flags & 0x08
+            prefix_size    = (1 if frame_flags & 0x40 else 0) + (4 if frame_flags & 0x01 else 0)
+            encrypted      = frame_flags & 0x04
+            unsynchronised = frame_flags & 0x02 or tag_flags & 0x80
+
+        if encrypted or frame_size <= prefix_size:
+
+            continue
+
+        frame_data = framebytes[prefix_size: prefix_size + ID3_TEXT_LIMIT]
+
+        if unsynchronised:
+
+            frame_data = frame_data.replace(b"\xff\x00", b"\xff")
+
+        if compressed:
+
+            import zlib
+
+            frame_data = zlib.decompressobj().decompress(frame_data, ID3_TEXT_LIMIT)
+
+        try:
+
+            value = DecodeTextFrame(frame_id, frame_data) if frame_data else ""
+
+            if value:
+
+                properties[frame_label] = value
+
+        except Exception as exception:
+
+            exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+            print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+
+    for property_name, descriptions in binary_frames.items():
+
+        properties[property_name] = ", ".join(descriptions)
+
+    return properties
+
+def ParseFrameHeader(headerbytes):
+
+    if len(headerbytes) < 4:
+
+        return None
+
+    header_value     = struct.unpack(">I", headerbytes[:4])[0]
+    version_index    = (header_value >> 19) & 0x3
+    layer_index      = (header_value >> 17) & 0x3
+    bitrate_index    = (header_value >> 12) & 0xF
+    samplerate_index = (header_value >> 10) & 0x3
+
+    if header_value >> 21 != 0x7FF or version_index == 1 or layer_index == 0 or bitrate_index in (0, 15) or samplerate_index == 3:
+
+        return None
+
+    bitrate           = MPEG_BITRATES[(3 if version_index == 3 else 2, layer_index)][bitrate_index]
+    sample_rate       = MPEG_SAMPLE_RATES[version_index][samplerate_index]
+    padding           = (header_value >> 9) & 0x1
+    samples_per_frame = 384 if layer_index == 3 else (1152 if version_index == 3 or layer_index == 2 else 576)
+
+    if layer_index == 3:
+
+        frame_length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+
+    else:
+
+        frame_length = samples_per_frame // 8 * bitrate * 1000 // sample_rate + padding
+
+    return {
+        "version":           version_index,
+        "layer":             layer_index,
+        "bitrate":           bitrate,
+        "sample_rate":       sample_rate,
+        "channel_mode":      (header_value >> 6) & 0x3,
+        "samples_per_frame": samples_per_frame,
+        "frame_length":      frame_length,
+    }
+
+def FindFrame(source, offset, end):
+
+    search_end = min(offset + MPEG_SEARCH_SIZE, end)
+
+    while offset < search_end:
+
+        offset = source.Find(b"\xff", offset, search_end)
+
+        if offset == -1:
+
+            return None, None
+
+        frame = ParseFrameHeader(source[offset: offset + 4])
+
+        if frame and offset + frame["frame_length"] + 4 <= end:
+
+            following_frame = ParseFrameHeader(source[offset + frame["frame_length"]: offset + frame["frame_length"] + 4])
+
+            if following_frame and following_frame["version"] == frame["version"] and following_frame["layer"] == frame["layer"] and following_frame["sample_rate"] == frame["sample_rate"]:
+
+                return offset, frame
+
+        elif frame and offset + frame["frame_length"] == end:
+
+            return offset, frame
+
+        offset += 1
+
+    return None, None
+
+def FormatDuration(duration):
+
+    minutes, seconds = divmod(int(round(duration)), 60)
+    hours, minutes   = divmod(minutes, 60)
+
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def ReadMPEGAudio(source, audio_start, audio_end):
+
+    properties          = {}
+    frame_offset, frame = FindFrame(source, audio_start, audio_end)
+
+    if frame is None:
 
         return properties
 
-    if header[:3] == b"ID3":
+    properties["Format"]      = f"{MPEG_VERSIONS[frame['version']]} {MPEG_LAYERS[frame['layer']]}"
+    properties["SampleRate"]  = f"{frame['sample_rate']} Hz"
+    properties["ChannelMode"] = MPEG_CHANNEL_MODES[frame["channel_mode"]]
+    side_information_size     = (32 if frame["channel_mode"] != 3 else 17) if frame["version"] == 3 else (17 if frame["channel_mode"] != 3 else 9)
+    xing_offset               = frame_offset + 4 + side_information_size
+    frame_count               = None
+    byte_count                = None
 
-        version_major            = header[3]
-        version_minor            = header[4]
-        properties["ID3Version"] = f"2.{version_major}.{version_minor}"
-        id3_tag_size             = ((header[6] & 0x7F) << 21 | (header[7] & 0x7F) << 14 | (header[8] & 0x7F) << 7 | (header[9] & 0x7F))
-        filebytes               = common.read(filepath, 10 + id3_tag_size)
-        id3bytes                = filebytes[10: 10 + id3_tag_size]
-        frame_label_map          = tables.ID3v2_FRAMES_v22 if version_major == 2 else tables.ID3v2_FRAMES_v24
-        frame_id_size            = 3 if version_major == 2 else 4
-        frame_size_length        = 3 if version_major == 2 else 4
-        frame_offset             = 0
+    if source[xing_offset: xing_offset + 4] in (b"Xing", b"Info"):
 
-        while frame_offset < len(id3bytes) - (frame_id_size + frame_size_length + 2):
+        properties["BitrateMode"] = "VBR" if source[xing_offset: xing_offset + 4] == b"Xing" else "CBR"
+        xing_flags                = source.UnpackValue(">I", xing_offset + 4)
+        field_offset              = xing_offset + 8
 
-            frame_id = id3bytes[frame_offset: frame_offset + frame_id_size].decode("ascii", errors="replace")
+        if xing_flags & 0x1:
 
-            if not frame_id.strip("\x00") or frame_id[0] == "\x00":
+            frame_count   = source.UnpackValue(">I", field_offset)
+            field_offset += 4
 
-                break
+        if xing_flags & 0x2:
 
-            if version_major == 2:
+            byte_count    = source.UnpackValue(">I", field_offset)
+            field_offset += 4
 
-                frame_size    = (id3bytes[frame_offset+3] << 16) | (id3bytes[frame_offset+4] << 8) | id3bytes[frame_offset+5]
-                frame_data    = id3bytes[frame_offset + 6: frame_offset + 6 + frame_size]
-                frame_offset += 6 + frame_size
+        field_offset += (100 if xing_flags & 0x4 else 0) + (4 if xing_flags & 0x8 else 0)
+        encoder       = source.Bytes(field_offset, 9).rstrip(b"\x00 ").decode("ascii", errors="replace")
 
-            else:
+        if encoder[:4] in ("LAME", "Lavf", "Lavc", "GOGO"):
 
-                if version_major == 4:
+            properties["Encoder"] = encoder
 
-                    frame_size = ((id3bytes[frame_offset+4] & 0x7F) << 21 | (id3bytes[frame_offset+5] & 0x7F) << 14 | (id3bytes[frame_offset+6] & 0x7F) << 7 | (id3bytes[frame_offset+7] & 0x7F))
+    elif source[frame_offset + 36: frame_offset + 40] == b"VBRI":
 
-                else:
+        properties["BitrateMode"] = "VBR"
+        byte_count, frame_count   = source.Unpack(">II", frame_offset + 46)
 
-                    frame_size = struct.unpack_from(">I", id3bytes, frame_offset + 4)[0]
+    if frame_count:
 
-                frame_data    = id3bytes[frame_offset + 10: frame_offset + 10 + frame_size]
-                frame_offset += 10 + frame_size
+        duration   = frame_count * frame["samples_per_frame"] / frame["sample_rate"]
+        byte_count = byte_count or audio_end - frame_offset
 
-            frame_label = frame_label_map.get(frame_id)
+    else:
 
-            if frame_label and frame_data:
+        bitrates = []
+        stride   = max((audio_end - frame_offset) // MPEG_SAMPLE_COUNT, 1)
 
-                text_encoding = frame_data[0] if frame_data else 0
-                frame_text    = frame_data[1:]
+        for sample_index in range(MPEG_SAMPLE_COUNT):
 
-                if frame_id == "COMM" and len(frame_text) > 3:
+            sample_offset, sample_frame = FindFrame(source, frame_offset + sample_index * stride, audio_end)
 
-                    frame_text = frame_text[3:]
+            for _ in range(MPEG_SAMPLE_FRAMES):
 
-                try:
+                if sample_frame is None:
 
-                    if text_encoding == 0:
+                    break
 
-                        value = frame_text.decode("latin1", errors="replace")
+                sample_offset += sample_frame["frame_length"]
+                sample_frame   = ParseFrameHeader(source[sample_offset: sample_offset + 4])
 
-                    elif text_encoding == 1:
+                if sample_frame:
 
-                        value = frame_text.decode("utf-16", errors="replace")
+                    bitrates.append(sample_frame["bitrate"])
 
-                    elif text_encoding == 2:
+        bitrates = bitrates or [frame["bitrate"]]
 
-                        value = frame_text.decode(
-                            "utf-16-be", errors="replace")
+        if "BitrateMode" not in properties:
 
-                    else:
+            properties["BitrateMode"] = "CBR" if len(set(bitrates)) == 1 else "VBR (Estimated)"
 
-                        value = frame_text.decode("utf-8", errors="replace")
+        byte_count = audio_end - frame_offset
+        duration   = byte_count * 8 / (sum(bitrates) / len(bitrates) * 1000)
 
-                    value = value.strip("\x00").strip()
+    if duration > 0:
 
-                    if value:
+        properties["Duration"] = FormatDuration(duration)
+        properties["Bitrate"]  = f"{round(byte_count * 8 / duration / 1000)} kbps"
 
-                        properties[frame_label] = value
+    return properties
 
-                except Exception as exception:
+def Read(context, filetype):
 
-                    exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
-                    print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+    source     = common.source(context)
+    properties = {}
+    header     = source[:10]
 
-    try:
+    if len(header) < 10:
+
+        return properties
 
-        with open(filepath, "rb") as f:
+    if header[:3] == b"ID3":
+
+        version_major            = header[3]
+        version_minor            = header[4]
+        properties["ID3Version"] = f"2.{version_major}.{version_minor}"
+        id3_tag_size             = ReadSynchsafe(header[6:10])
+
+        try:
+
+            properties.update(ReadIdentifierTagVersionTwo(source, version_major, header[5], id3_tag_size))
+
+        except Exception as exception:
+
+            exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+            print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+
+    tail        = source.Slice(-128)
+    audio_start = 0
+    audio_end   = source.size - (128 if len(tail) == 128 and tail[:3] == b"TAG" else 0)
+
+    if header[:3] == b"ID3":
+
+        audio_start = 10 + id3_tag_size + (10 if header[5] & 0x10 else 0)
+
+    try:
 
-            f.seek(-128, 2)
-            tail = f.read(128)
+        properties.update(ReadMPEGAudio(source, audio_start, audio_end))
 
-    except OSError:
+    except Exception as exception:
 
-        tail = b""
+        exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+        print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
 
     if len(tail) == 128 and tail[:3] == b"TAG":
 
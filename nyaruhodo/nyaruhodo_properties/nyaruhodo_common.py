@@ -1,15 +1,176 @@
+import mmap
 import os
+import struct
+import weakref
 
-RESET = "\033[0m"
-RED   = "\033[91m"
+RESET        = "\033[0m"
+RED          = "\033[91m"
+STRUCTS      = {}
+EXPORT_LIMIT = 1024
 
-def Read(filepath, number_ofbytes=None):
+class ByteSource:
+
+    def __init__(self, source):
+
+        self.mapping      = None
+        self.exports      = []
+        self.export_limit = EXPORT_LIMIT
+
+        if isinstance(source, (bytes, bytearray, memoryview)):
+
+            self.buffer = source
+
+        else:
+
+            file = source.file if hasattr(source, "file") else open(source, "rb")
+
+            try:
+
+                self.mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.buffer  = self.mapping
+
+            except ValueError:
+
+                self.buffer = b""
+
+            finally:
+
+                if not hasattr(source, "file"):
+
+                    file.close()
+
+        self.view = memoryview(self.buffer)
+        self.size = len(self.view)
+
+    def __len__(self):
+
+        return self.size
+
+    def __getitem__(self, key):
+
+        if isinstance(key, slice):
+
+            return self.Export(self.view[key])
+
+        return self.view[key]
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exception_type, exception_value, exception_traceback):
+
+        self.Close()
+
+    def Export(self, view):
+
+        if self.mapping is not None:
+
+            self.exports.append(weakref.ref(view))
+
+            if len(self.exports) > self.export_limit:
+
+                self.exports      = [reference for reference in self.exports if reference() is not None]
+                self.export_limit = max(EXPORT_LIMIT, 2 * len(self.exports))
+
+        return view
+
+    def Slice(self, offset, count=None):
+
+        if offset < 0:
+
+            offset = max(self.size + offset, 0)
+
+        return self.Export(self.view[offset: self.size if count is None else offset + count])
+
+    def Bytes(self, offset, count=None):
+
+        if offset < 0:
+
+            offset = max(self.size + offset, 0)
+
+        end = self.size if count is None else offset + count
+
+        if self.mapping is not None:
+
+            return self.mapping[offset: max(end, offset)]
+
+        return self.view[offset: end].tobytes()
+
+    def Unpack(self, structformat, offset):
+
+        unpacker = STRUCTS.get(structformat)
+
+        if unpacker is None:
+
+            unpacker = STRUCTS[structformat] = struct.Struct(structformat)
+
+        return unpacker.unpack_from(self.view, offset)
+
+    def UnpackValue(self, structformat, offset):
+
+        return self.Unpack(structformat, offset)[0]
+
+    def Find(self, subsequence, start=0, end=None):
+
+        end = self.size if end is None else end
+
+        if isinstance(self.buffer, memoryview):
+
+            position = self.view[start: end].tobytes().find(subsequence)
+
+            return position + start if position != -1 else -1
+
+        return self.buffer.find(subsequence, start, end)
+
+    def Close(self):
+
+        for reference in self.exports:
+
+            view = reference()
+
+            if view is not None:
+
+                try:
+
+                    view.release()
+
+                except BufferError:
+
+                    pass
+
+        self.exports = []
+        self.view.release()
+
+        if self.mapping is not None:
+
+            try:
+
+                self.mapping.close()
+
+            except BufferError as exception:
+
+                print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {str(exception).upper()}")
+
+def Source(context):
+
+    if hasattr(context, "Map"):
+
+        return context.Map()
+
+    return ByteSource(context)
+
+def Read(context, number_ofbytes=None):
 
     try:
 
-        with open(filepath, "rb") as file:
+        if isinstance(context, (str, bytes, os.PathLike)):
 
-            return file.read(number_ofbytes) if number_ofbytes else file.read()
+            with open(context, "rb") as file:
+
+                return file.read(number_ofbytes) if number_ofbytes else file.read()
+
+        return context.Read(0, number_ofbytes)
 
     except Exception as exception:
 
@@ -20,6 +181,10 @@ def Read(filepath, number_ofbytes=None):
 
 def DecodeBytes(number_ofbytes):
 
+    if isinstance(number_ofbytes, memoryview):
+
+        number_ofbytes = number_ofbytes.tobytes()
+
     if isinstance(number_ofbytes, (bytes, bytearray)):
 
         try:
@@ -37,3 +202,4 @@ def DecodeBytes(number_ofbytes):
 
 decode = DecodeBytes
 read   = Read
+source = Source
@@ -1,39 +1,302 @@
 import os
-import sqlite3
-import struct
-import sys
 
-sys.path.insert(0, os.path.dirname(__file__))
+from . import nyaruhodo_common as common
 
-import nyaruhodo_common as common
+RESET               = "\033[0m"
+RED                 = "\033[91m"
+TEXT_ENCODINGS      = {1: ("UTF-8", "utf-8"), 2: ("UTF-16 LE", "utf-16-le"), 3: ("UTF-16 BE", "utf-16-be")}
+INTERIOR_PAGES      = {0x02, 0x05}
+LEAF_PAGES          = {0x0A, 0x0D}
+SCHEMA_PAGE_LIMIT   = 1024
+SCHEMA_TYPES        = [("table", "Table"), ("index", "Index"), ("view", "View"), ("trigger", "Trigger")]
+PAYLOAD_LIMIT       = 4096
+SCHEMA_PREFIX_SIZE  = 256
+ESTIMATE_PAGE_LIMIT = 32
+LISTED_NAMES        = 32
+MINIMUM_USABLE_SIZE = 480
 
-RESET = "\033[0m"
-RED   = "\033[91m"
+def ReadVarint(source, offset):
 
-def Read(filepath, filetype):
+    value = 0
+
+    for index in range(9):
+
+        byte = source[offset + index]
+
+        if index == 8:
+
+            return (value << 8) | byte, offset + 9
+
+        value = (value << 7) | (byte & 0x7F)
+
+        if not byte & 0x80:
+
+            return value, offset + index + 1
+
+def ReadPage(source, database, page_number):
+
+    if not 1 <= page_number <= database["file_pages"]:
+
+        raise ValueError(f"SQLITE PAGE {page_number} OUT OF RANGE")
+
+    page_offset   = (page_number - 1) * database["page_size"]
+    header_offset = page_offset + (100 if page_number == 1 else 0)
+    page_type     = source[header_offset]
+
+    if page_type not in INTERIOR_PAGES and page_type not in LEAF_PAGES:
+
+        raise ValueError(f"SQLITE PAGE {page_number} IS NOT A B-TREE PAGE")
+
+    cell_count     = source.UnpackValue(">H", header_offset + 3)
+    right_pointer  = source.UnpackValue(">I", header_offset + 8) if page_type in INTERIOR_PAGES else None
+    pointer_offset = header_offset + (12 if page_type in INTERIOR_PAGES else 8)
+    cell_offsets   = [page_offset + source.UnpackValue(">H", pointer_offset + 2 * index) for index in range(cell_count)]
+
+    return page_type, cell_offsets, right_pointer
+
+def ChildPages(source, database, page_number):
+
+    page_type, cell_offsets, right_pointer = ReadPage(source, database, page_number)
+
+    if page_type not in INTERIOR_PAGES:
+
+        return page_type, cell_offsets, []
+
+    return page_type, cell_offsets, [source.UnpackValue(">I", cell_offset) for cell_offset in cell_offsets] + [right_pointer]
+
+def ReadPayload(source, database, cell_offset, limit=PAYLOAD_LIMIT):
+
+    payload_size, offset = ReadVarint(source, cell_offset)
+    _, offset            = ReadVarint(source, offset)
+    usable_size          = database["usable_size"]
+    maximum_local        = usable_size - 35
+    minimum_local        = (usable_size - 12) * 32 // 255 - 23
+    local_size           = payload_size
+
+    if payload_size > maximum_local:
+
+        local_size = minimum_local + (payload_size - minimum_local) % (usable_size - 4)
+        local_size = local_size if local_size <= maximum_local else minimum_local
+
+    payload       = bytearray(source.Slice(offset, min(local_size, limit)))
+    overflow_page = source.UnpackValue(">I", offset + local_size) if local_size < payload_size else 0
+    remaining     = min(payload_size, limit) - len(payload)
+    visited       = set()
+
+    while overflow_page and remaining > 0:
+
+        if overflow_page in visited or not 1 <= overflow_page <= database["file_pages"]:
+
+            break
+
+        visited.add(overflow_page)
+
+        page_offset    = (overflow_page - 1) * database["page_size"]
+        chunk          = source.Slice(page_offset + 4, min(usable_size - 4, remaining))
+        payload       += chunk
+        remaining     -= len(chunk)
+        overflow_page  = source.UnpackValue(">I", page_offset)
+
+    return bytes(payload)
+
+def ColumnSize(serial_type):
+
+    if serial_type in (0, 8, 9, 10, 11):
+
+        return 0
+
+    if serial_type <= 6:
+
+        return (1, 2, 3, 4, 6, 8)[serial_type - 1]
+
+    if serial_type == 7:
+
+        return 8
+
+    return (serial_type - 12) // 2
+
+def RecordSize(payload, column_limit):
+
+    source              = common.ByteSource(payload)
+    header_size, offset = ReadVarint(source, 0)
+    record_size         = header_size
+
+    for _ in range(column_limit):
+
+        if offset >= header_size:
+
+            break
+
+        serial_type, offset  = ReadVarint(source, offset)
+        record_size         += ColumnSize(serial_type)
+
+    return record_size
+
+def ParseRecord(payload, encoding, column_limit=None):
+
+    source              = common.ByteSource(payload)
+    header_size, offset = ReadVarint(source, 0)
+    serial_types        = []
+
+    while offset < header_size and (column_limit is None or len(serial_types) < column_limit):
+
+        serial_type, offset = ReadVarint(source, offset)
+        serial_types.append(serial_type)
+
+    values = []
+    offset = header_size
+
+    for serial_type in serial_types:
+
+        if serial_type in (0, 8, 9):
+
+            values.append(None if serial_type == 0 else serial_type - 8)
+
+        elif serial_type <= 6:
+
+            size = (1, 2, 3, 4, 6, 8)[serial_type - 1]
+            values.append(int.from_bytes(payload[offset: offset + size], "big", signed=True))
+            offset += size
+
+        elif serial_type == 7:
+
+            values.append(source.UnpackValue(">d", offset))
+            offset += 8
+
+        else:
+
+            size = (serial_type - 12) // 2
+            data = payload[offset: offset + size]
+            values.append(data.decode(encoding, errors="replace") if serial_type % 2 else data)
+            offset += size
+
+    return values
+
+def ReadSchema(source, database):
+
+    schema  = []
+    pending = [1]
+    visited = set()
+
+    while pending and len(visited) < SCHEMA_PAGE_LIMIT:
+
+        page_number = pending.pop()
+
+        if page_number in visited:
+
+            continue
+
+        visited.add(page_number)
+
+        page_type, cell_offsets, child_pages = ChildPages(source, database, page_number)
+
+        if page_type in INTERIOR_PAGES:
+
+            pending.extend(reversed(child_pages))
+
+            continue
+
+        for cell_offset in cell_offsets:
+
+            payload     = ReadPayload(source, database, cell_offset, SCHEMA_PREFIX_SIZE)
+            record_size = RecordSize(payload, 4)
+
+            if record_size > len(payload):
+
+                payload = ReadPayload(source, database, cell_offset, record_size)
+
+            values = ParseRecord(payload, database["encoding"], 4)
+
+            if len(values) == 4:
+
+                schema.append(tuple(values))
+
+    return schema
+
+def EstimateRows(source, database, root_page):
+
+    level     = [root_page]
+    scale     = 1.0
+    rows      = 0.0
+    estimated = False
+
+    for _ in range(SCHEMA_PAGE_LIMIT):
+
+        if len(level) > ESTIMATE_PAGE_LIMIT:
+
+            stride    = len(level) / ESTIMATE_PAGE_LIMIT
+            scale    *= stride
+            level     = [level[int(index * stride)] for index in range(ESTIMATE_PAGE_LIMIT)]
+            estimated = True
+
+        next_level = []
+
+        for page_number in level:
+
+            page_type, cell_offsets, child_pages = ChildPages(source, database, page_number)
+
+            if page_type in LEAF_PAGES or page_type == 0x02:
+
+                rows += len(cell_offsets) * scale
+
+            next_level.extend(child_pages)
+
+        if not next_level:
+
+            break
+
+        level = next_level
+
+    return int(round(rows)), estimated
+
+def ReadFreelist(source, database, trunk_page):
+
+    page_count = 0
+    visited    = set()
+
+    while trunk_page and trunk_page not in visited and 1 <= trunk_page <= database["file_pages"]:
+
+        visited.add(trunk_page)
+
+        page_offset  = (trunk_page - 1) * database["page_size"]
+        page_count  += 1 + source.UnpackValue(">I", page_offset + 4)
+        trunk_page   = source.UnpackValue(">I", page_offset)
+
+    return page_count
+
+def Read(context, filetype):
 
     properties = {}
 
     try:
 
-        filebytes = common.read(filepath, 100)
+        source = common.source(context)
 
-        if filebytes[:16] != b"SQLite format 3\x00":
+        if source.size < 100 or source[:16] != b"SQLite format 3\x00":
 
             return properties
 
-        pagesize = struct.unpack_from(">H", filebytes, 16)[0]
+        pagesize = source.UnpackValue(">H", 16)
 
         if pagesize == 1:
 
             pagesize = 65536
 
-        text_encoding_code          = struct.unpack_from(">I", filebytes, 56)[0]
-        user_version                = struct.unpack_from(">I", filebytes, 60)[0]
-        application_id              = struct.unpack_from(">I", filebytes, 68)[0]
-        schema_version              = struct.unpack_from(">I", filebytes, 40)[0]
+        if pagesize < 512 or pagesize & (pagesize - 1):
+
+            raise ValueError(f"INVALID SQLITE PAGE SIZE {pagesize}")
+
+        if pagesize - source[20] < MINIMUM_USABLE_SIZE:
+
+            raise ValueError(f"INVALID SQLITE USABLE SIZE {pagesize - source[20]}")
+
+        text_encoding_code          = source.UnpackValue(">I", 56)
+        user_version                = source.UnpackValue(">I", 60)
+        application_id              = source.UnpackValue(">I", 68)
+        schema_version              = source.UnpackValue(">I", 40)
+        encoding_label, encoding    = TEXT_ENCODINGS.get(text_encoding_code, (str(text_encoding_code), "utf-8"))
         properties["PageSize"]      = f"{pagesize} bytes"
-        properties["TextEncoding"]  = {1: "UTF-8", 2: "UTF-16 LE", 3: "UTF-16 BE"}.get(text_encoding_code, str(text_encoding_code))
+        properties["TextEncoding"]  = encoding_label
         properties["SchemaVersion"] = schema_version
 
         if user_version:
@@ -44,20 +307,80 @@ def Read(filepath, filetype):
 
             properties["ApplicationID"] = f"0x{application_id:08X}"
 
-        try:
+        if source[18] == 2 or source[19] == 2:
+
+            properties["JournalMode"] = "WAL"
+
+        sqlite_version = source.UnpackValue(">I", 96)
+
+        if sqlite_version:
+
+            properties["SQLiteVersion"] = f"{sqlite_version // 1000000}.{sqlite_version // 1000 % 1000}.{sqlite_version % 1000}"
+
+        header_pages = source.UnpackValue(">I", 28)
+        file_pages   = source.size // pagesize
+        database     = {
+            "page_size":   pagesize,
+            "usable_size": pagesize - source[20],
+            "file_pages":  file_pages,
+            "encoding":    encoding,
+        }
+
+        if not header_pages or source.UnpackValue(">I", 24) != source.UnpackValue(">I", 92):
+
+            header_pages = file_pages
+
+        properties["PageCount"] = header_pages
+
+        if header_pages != file_pages or source.size % pagesize:
+
+            properties["SizeMismatch"] = f"Header declares {header_pages:,} pages, file holds {source.size / pagesize:,.2f}"
+
+        freelist_pages = source.UnpackValue(">I", 36)
+
+        if freelist_pages:
+
+            properties["FreelistPages"] = freelist_pages
+            freelist_walked             = ReadFreelist(source, database, source.UnpackValue(">I", 32))
+
+            if freelist_walked != freelist_pages:
+
+                properties["FreelistMismatch"] = f"Header declares {freelist_pages:,} free pages, trunk chain holds {freelist_walked:,}"
+
+        schema = ReadSchema(source, database)
+
+        for schema_type, field_label in SCHEMA_TYPES:
+
+            names                            = [name for entry_type, name, _, _ in schema if entry_type == schema_type]
+            properties[f"{field_label}Count"] = len(names)
+
+            if names:
+
+                overflow_suffix                   = f" ... (+{len(names) - LISTED_NAMES} more)" if len(names) > LISTED_NAMES else ""
+                properties[f"{field_label}Names"] = ", ".join(str(name) for name in names[:LISTED_NAMES]) + overflow_suffix
+
+        row_estimates = []
+
+        for entry_type, name, _, root_page in schema:
+
+            if entry_type != "table" or not isinstance(root_page, int) or root_page < 1:
+
+                continue
+
+            try:
+
+                rows, estimated = EstimateRows(source, database, root_page)
+                row_estimates.append(f"{name}: {'~' if estimated else ''}{rows:,}")
+
+            except (IndexError, ValueError):
+
+                row_estimates.append(f"{name}: unreadable")
 
-            connection               = sqlite3.connect(f"file:{filepath}?mode=ro", uri=True)
-            cursor                   = connection.cursor()
-            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
-            properties["TableCount"] = cursor.fetchone()[0]
-            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='index'")
-            properties["IndexCount"] = cursor.fetchone()[0]
-            connection.close()
+            if len(row_estimates) >= LISTED_NAMES:
 
-        except Exception as exception:
+                break
 
-            exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
-            print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+        properties["RowCounts"] = ", ".join(row_estimates)
 
     except Exception as exception:
 
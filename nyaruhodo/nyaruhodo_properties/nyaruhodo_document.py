@@ -1,64 +1,615 @@
 import os
 import re
-import sys
 
-sys.path.insert(0, os.path.dirname(__file__))
+from . import nyaruhodo_common as common
 
-import nyaruhodo_common as common
+RESET              = "\033[0m"
+RED                = "\033[91m"
+PDF_INFO_FIELDS    = ["Title", "Author", "Subject", "Keywords", "Creator", "Producer", "CreationDate", "ModDate"]
+PDF_SCAN_SIZE      = 65536
+PDF_TAIL_SIZE      = 1024
+PDF_PREVIOUS_LIMIT = 64
+PDF_DEPTH_LIMIT    = 32
+PDF_STREAM_LIMIT   = 16 * 1048576
+PDF_WHITESPACE     = b"\x00\t\n\x0c\r "
+PDF_SPACE          = re.compile(rb"(?:[\x00\t\n\x0c\r ]|%[^\r\n]*)*")
+PDF_NAME           = re.compile(rb"/([^\x00\t\n\x0c\r ()<>\[\]{}/%]*)")
+PDF_NAME_ESCAPE    = re.compile(rb"#([0-9A-Fa-f]{2})")
+PDF_REFERENCE      = re.compile(rb"(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+R(?![^\x00\t\n\x0c\r ()<>\[\]{}/%])")
+PDF_NUMBER         = re.compile(rb"[+\-]?(?:\d+\.?\d*|\.\d+)")
+PDF_INTEGER        = re.compile(rb"\d+")
+PDF_KEYWORD        = re.compile(rb"[A-Za-z]+")
+PDF_KEYWORDS       = {b"true": True, b"false": False, b"null": None}
+PDF_HEX_STRING     = re.compile(rb"<([0-9A-Fa-f\x00\t\n\x0c\r ]*)>")
+PDF_STRING_TOKEN   = re.compile(rb"\\.|[()]", re.DOTALL)
+PDF_STRING_ESCAPE  = re.compile(rb"\\([0-7]{1,3}|\r\n|.)", re.DOTALL)
+PDF_STRING_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f", b"\n": b"", b"\r": b"", b"\r\n": b""}
+PDF_VERSION        = re.compile(rb"%PDF-(\d+\.\d+)")
+PDF_STARTXREF      = re.compile(rb"startxref[\x00\t\n\x0c\r ]+(\d+)")
+PDF_OBJECT_HEADER  = re.compile(rb"[\x00\t\n\x0c\r ]*(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+obj")
+PDF_STREAM_START   = re.compile(rb"[\x00\t\n\x0c\r ]*stream\r?\n")
+PDF_XREF_START     = re.compile(rb"[\x00\t\n\x0c\r ]*xref")
+PDF_XREF_SECTION   = re.compile(rb"[\x00\t\n\x0c\r ]*(\d+)[\t ]+(\d+)[\x00\t\n\x0c\r ]*")
+PDF_XREF_ENTRY     = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+PDF_TRAILER        = re.compile(rb"[\x00\t\n\x0c\r ]*trailer")
+PDF_LINEARIZED     = re.compile(rb"/Linearized[\x00\t\n\x0c\r ]")
+PDF_INFO_BLOCK     = re.compile(rb"/Info\s*<<(.*?)>>", re.DOTALL)
+PDF_INFO_FIELD     = re.compile(rb"/(" + "|".join(PDF_INFO_FIELDS).encode("ascii") + rb")\s*\(([^)]*)\)")
+PDF_PAGE_OBJECT    = re.compile(rb"/Type\s*/Page[^s]")
+PDF_ENCRYPT        = re.compile(rb"/Encrypt")
 
-RESET = "\033[0m"
-RED   = "\033[91m"
+def UnescapeName(name_match):
 
-def Read(filepath, filetype):
+    return bytes([int(name_match.group(1), 16)])
 
-    filebytes = common.read(filepath, 65536)
-    properties = {}
+def DecodeName(name_match):
+
+    return PDF_NAME_ESCAPE.sub(UnescapeName, name_match.group(1)).decode("latin1")
+
+def UnescapeString(escape_match):
+
+    escape = escape_match.group(1)
+
+    if escape[0] in b"01234567":
+
+        return bytes([int(escape, 8) & 0xFF])
+
+    return PDF_STRING_ESCAPES.get(escape, escape)
+
+def ParseLiteralString(buffer, offset):
+
+    nesting = 1
+
+    for token_match in PDF_STRING_TOKEN.finditer(buffer, offset):
+
+        token = token_match.group()
+
+        if token == b"(":
+
+            nesting += 1
+
+        elif token == b")":
+
+            nesting -= 1
+
+            if not nesting:
+
+                return PDF_STRING_ESCAPE.sub(UnescapeString, bytes(buffer[offset: token_match.start()])), token_match.end()
+
+    raise ValueError("UNTERMINATED PDF STRING")
+
+def ParseObject(buffer, offset, depth=0):
+
+    if depth > PDF_DEPTH_LIMIT:
+
+        raise ValueError("PDF OBJECT NESTING TOO DEEP")
+
+    offset = PDF_SPACE.match(buffer, offset).end()
+    token  = bytes(buffer[offset: offset + 2])
+
+    if not token:
+
+        raise ValueError("UNEXPECTED END OF PDF DATA")
+
+    if token == b"<<":
+
+        dictionary  = {}
+        offset     += 2
+
+        while True:
+
+            offset = PDF_SPACE.match(buffer, offset).end()
+
+            if bytes(buffer[offset: offset + 2]) == b">>":
+
+                return dictionary, offset + 2
+
+            name_match = PDF_NAME.match(buffer, offset)
+
+            if name_match is None:
+
+                raise ValueError("MALFORMED PDF DICTIONARY")
+
+            value, offset                      = ParseObject(buffer, name_match.end(), depth + 1)
+            dictionary[DecodeName(name_match)] = value
+
+    if token[:1] == b"[":
+
+        array   = []
+        offset += 1
+
+        while True:
+
+            offset = PDF_SPACE.match(buffer, offset).end()
+
+            if bytes(buffer[offset: offset + 1]) == b"]":
+
+                return array, offset + 1
+
+            value, offset = ParseObject(buffer, offset, depth + 1)
+            array.append(value)
+
+    if token[:1] == b"(":
+
+        return ParseLiteralString(buffer, offset + 1)
+
+    if token[:1] == b"<":
+
+        hex_match = PDF_HEX_STRING.match(buffer, offset)
+
+        if hex_match is None:
+
+            raise ValueError("MALFORMED PDF HEX STRING")
+
+        hexdigits = hex_match.group(1).translate(None, PDF_WHITESPACE)
+
+        return bytes.fromhex((hexdigits + b"0" * (len(hexdigits) % 2)).decode("ascii")), hex_match.end()
+
+    if token[:1] == b"/":
+
+        name_match = PDF_NAME.match(buffer, offset)
+
+        return DecodeName(name_match), name_match.end()
+
+    reference_match = PDF_REFERENCE.match(buffer, offset)
+
+    if reference_match:
+
+        return (int(reference_match.group(1)), int(reference_match.group(2))), reference_match.end()
+
+    number_match = PDF_NUMBER.match(buffer, offset)
+
+    if number_match:
+
+        number = number_match.group()
+
+        return float(number) if b"." in number else int(number), number_match.end()
+
+    keyword_match = PDF_KEYWORD.match(buffer, offset)
+
+    if keyword_match and keyword_match.group() in PDF_KEYWORDS:
+
+        return PDF_KEYWORDS[keyword_match.group()], keyword_match.end()
+
+    raise ValueError("UNEXPECTED PDF TOKEN")
+
+def ReadIndirectObject(buffer, offset):
+
+    header_match = PDF_OBJECT_HEADER.match(buffer, offset)
+
+    if header_match is None:
+
+        raise ValueError("MISSING PDF OBJECT HEADER")
+
+    value, offset = ParseObject(buffer, header_match.end())
+    stream_match  = PDF_STREAM_START.match(buffer, offset) if isinstance(value, dict) else None
+
+    return value, stream_match.end() if stream_match else None
+
+def ApplyPredictor(data, parameters):
+
+    predictor = parameters.get("Predictor", 1) if isinstance(parameters, dict) else 1
+
+    if predictor < 10:
+
+        return data if predictor == 1 else None
+
+    colors     = parameters.get("Colors", 1)
+    bits       = parameters.get("BitsPerComponent", 8)
+    pixel_size = max(1, colors * bits // 8)
+    row_size   = (parameters.get("Columns", 1) * colors * bits + 7) // 8
+    previous   = bytearray(row_size)
+    output     = bytearray()
+
+    for row_offset in range(0, len(data) - row_size, row_size + 1):
+
+        filter_type = data[row_offset]
+        row         = bytearray(data[row_offset + 1: row_offset + 1 + row_size])
+
+        if filter_type == 1:
+
+            for index in range(pixel_size, row_size):
+
+                row[index] = (row[index] + row[index - pixel_size]) & 0xFF
+
+        elif filter_type == 2:
+
+            row = bytearray((value + above) & 0xFF for value, above in zip(row, previous))
+
+        elif filter_type == 3:
+
+            for index in range(row_size):
+
+                left       = row[index - pixel_size] if index >= pixel_size else 0
+                row[index] = (row[index] + (left + previous[index]) // 2) & 0xFF
+
+        elif filter_type == 4:
+
+            for index in range(row_size):
+
+                left       = row[index - pixel_size] if index >= pixel_size else 0
+                upper_left = previous[index - pixel_size] if index >= pixel_size else 0
+                estimate   = left + previous[index] - upper_left
+                distances  = (abs(estimate - left), abs(estimate - previous[index]), abs(estimate - upper_left))
+                row[index] = (row[index] + (left, previous[index], upper_left)[distances.index(min(distances))]) & 0xFF
+
+        output   += row
+        previous  = row
+
+    return bytes(output)
+
+def ReadStream(document, dictionary, data_offset):
+
+    source = document["source"]
+    length = ResolveObject(document, dictionary.get("Length"))
+
+    if not isinstance(length, int) or length < 0 or data_offset + length > source.size:
+
+        stream_end = source.Find(b"endstream", data_offset)
+
+        if stream_end == -1:
+
+            return None
+
+        length = stream_end - data_offset
+
+    data       = source.Slice(data_offset, length)
+    filters    = ResolveObject(document, dictionary.get("Filter"))
+    filters    = filters if isinstance(filters, list) else [filters] if filters else []
+    parameters = ResolveObject(document, dictionary.get("DecodeParms"))
+    parameters = parameters[0] if isinstance(parameters, list) and parameters else parameters
+
+    if not filters:
+
+        return data.tobytes()
+
+    if filters not in (["FlateDecode"], ["Fl"]):
+
+        return None
+
+    import zlib
 
     try:
 
-        filetext = filebytes.decode("latin1", errors="replace")
+        return ApplyPredictor(zlib.decompressobj().decompress(data, PDF_STREAM_LIMIT), ResolveObject(document, parameters))
 
-    except Exception as exception:
+    except zlib.error:
 
-        exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
-        print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
-      
-        return properties
+        return None
 
-    version_match = re.search(r"%PDF-(\d+\.\d+)", filetext)
+def ReadCrossReferenceStream(document, dictionary, data_offset):
 
-    if version_match:
+    data   = ReadStream(document, dictionary, data_offset)
+    widths = dictionary.get("W")
 
-        properties["PDFVersion"] = version_match.group(1)
+    if data is None or not isinstance(widths, list) or len(widths) != 3 or not sum(widths):
 
-    info_match = re.search(r"/Info\s*<<(.*?)>>", filetext, re.DOTALL)
+        raise ValueError("UNREADABLE PDF CROSS-REFERENCE STREAM")
 
-    if info_match:
+    index    = dictionary.get("Index") or [0, dictionary.get("Size", 0)]
+    entries  = {}
+    position = 0
+
+    for start, count in zip(index[0::2], index[1::2]):
+
+        for number in range(start, start + count):
+
+            if position + sum(widths) > len(data):
+
+                return entries
+
+            fields = []
+
+            for width in widths:
+
+                fields.append(int.from_bytes(data[position: position + width], "big"))
+                position += width
+
+            if not widths[0]:
+
+                fields[0] = 1
+
+            entries.setdefault(number, tuple(fields))
+
+    return entries
+
+def ReadCrossReference(document, offset):
+
+    buffer     = document["source"].view
+    xref_match = PDF_XREF_START.match(buffer, offset)
+
+    if xref_match is None:
+
+        dictionary, data_offset = ReadIndirectObject(buffer, offset)
+
+        if data_offset is None or dictionary.get("Type") != "XRef":
+
+            raise ValueError("MISSING PDF CROSS-REFERENCE SECTION")
+
+        document["sections"].append(ReadCrossReferenceStream(document, dictionary, data_offset))
+
+        return dictionary
+
+    subsections = []
+    position    = xref_match.end()
+
+    while True:
+
+        trailer_match = PDF_TRAILER.match(buffer, position)
 
-        info_block = info_match.group(1)
+        if trailer_match:
 
-        for field_name in ["Title", "Author", "Subject", "Keywords", "Creator", "Producer", "CreationDate", "ModDate"]:
+            break
 
-            field_match = re.search(rf"/{field_name}\s*\(([^)]*)\)", info_block)
+        section_match = PDF_XREF_SECTION.match(buffer, position)
 
-            if field_match:
+        if section_match is None:
 
-                value = field_match.group(1).strip()
+            raise ValueError("MALFORMED PDF CROSS-REFERENCE TABLE")
 
-                if value:
+        start, count = int(section_match.group(1)), int(section_match.group(2))
+        entry_offset = section_match.end()
+        entry_size   = 20
 
-                    properties[field_name] = value
+        if count:
 
-    page_count = len(re.findall(r"/Type\s*/Page[^s]", filetext))
+            entry_match = PDF_XREF_ENTRY.match(buffer, entry_offset)
+
+            if entry_match is None:
+
+                raise ValueError("MALFORMED PDF CROSS-REFERENCE ENTRY")
+
+            entry_size = PDF_SPACE.match(buffer, entry_match.end()).end() - entry_offset
+
+        subsections.append((start, count, entry_offset, entry_size))
+        position = entry_offset + count * entry_size
+
+    trailer, _ = ParseObject(buffer, trailer_match.end())
+
+    if not isinstance(trailer, dict):
+
+        raise ValueError("MALFORMED PDF TRAILER")
+
+    document["sections"].append(subsections)
+
+    if isinstance(trailer.get("XRefStm"), int):
+
+        ReadCrossReference(document, trailer["XRefStm"])
+
+    return trailer
+
+def LookupEntry(document, number):
+
+    buffer = document["source"].view
+
+    for section in document["sections"]:
+
+        if isinstance(section, dict):
+
+            if number in section:
+
+                return section[number]
+
+            continue
+
+        for start, count, entry_offset, entry_size in section:
+
+            if start <= number < start + count:
+
+                entry_match = PDF_XREF_ENTRY.match(buffer, entry_offset + (number - start) * entry_size)
+
+                if entry_match is None:
+
+                    return None
+
+                return (1, int(entry_match.group(1)), int(entry_match.group(2))) if entry_match.group(3) == b"n" else (0, 0, 0)
+
+    return None
+
+def ReadObjectStream(document, stream_number):
+
+    streams = document["streams"]
+
+    if stream_number not in streams:
+
+        streams[stream_number] = None
+        entry                  = LookupEntry(document, stream_number)
+
+        if entry and entry[0] == 1:
+
+            dictionary, data_offset = ReadIndirectObject(document["source"].view, entry[1])
+            first                   = dictionary.get("First") if data_offset is not None else None
+            data                    = ReadStream(document, dictionary, data_offset) if isinstance(first, int) else None
+
+            if data is not None:
+
+                streams[stream_number] = (data, first, [int(value) for value in PDF_INTEGER.findall(data, 0, first)[1::2]])
+
+    return streams[stream_number]
+
+def ReadObject(document, number):
+
+    objects = document["objects"]
+
+    if number in objects:
+
+        return objects[number]
+
+    objects[number] = None
+    entry           = LookupEntry(document, number)
+
+    try:
+
+        if entry and entry[0] == 1:
+
+            objects[number] = ReadIndirectObject(document["source"].view, entry[1])[0]
+
+        elif entry and entry[0] == 2:
+
+            object_stream = ReadObjectStream(document, entry[1])
+
+            if object_stream and entry[2] < len(object_stream[2]):
+
+                data, first, offsets = object_stream
+                objects[number]      = ParseObject(data, first + offsets[entry[2]])[0]
+
+    except ValueError:
+
+        pass
+
+    return objects[number]
+
+def ResolveObject(document, value):
+
+    for _ in range(PDF_DEPTH_LIMIT):
+
+        if not isinstance(value, tuple):
+
+            return value
+
+        value = ReadObject(document, value[0])
+
+    return None
+
+def DecodeTextString(value):
+
+    if not isinstance(value, bytes):
+
+        return None
+
+    if value.startswith(b"\xfe\xff"):
+
+        text = value[2:].decode("utf-16-be", errors="replace")
+
+    elif value.startswith(b"\xef\xbb\xbf"):
+
+        text = value[3:].decode("utf-8", errors="replace")
+
+    else:
+
+        text = value.decode("latin1")
+
+    return text.replace("\x00", "").strip()
+
+def ReadStructure(source):
+
+    startxref_matches = list(PDF_STARTXREF.finditer(source.view, max(source.size - PDF_TAIL_SIZE, 0)))
+
+    if not startxref_matches:
+
+        return None
+
+    document = {"source": source, "sections": [], "objects": {}, "streams": {}}
+    trailer  = {}
+    offset   = int(startxref_matches[-1].group(1))
+    visited  = set()
+
+    while isinstance(offset, int) and 0 <= offset < source.size and offset not in visited and len(visited) < PDF_PREVIOUS_LIMIT:
+
+        visited.add(offset)
+
+        section_trailer = ReadCrossReference(document, offset)
+        offset          = section_trailer.get("Prev")
+
+        for key, value in section_trailer.items():
+
+            trailer.setdefault(key, value)
+
+    catalog = ResolveObject(document, trailer.get("Root"))
+
+    if not isinstance(catalog, dict):
+
+        return None
+
+    properties = {}
+    info       = ResolveObject(document, trailer.get("Info"))
+    pages      = ResolveObject(document, catalog.get("Pages"))
+    page_count = ResolveObject(document, pages.get("Count")) if isinstance(pages, dict) else None
+
+    if isinstance(catalog.get("Version"), str):
+
+        properties["PDFVersion"] = catalog["Version"]
+
+    if isinstance(info, dict) and "Encrypt" not in trailer:
+
+        for field_name in PDF_INFO_FIELDS:
+
+            value = DecodeTextString(ResolveObject(document, info.get(field_name)))
+
+            if value:
+
+                properties[field_name] = value
+
+    if isinstance(page_count, int) and page_count >= 0:
+
+        properties["PageCount"] = page_count
+
+    if "Encrypt" in trailer:
+
+        properties["Encrypted"] = "Yes"
+
+    return properties
+
+def ScanPDF(source):
+
+    filebytes  = source[:PDF_SCAN_SIZE]
+    properties = {}
+    info_match = PDF_INFO_BLOCK.search(filebytes)
+
+    if info_match:
+
+        fields = {}
+
+        for field_match in PDF_INFO_FIELD.finditer(info_match.group(1)):
+
+            fields.setdefault(field_match.group(1).decode("ascii"), field_match.group(2).decode("latin1", errors="replace").strip())
+
+        for field_name in PDF_INFO_FIELDS:
+
+            if fields.get(field_name):
+
+                properties[field_name] = fields[field_name]
+
+    page_count = len(PDF_PAGE_OBJECT.findall(filebytes))
 
     if page_count:
 
         properties["PageCount"] = page_count
 
-    if "/Encrypt" in filetext:
+    if PDF_ENCRYPT.search(filebytes):
 
         properties["Encrypted"] = "Yes"
 
     return properties
 
+def Read(context, filetype):
+
+    source        = common.source(context)
+    properties    = {}
+    version_match = PDF_VERSION.search(source.view, 0, PDF_TAIL_SIZE)
+
+    if version_match:
+
+        properties["PDFVersion"] = version_match.group(1).decode("latin1")
+
+    try:
+
+        structure = ReadStructure(source)
+
+    except (AttributeError, IndexError, TypeError, ValueError):
+
+        structure = None
+
+    if structure and structure.get("PDFVersion", "9") < properties.get("PDFVersion", ""):
+
+        del structure["PDFVersion"]
+
+    properties.update(ScanPDF(source) if structure is None else structure)
+
+    if PDF_LINEARIZED.search(source.view, 0, PDF_TAIL_SIZE):
+
+        properties["Linearized"] = "Yes"
+
+    return properties
+
 read = Read
@@ -1,21 +1,30 @@
-import datetime
 import os
 import struct
-import sys
-
-sys.path.insert(0, os.path.dirname(__file__))
-
-import nyaruhodo_common as common
-import nyaruhodo_tables as tables
-
-RESET = "\033[0m"
-RED   = "\033[91m"
+import time
+
+from .. import nyaruhodo_entropy as entropy
+
+from . import nyaruhodo_common as common
+from . import nyaruhodo_tables as tables
+
+RESET                = "\033[0m"
+RED                  = "\033[91m"
+LISTED_NAMES         = 256
+PE_DESCRIPTOR_LIMIT  = 4096
+PE_IMPORT_LIMIT      = 65536
+PE_RESOURCE_LIMIT    = 4096
+PE_CERTIFICATE_TYPES = {1: "X.509", 2: "PKCS#7 SignedData", 3: "Reserved", 4: "Terminal Server Protocol Stack"}
+PE_CLR_FLAGS         = {0x1: "IL Only", 0x2: "32-bit Required", 0x8: "Strong Name Signed", 0x10: "Native Entry Point", 0x20000: "32-bit Preferred"}
+ELF_TABLE_LIMIT      = 65536
+ELF_SYMBOL_LIMIT     = 1048576
+ELF_DYNAMIC_STRINGS  = {14: "SOName", 15: "RPath", 29: "RunPath"}
+ELF_ABI_TAGS         = {0: "Linux", 1: "GNU Hurd", 2: "Solaris", 3: "FreeBSD"}
 
 def ConvertPortableExecutableTimestampToString(Timestamp):
 
     try:
 
-        return datetime.datetime.utcfromtimestamp(Timestamp).strftime("%Y-%m-%d %H:%M:%S UTC")
+        return time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime(Timestamp))
 
     except Exception as exception:
 
@@ -24,28 +33,407 @@ def ConvertPortableExecutableTimestampToString(Timestamp):
       
         return f"Invalid Timestamp ({str(Timestamp)})"
 
-def ReadPE(filepath):
+def ResolveAddress(source, headers, relative_address):
+
+    for _, virtual_size, virtual_address, raw_size, raw_offset in headers["sections"]:
+
+        if virtual_address <= relative_address < virtual_address + max(virtual_size, raw_size):
+
+            file_offset = raw_offset + relative_address - virtual_address
+
+            return file_offset if file_offset < source.size else None
+
+    if relative_address < headers["header_size"]:
+
+        return relative_address
+
+    return None
+
+def ReadCString(source, offset, limit=512):
+
+    if offset is None or offset >= source.size:
+
+        return ""
+
+    end = source.Find(b"\x00", offset, min(offset + limit, source.size))
+
+    return source.Bytes(offset, (end if end != -1 else min(offset + limit, source.size)) - offset).decode("ascii", errors="replace")
+
+def ReadPEHeaders(source, pe_header_offset):
+
+    section_count        = source.UnpackValue("<H", pe_header_offset + 6)
+    optional_header_size = source.UnpackValue("<H", pe_header_offset + 20)
+    optional_offset      = pe_header_offset + 24
+    optional_magic       = source.UnpackValue("<H", optional_offset) if optional_header_size >= 2 else 0
+    directory_offset     = optional_offset + (112 if optional_magic == 0x20B else 96)
+    headers              = {
+        "magic":       optional_magic,
+        "header_size": source.UnpackValue("<I", optional_offset + 60) if optional_header_size >= 64 else 0,
+        "sections":    [],
+        "directories": [],
+        "names":       [],
+    }
+
+    if optional_header_size >= 68:
+
+        headers["subsystem"] = source.UnpackValue("<H", optional_offset + 68)
+
+    if directory_offset <= optional_offset + optional_header_size:
+
+        directory_count = min(source.UnpackValue("<I", directory_offset - 4), 16, (optional_offset + optional_header_size - directory_offset) // 8)
+
+        for directory_index in range(directory_count):
+
+            headers["directories"].append(source.Unpack("<II", directory_offset + directory_index * 8))
+
+    file_alignment       = source.UnpackValue("<I", optional_offset + 36) if optional_header_size >= 40 else 0
+    section_table_offset = optional_offset + optional_header_size
+
+    for section_index in range(section_count):
+
+        section_entry_offset = section_table_offset + section_index * 40
+
+        if section_entry_offset + 40 > source.size:
+
+            break
+
+        section_name                                       = source.Bytes(section_entry_offset, 8).rstrip(b"\x00").decode("ascii", errors="replace")
+        virtual_size, virtual_address, raw_size, raw_offset = source.Unpack("<IIII", section_entry_offset + 8)
+
+        if file_alignment >= 0x200:
+
+            raw_offset = raw_offset // 0x200 * 0x200
+
+        headers["names"].append(section_name)
+        headers["sections"].append((section_name, virtual_size, virtual_address, raw_size, raw_offset))
+
+    return headers
+
+def DataDirectory(headers, directory_index):
+
+    if directory_index < len(headers["directories"]) and headers["directories"][directory_index][1]:
+
+        return headers["directories"][directory_index]
+
+    return None
+
+def ImportHash(imports):
+
+    import hashlib
+
+    entries = []
+
+    for library_name, functions in imports:
+
+        library_name = library_name.lower()
+
+        if library_name.rsplit(".", 1)[-1] in ("dll", "ocx", "sys"):
+
+            library_name = library_name.rsplit(".", 1)[0]
+
+        entries.extend(f"{library_name}.{function_name.lower()}" for function_name in functions)
+
+    return hashlib.md5(",".join(entries).encode("ascii", errors="replace")).hexdigest()
+
+def ReadPEImports(source, headers):
 
-    filebytes = common.read(filepath, 4096)
     properties = {}
+    directory  = DataDirectory(headers, 1)
 
-    if filebytes[:2] != b"MZ":
+    if directory is None:
 
         return properties
 
+    wide_thunks  = headers["magic"] == 0x20B
+    thunk_format = "<Q" if wide_thunks else "<I"
+    thunk_size   = 8 if wide_thunks else 4
+    ordinal_flag = 1 << (63 if wide_thunks else 31)
+    imports      = []
+    entry_count  = 0
+    descriptor   = ResolveAddress(source, headers, directory[0])
+
     try:
 
-        pe_header_offset = struct.unpack_from("<I", filebytes, 0x3C)[0]
+        while descriptor is not None and descriptor + 20 <= source.size and len(imports) < PE_DESCRIPTOR_LIMIT:
+
+            original_thunk, _, _, name_address, first_thunk = source.Unpack("<IIIII", descriptor)
+
+            if not (original_thunk or name_address or first_thunk):
+
+                break
+
+            library_name = ReadCString(source, ResolveAddress(source, headers, name_address))
+            thunk_offset = ResolveAddress(source, headers, original_thunk or first_thunk)
+            functions    = []
+            ordinals     = tables.PE_ORDINALS.get(library_name.lower(), {})
+
+            while thunk_offset is not None and thunk_offset + thunk_size <= source.size and entry_count < PE_IMPORT_LIMIT:
+
+                thunk = source.UnpackValue(thunk_format, thunk_offset)
+
+                if not thunk:
+
+                    break
+
+                if thunk & ordinal_flag:
+
+                    functions.append(ordinals.get(thunk & 0xFFFF, f"ord{thunk & 0xFFFF}"))
+
+                else:
+
+                    name_offset = ResolveAddress(source, headers, thunk & 0x7FFFFFFF)
+                    functions.append(ReadCString(source, name_offset + 2) if name_offset is not None else "")
+
+                thunk_offset += thunk_size
+                entry_count  += 1
+
+            imports.append((library_name, functions))
+            descriptor += 20
+
+    except Exception as exception:
+
+        exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+        print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+
+    if imports:
+
+        properties["ImportHash"]   = ImportHash(imports)
+        properties["ImportCount"]  = entry_count
+        properties["ImportedDLLs"] = ", ".join(library_name for library_name, _ in imports)
+        properties["Imports"]      = "; ".join(f"{library_name}: {', '.join(functions[:LISTED_NAMES])}" for library_name, functions in imports)
+
+    return properties
+
+def ReadPEExports(source, headers):
+
+    properties = {}
+    directory  = DataDirectory(headers, 0)
+    offset     = ResolveAddress(source, headers, directory[0]) if directory else None
+
+    if offset is None or offset + 40 > source.size:
+
+        return properties
+
+    name_address, _, function_count, name_count, _, names_address, _ = source.Unpack("<IIIIIII", offset + 12)
+    names_offset                                                   = ResolveAddress(source, headers, names_address)
+    export_names                                                   = []
+
+    for name_index in range(min(name_count, LISTED_NAMES) if names_offset is not None else 0):
+
+        if names_offset + name_index * 4 + 4 > source.size:
+
+            break
+
+        export_names.append(ReadCString(source, ResolveAddress(source, headers, source.UnpackValue("<I", names_offset + name_index * 4))))
+
+    properties["ExportName"]  = ReadCString(source, ResolveAddress(source, headers, name_address))
+    properties["ExportCount"] = function_count
+
+    if export_names:
+
+        properties["Exports"] = ", ".join(export_names)
+
+    return properties
+
+def IterateResourceDirectory(source, resource_offset, directory_offset):
+
+    if directory_offset + 16 > source.size:
+
+        return
+
+    named_count, identifier_count = source.Unpack("<HH", directory_offset + 12)
+
+    for entry_index in range(min(named_count + identifier_count, PE_RESOURCE_LIMIT)):
+
+        entry_offset = directory_offset + 16 + entry_index * 8
+
+        if entry_offset + 8 > source.size:
+
+            return
+
+        name, target = source.Unpack("<II", entry_offset)
+
+        yield name, bool(target & 0x80000000), resource_offset + (target & 0x7FFFFFFF)
+
+def IterateVersionBlocks(versionbytes, offset, end):
+
+    while offset + 6 <= end:
+
+        block_length, value_length, value_type = struct.unpack_from("<HHH", versionbytes, offset)
+
+        if block_length < 6:
+
+            return
+
+        key_end = offset + 6
+
+        while key_end + 2 <= end and versionbytes[key_end: key_end + 2] != b"\x00\x00":
+
+            key_end += 2
+
+        key          = versionbytes[offset + 6: key_end].decode("utf-16-le", errors="replace")
+        value_offset = (key_end + 2 + 3) & ~3
+        value_size   = value_length * 2 if value_type == 1 else value_length
+        block_end    = min(offset + block_length, end)
+
+        yield key, value_offset, value_size, (value_offset + value_size + 3) & ~3, block_end
+
+        offset = (offset + block_length + 3) & ~3
+
+def ReadPEVersionInfo(source, headers):
+
+    properties = {}
+    directory  = DataDirectory(headers, 2)
+    root       = ResolveAddress(source, headers, directory[0]) if directory else None
+
+    if root is None:
+
+        return properties
+
+    resource_types = []
+    version_data   = None
+
+    for type_identifier, is_directory, type_offset in IterateResourceDirectory(source, root, root):
+
+        resource_types.append(tables.PE_RESOURCE_TYPES.get(type_identifier, str(type_identifier)) if type_identifier < 0x80000000 else "Named")
+
+        if type_identifier == 16 and is_directory:
+
+            for _, name_is_directory, name_offset in IterateResourceDirectory(source, root, type_offset):
+
+                for _, language_is_directory, entry_offset in (IterateResourceDirectory(source, root, name_offset) if name_is_directory else []):
+
+                    if not language_is_directory and entry_offset + 8 <= source.size:
+
+                        version_data = source.Unpack("<II", entry_offset)
+
+                    break
+
+                break
+
+    if resource_types:
+
+        properties["ResourceTypes"] = ", ".join(resource_types)
+
+    data_offset = ResolveAddress(source, headers, version_data[0]) if version_data else None
+
+    if data_offset is None:
+
+        return properties
+
+    versionbytes = source.Bytes(data_offset, min(version_data[1], 65536))
+
+    for key, value_offset, value_size, children_offset, block_end in IterateVersionBlocks(versionbytes, 0, len(versionbytes)):
+
+        if key != "VS_VERSION_INFO":
+
+            break
+
+        if value_size >= 52 and struct.unpack_from("<I", versionbytes, value_offset)[0] == 0xFEEF04BD:
+
+            version_high, version_low        = struct.unpack_from("<II", versionbytes, value_offset + 8)
+            properties["FileVersionNumber"] = f"{version_high >> 16}.{version_high & 0xFFFF}.{version_low >> 16}.{version_low & 0xFFFF}"
+
+        for child_key, _, _, child_children_offset, child_end in IterateVersionBlocks(versionbytes, children_offset, block_end):
+
+            if child_key != "StringFileInfo":
+
+                continue
+
+            for _, _, _, table_children_offset, table_end in IterateVersionBlocks(versionbytes, child_children_offset, child_end):
+
+                for string_key, string_offset, string_size, _, _ in IterateVersionBlocks(versionbytes, table_children_offset, table_end):
+
+                    value = versionbytes[string_offset: string_offset + string_size].decode("utf-16-le", errors="replace").split("\x00")[0].strip()
+
+                    if string_key and value:
+
+                        properties[string_key] = value
+
+        break
+
+    return properties
+
+def ReadPEOverlay(source, headers):
+
+    properties   = {}
+    certificate  = DataDirectory(headers, 4)
+    end_of_image = headers["header_size"]
+
+    for _, _, _, raw_size, raw_offset in headers["sections"]:
+
+        if raw_size:
+
+            end_of_image = max(end_of_image, raw_offset + raw_size)
+
+    if certificate and certificate[0] + 8 <= source.size:
+
+        certificate_length, certificate_revision, certificate_type = source.Unpack("<IHH", certificate[0])
+        end_of_image                                               = max(end_of_image, certificate[0] + certificate[1])
+        properties["Signed"]                                       = "Yes"
+        properties["CertificateType"]                              = PE_CERTIFICATE_TYPES.get(certificate_type, f"0x{certificate_type:04X}")
+        properties["CertificateSize"]                              = f"{certificate_length} bytes"
+
+    else:
+
+        properties["Signed"] = "No"
+
+    if source.size > end_of_image:
 
-        if filebytes[pe_header_offset: pe_header_offset + 4] != b"PE\x00\x00":
+        properties["OverlayOffset"] = f"0x{end_of_image:X}"
+        properties["OverlaySize"]   = f"{source.size - end_of_image} bytes"
+
+    return properties
+
+def ReadPERuntime(source, headers):
+
+    properties = {}
+    directory  = DataDirectory(headers, 14)
+    offset     = ResolveAddress(source, headers, directory[0]) if directory else None
+
+    if offset is None or offset + 24 > source.size:
+
+        return properties
+
+    _, major_version, minor_version, metadata_address, _, runtime_flags = source.Unpack("<IHHIII", offset)
+    flag_labels                                                         = [label for flag, label in PE_CLR_FLAGS.items() if runtime_flags & flag]
+    properties["DotNet"]                                                = "Yes"
+    properties["CLRVersion"]                                            = f"{major_version}.{minor_version}"
+
+    if flag_labels:
+
+        properties["CLRFlags"] = ", ".join(flag_labels)
+
+    metadata_offset = ResolveAddress(source, headers, metadata_address)
+
+    if metadata_offset is not None and metadata_offset + 16 <= source.size and source[metadata_offset: metadata_offset + 4] == b"BSJB":
+
+        version_length              = source.UnpackValue("<I", metadata_offset + 12)
+        properties["DotNetRuntime"] = ReadCString(source, metadata_offset + 16, min(version_length, 256))
+
+    return properties
+
+def ReadPE(context):
+
+    source     = common.source(context)
+    properties = {}
+
+    if source[:2] != b"MZ":
+
+        return properties
+
+    try:
+
+        pe_header_offset = source.UnpackValue("<I", 0x3C)
+
+        if source[pe_header_offset: pe_header_offset + 4] != b"PE\x00\x00":
 
             return properties
 
-        machine_code               = struct.unpack_from("<H", filebytes, pe_header_offset + 4)[0]
-        section_count              = struct.unpack_from("<H", filebytes, pe_header_offset + 6)[0]
-        Timestamp                  = struct.unpack_from("<I", filebytes, pe_header_offset + 8)[0]
-        optional_header_size       = struct.unpack_from("<H", filebytes, pe_header_offset + 20)[0]
-        characteristics_flags      = struct.unpack_from("<H", filebytes, pe_header_offset + 22)[0]
+        machine_code               = source.UnpackValue("<H", pe_header_offset + 4)
+        section_count              = source.UnpackValue("<H", pe_header_offset + 6)
+        Timestamp                  = source.UnpackValue("<I", pe_header_offset + 8)
+        characteristics_flags      = source.UnpackValue("<H", pe_header_offset + 22)
         characteristic_labels      = [label for flag, label in tables.PE_CHARACTERISTICS.items() if characteristics_flags & flag]
         properties["Architecture"] = tables.PE_MACHINES.get(machine_code, f"0x{machine_code:04X}")
         properties["CompileTime"]  = ConvertPortableExecutableTimestampToString(Timestamp)
@@ -55,60 +443,270 @@ def ReadPE(filepath):
 
             properties["Characteristics"] = ", ".join(characteristic_labels)
 
-        if optional_header_size >= 68:
+        headers = ReadPEHeaders(source, pe_header_offset)
+
+        if "subsystem" in headers:
+
+            properties["PEFormat"]  = "PE32+" if headers["magic"] == 0x20B else "PE32"
+            properties["Subsystem"] = tables.PE_SUBSYSTEMS.get(headers["subsystem"], str(headers["subsystem"]))
+
+        if headers["names"]:
+
+            properties["Sections"]       = ", ".join(headers["names"])
+            properties["SectionEntropy"] = ", ".join(f"{section_name} {entropy.RangeEntropy(source, raw_offset, raw_size):.2f}" for section_name, _, _, raw_size, raw_offset in headers["sections"] if raw_size and raw_offset < source.size)
 
-            optional_magic         = struct.unpack_from("<H", filebytes, pe_header_offset + 24)[0]
-            properties["PEFormat"] = "PE32+" if optional_magic == 0x20B else "PE32"
-            subsystem_field_offset = pe_header_offset + 24 + (68 if optional_magic != 0x20B else 84)
+    except Exception as exception:
 
-            if subsystem_field_offset + 2 <= len(filebytes):
+        exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+        print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
 
-                subsystem_code          = struct.unpack_from("<H", filebytes, subsystem_field_offset)[0]
-                properties["Subsystem"] = tables.PE_SUBSYSTEMS.get(subsystem_code, str(subsystem_code))
+        return properties
 
-        section_table_offset = pe_header_offset + 24 + optional_header_size
-        sections = []
+    for reader in (ReadPEImports, ReadPEExports, ReadPEVersionInfo, ReadPEOverlay, ReadPERuntime):
 
-        for section_index in range(section_count):
+        try:
 
-            section_entry_offset = section_table_offset + section_index * 40
+            properties.update(reader(source, headers))
 
-            if section_entry_offset + 8 > len(filebytes):
+        except Exception as exception:
 
-                break
+            exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+            print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
 
-            section_name = filebytes[section_entry_offset: section_entry_offset + 8].rstrip(b"\x00").decode("ascii", errors="replace")
-            sections.append(section_name)
+    return properties
 
-        if sections:
+def IterateELFTable(source, structformat, offset, count, entry_size):
 
-            properties["Sections"] = ", ".join(sections)
+    structsize = struct.calcsize(structformat)
 
-    except Exception as exception:
+    if offset >= source.size or not count:
 
-        exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
-        print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+        return
+
+    if entry_size == structsize:
+
+        tablebytes = source.Slice(offset, count * structsize)
+
+        yield from struct.iter_unpack(structformat, tablebytes[:len(tablebytes) - len(tablebytes) % structsize])
+
+        return
+
+    for entry_index in range(count):
+
+        if offset + entry_index * entry_size + structsize > source.size:
+
+            return
+
+        yield source.Unpack(structformat, offset + entry_index * entry_size)
+
+def ReadELFHeaders(source, endian, wide):
+
+    if wide:
+
+        segment_offset, section_offset = source.Unpack(endian + "QQ", 32)
+        table_fields                   = source.Unpack(endian + "HHHHH", 54)
+
+    else:
+
+        segment_offset, section_offset = source.Unpack(endian + "II", 28)
+        table_fields                   = source.Unpack(endian + "HHHHH", 42)
+
+    segment_size, segment_count, section_size, section_count, names_index = table_fields
+    headers                                                              = {"segments": [], "sections": []}
+
+    for segment in IterateELFTable(source, endian + ("IIQQQQQQ" if wide else "IIIIIIII"), segment_offset, min(segment_count, ELF_TABLE_LIMIT), segment_size):
+
+        if wide:
+
+            segment_type, segment_flags, file_offset, virtual_address, _, file_size, memory_size, _ = segment
+
+        else:
+
+            segment_type, file_offset, virtual_address, _, file_size, memory_size, segment_flags, _ = segment
+
+        headers["segments"].append((segment_type, segment_flags, file_offset, virtual_address, file_size, memory_size))
+
+    if section_offset and section_offset < source.size:
+
+        section_format = endian + ("IIQQQQIIQQ" if wide else "IIIIIIIIII")
+
+        if section_count == 0 or names_index == 0xFFFF:
+
+            first_section = source.Unpack(section_format, section_offset)
+            section_count = first_section[5] if section_count == 0 else section_count
+            names_index   = first_section[6] if names_index == 0xFFFF else names_index
+
+        for name_offset, section_type, section_flags, address, file_offset, size, link, _, _, entry_size in IterateELFTable(source, section_format, section_offset, min(section_count, ELF_TABLE_LIMIT), section_size):
+
+            headers["sections"].append([name_offset, section_type, section_flags, address, file_offset, size, link, entry_size])
+
+        if names_index < len(headers["sections"]):
+
+            names_offset = headers["sections"][names_index][4]
+
+            for section in headers["sections"]:
+
+                section[0] = ReadCString(source, names_offset + section[0], 256)
+
+    return headers
+
+def ResolveVirtualAddress(headers, virtual_address):
+
+    for segment_type, _, file_offset, segment_address, file_size, _ in headers["segments"]:
+
+        if segment_type == 1 and segment_address <= virtual_address < segment_address + file_size:
+
+            return file_offset + virtual_address - segment_address
+
+    return None
+
+def ReadELFDynamic(source, headers, endian, wide):
+
+    properties = {}
+    dynamic    = next(((file_offset, file_size) for segment_type, _, file_offset, _, file_size, _ in headers["segments"] if segment_type == 2), None)
+
+    if dynamic is None:
+
+        dynamic = next(((section[4], section[5]) for section in headers["sections"] if section[1] == 6), None)
+
+    if dynamic is None:
+
+        return properties
+
+    entry_format = endian + ("qQ" if wide else "iI")
+    entries      = []
+    string_table = None
+
+    for tag, value in IterateELFTable(source, entry_format, dynamic[0], dynamic[1] // struct.calcsize(entry_format), struct.calcsize(entry_format)):
+
+        if tag == 0:
+
+            break
+
+        if tag == 5:
+
+            string_table = ResolveVirtualAddress(headers, value)
+
+        entries.append((tag, value))
+
+    if string_table is None:
+
+        return properties
+
+    needed_libraries = [ReadCString(source, string_table + value) for tag, value in entries if tag == 1]
+    dynamic_strings  = {ELF_DYNAMIC_STRINGS[tag]: ReadCString(source, string_table + value) for tag, value in entries if tag in ELF_DYNAMIC_STRINGS}
+
+    if needed_libraries:
+
+        properties["NeededLibraries"] = ", ".join(needed_libraries)
+
+    properties.update(dynamic_strings)
 
     return properties
 
-def ReadELF(filepath):
+def ReadELFNotes(source, headers, endian, wide):
 
-    filebytes = common.read(filepath, 64)
     properties = {}
+    notes      = [(section[4], section[5]) for section in headers["sections"] if section[1] == 7]
+
+    if not notes:
+
+        notes = [(file_offset, file_size) for segment_type, _, file_offset, _, file_size, _ in headers["segments"] if segment_type == 4]
+
+    for note_offset, note_size in notes:
+
+        note_end = min(note_offset + note_size, source.size)
+
+        while note_offset + 12 <= note_end:
+
+            name_size, description_size, note_type = source.Unpack(endian + "III", note_offset)
+            name_offset                            = note_offset + 12
+            description_offset                     = name_offset + ((name_size + 3) & ~3)
+
+            if source[name_offset: name_offset + name_size] == b"GNU\x00":
+
+                if note_type == 3:
+
+                    properties["BuildID"] = source.Slice(description_offset, description_size).hex()
+
+                elif note_type == 1 and description_size >= 16:
+
+                    operating_system, major_version, minor_version, patch_version = source.Unpack(endian + "IIII", description_offset)
+                    properties["ABITag"]                                           = f"{ELF_ABI_TAGS.get(operating_system, str(operating_system))} {major_version}.{minor_version}.{patch_version}"
+
+            note_offset = description_offset + ((description_size + 3) & ~3)
+
+    return properties
+
+def ReadELFSymbols(source, headers, endian, wide):
+
+    properties    = {}
+    symbol_format = endian + ("IBBHQQ" if wide else "IIIBBH")
+    symbol_size   = struct.calcsize(symbol_format)
+
+    for section in headers["sections"]:
+
+        if section[1] not in (2, 11) or section[6] >= len(headers["sections"]):
+
+            continue
+
+        strings_offset   = headers["sections"][section[6]][4]
+        symbol_count     = 0
+        undefined_count  = 0
+        exported_symbols = []
+
+        for symbol in IterateELFTable(source, symbol_format, section[4], min(section[5] // symbol_size, ELF_SYMBOL_LIMIT), section[7] or symbol_size):
 
-    if filebytes[:4] != b"\x7fELF":
+            if wide:
+
+                name_offset, symbol_info, _, section_index, _, _ = symbol
+
+            else:
+
+                name_offset, _, _, symbol_info, _, section_index = symbol
+
+            symbol_count += 1
+
+            if symbol_info >> 4 not in (1, 2) or not name_offset:
+
+                continue
+
+            if section_index == 0:
+
+                undefined_count += 1
+
+            elif symbol_info & 0xF in (1, 2) and len(exported_symbols) < LISTED_NAMES:
+
+                exported_symbols.append(name_offset)
+
+        label                                = "DynamicSymbol" if section[1] == 11 else "Symbol"
+        properties[f"{label}Count"]          = symbol_count
+        properties[f"{label}UndefinedCount"] = undefined_count
+
+        if section[1] == 11 and exported_symbols:
+
+            properties["ExportedSymbols"] = ", ".join(ReadCString(source, strings_offset + name_offset, 256) for name_offset in exported_symbols)
+
+    return properties
+
+def ReadELF(context):
+
+    source     = common.source(context)
+    properties = {}
+
+    if source[:4] != b"\x7fELF":
 
         return properties
 
     try:
 
-        word_size_class            = filebytes[4]
-        byte_order_code            = filebytes[5]
-        osabi_code                 = filebytes[6]
+        word_size_class            = source[4]
+        byte_order_code            = source[5]
+        osabi_code                 = source[7]
         endian                     = "<" if byte_order_code == 1 else ">"
-        elf_filetype              = struct.unpack_from(endian + "H", filebytes, 16)[0]
-        machine_code               = struct.unpack_from(endian + "H", filebytes, 18)[0]
-        elf_version                = struct.unpack_from(endian + "I", filebytes, 20)[0]
+        elf_filetype              = source.UnpackValue(endian + "H", 16)
+        machine_code               = source.UnpackValue(endian + "H", 18)
+        elf_version                = source.UnpackValue(endian + "I", 20)
         properties["Class"]        = "64-bit" if word_size_class == 2 else "32-bit"
         properties["Endianness"]   = "Little-endian" if byte_order_code == 1 else "Big-endian"
         properties["OS/ABI"]       = tables.ELF_OSABI.get(osabi_code, f"0x{osabi_code:02X}")
@@ -118,30 +716,74 @@ def ReadELF(filepath):
 
         if word_size_class == 2:
 
-            entry_point              = struct.unpack_from(endian + "Q", filebytes, 24)[0]
+            entry_point              = source.UnpackValue(endian + "Q", 24)
             properties["EntryPoint"] = f"0x{entry_point:016X}"
 
         else:
 
-            entry_point              = struct.unpack_from(endian + "I", filebytes, 24)[0]
+            entry_point              = source.UnpackValue(endian + "I", 24)
             properties["EntryPoint"] = f"0x{entry_point:08X}"
 
+        headers = ReadELFHeaders(source, endian, word_size_class == 2)
+
     except Exception as exception:
 
         exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
         print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
 
+        return properties
+
+    segment_types = {}
+
+    for segment_type, segment_flags, file_offset, _, file_size, _ in headers["segments"]:
+
+        segment_name                = tables.ELF_SEGMENT_TYPES.get(segment_type, f"0x{segment_type:X}")
+        segment_types[segment_name] = segment_types.get(segment_name, 0) + 1
+
+        if segment_type == 3:
+
+            properties["Interpreter"] = ReadCString(source, file_offset, min(file_size, 4096))
+
+        elif segment_type == 0x6474E551:
+
+            properties["ExecutableStack"] = "Yes" if segment_flags & 1 else "No"
+
+    if segment_types:
+
+        properties["Segments"] = ", ".join(f"{segment_name} x{segment_count}" if segment_count > 1 else segment_name for segment_name, segment_count in segment_types.items())
+
+    section_names = [section[0] for section in headers["sections"] if section[0]]
+
+    if headers["sections"]:
+
+        properties["SectionCount"]   = len(headers["sections"])
+        properties["Sections"]       = ", ".join(section_names[:LISTED_NAMES])
+        properties["SectionEntropy"] = ", ".join(f"{section[0]} {entropy.RangeEntropy(source, section[4], section[5]):.2f}" for section in headers["sections"] if section[0] and section[1] != 8 and section[2] & 0x2 and section[5] and section[4] < source.size)
+        properties["Stripped"]       = "No" if ".symtab" in section_names else "Yes"
+        properties["DebugInfo"]      = "Yes" if ".debug_info" in section_names else "No"
+
+    for reader in (ReadELFDynamic, ReadELFNotes, ReadELFSymbols):
+
+        try:
+
+            properties.update(reader(source, headers, endian, word_size_class == 2))
+
+        except Exception as exception:
+
+            exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+            print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+
     return properties
 
-def Read(filepath, filetype):
+def Read(context, filetype):
 
     if filetype in ("EXE", "DLL"):
 
-        return ReadPE(filepath)
+        return ReadPE(context)
 
     if filetype == "ELF":
 
-        return ReadELF(filepath)
+        return ReadELF(context)
 
     return {}
 
@@ -1,15 +1,18 @@
 import os
 import struct
-import sys
 
-sys.path.insert(0, os.path.dirname(__file__))
+from . import nyaruhodo_common as common
+from . import nyaruhodo_tables as tables
 
-import nyaruhodo_common as common
-import nyaruhodo_tables as tables
-
-RESET            = "\033[0m"
-RED              = "\033[91m"
-FIELD_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+RESET                   = "\033[0m"
+RED                     = "\033[91m"
+FIELD_TYPE_SIZES        = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+JPEG_FRAME_MARKERS      = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+PNG_CHUNKS              = {"IHDR", "tEXt", "zTXt", "iTXt", "iCCP", "pHYs", "tIME", "gAMA"}
+PNG_TEXT_CHUNKS         = {"tEXt", "zTXt", "iTXt", "iCCP"}
+PNG_CHUNK_LIMIT         = 1048576
+PNG_TEXT_LIMIT          = 65536
 
 def ReadRational(tiffbytes, offset, endian):
 
@@ -134,184 +137,217 @@ def ConvertGpsDegreesMinutesSecondsToDecimal(coordinate_parts, hemisphere_ref):
     
         return None
 
-def ReadJPEG(filepath):
+def ReadExif(tiffbytes, properties=None):
 
-    filebytes = common.read(filepath)
-    properties = {}
+    properties = {} if properties is None else properties
+
+    if tiffbytes[:2] == b"II":
+
+        endian = "<"
+
+    elif tiffbytes[:2] == b"MM":
+
+        endian = ">"
 
-    if filebytes[:2] != b"\xff\xd8":
+    else:
 
         return properties
 
-    offset = 2
+    main_directory_offset = struct.unpack_from(endian + "I", tiffbytes, 4)[0]
+    main_directory        = ReadImageFileDirectory(tiffbytes, main_directory_offset, endian, tables.EXIF_TAGS)
 
-    while offset < len(filebytes) - 1:
+    for field_name, value in main_directory.items():
 
-        if filebytes[offset] != 0xFF:
+        if field_name == "Orientation":
 
-            break
+            properties[field_name] = tables.ORIENTATION.get(value, str(value))
 
-        marker = filebytes[offset + 1]
+        elif field_name == "ResolutionUnit":
 
-        if marker in (0xD8, 0xD9):
+            properties[field_name] = tables.RESOLUTION.get(value, str(value))
 
-            offset += 2
-     
-            continue
+        elif field_name not in ("ExifIFD", "GPSIFD"):
 
-        if offset + 4 > len(filebytes):
+            properties[field_name] = str(value)
 
-            break
+    if "ExifIFD" in main_directory:
 
-        segment_length = struct.unpack_from(">H", filebytes, offset + 2)[0]
-        segment_data   = filebytes[offset + 4: offset + 2 + segment_length]
+        exif_directory = ReadImageFileDirectory(tiffbytes, main_directory["ExifIFD"], endian, tables.EXIF_TAGS)
 
-        if marker == 0xE0 and segment_data[:4] == b"JFIF":
+        for field_name, value in exif_directory.items():
 
-            if len(segment_data) >= 9:
+            if field_name not in properties and field_name != "GPSIFD":
 
-                density_unit_byte         = segment_data[7]
-                properties["Format"]      = "JFIF"
-                properties["JFIFVersion"] = f"{segment_data[5]}.{segment_data[6]:02d}"
-                properties["XDensity"]    = struct.unpack_from(">H", segment_data, 8)[0]
-                properties["YDensity"]    = struct.unpack_from(">H", segment_data, 10)[0]
+                properties[field_name] = str(value)
 
-                if density_unit_byte == 1:
+    if "GPSIFD" in main_directory:
 
-                    properties["DensityUnit"] = "DPI"
+        gps_directory = ReadImageFileDirectory(tiffbytes, main_directory["GPSIFD"], endian, tables.GPS_TAGS)
+        latitude      = ConvertGpsDegreesMinutesSecondsToDecimal(gps_directory.get("GPSLatitude", ""), gps_directory.get("GPSLatitudeRef", ""))
+        longitude     = ConvertGpsDegreesMinutesSecondsToDecimal(gps_directory.get("GPSLongitude", ""), gps_directory.get("GPSLongitudeRef", ""))
 
-                elif density_unit_byte == 2:
+        if latitude is not None:
 
-                    properties["DensityUnit"] = "DPCM"
+            properties["GPSLatitude"] = f"{latitude} ({gps_directory.get("GPSLatitudeRef", "")})"
 
-        elif marker == 0xE1 and segment_data[:4] == b"Exif":
+        if longitude is not None:
 
-            tiffbytes = segment_data[6:]
+            properties["GPSLongitude"] = f"{longitude} ({gps_directory.get("GPSLongitudeRef", "")})"
 
-            if tiffbytes[:2] == b"II":
+        if "GPSAltitude" in gps_directory:
 
-                endian = "<"
+            properties["GPSAltitude"] = f"{gps_directory["GPSAltitude"]} Meters {"(Below Sea Level)" if gps_directory.get("GPSAltitudeRef") == 1 else "(Above Sea Level)"}"
 
-            elif tiffbytes[:2] == b"MM":
+        if "GPSDateStamp" in gps_directory:
 
-                endian = ">"
+            properties["GPSDate"] = gps_directory["GPSDateStamp"]
 
-            else:
+    return properties
 
-                offset += 2 + segment_length
-          
-                continue
+def ReadJPEG(context):
 
-            main_directory_offset = struct.unpack_from(endian + "I", tiffbytes, 4)[0]
-            main_directory        = ReadImageFileDirectory(tiffbytes, main_directory_offset, endian, tables.EXIF_TAGS)
+    source     = common.source(context)
+    properties = {}
 
-            for field_name, value in main_directory.items():
+    if source[:2] != b"\xff\xd8":
 
-                if field_name == "Orientation":
+        return properties
 
-                    properties[field_name] = tables.ORIENTATION.get(value, str(value))
+    offset       = 2
+    frame_header = None
 
-                elif field_name == "ResolutionUnit":
+    while offset + 4 <= source.size:
 
-                    properties[field_name] = tables.RESOLUTION.get(value, str(value))
+        segment_header = source[offset: offset + 4]
 
-                elif field_name not in ("ExifIFD", "GPSIFD"):
+        if len(segment_header) < 2 or segment_header[0] != 0xFF:
 
-                    properties[field_name] = str(value)
+            break
 
-            if "ExifIFD" in main_directory:
+        marker = segment_header[1]
 
-                exif_directory = ReadImageFileDirectory(tiffbytes, main_directory["ExifIFD"], endian, tables.EXIF_TAGS)
+        if marker == 0xFF:
 
-                for field_name, value in exif_directory.items():
+            offset += 1
 
-                    if field_name not in properties and field_name != "GPSIFD":
+            continue
 
-                        properties[field_name] = str(value)
+        if marker in JPEG_STANDALONE_MARKERS:
 
-            if "GPSIFD" in main_directory:
+            offset += 2
 
-                gps_directory = ReadImageFileDirectory(tiffbytes, main_directory["GPSIFD"], endian, tables.GPS_TAGS)
-                latitude      = ConvertGpsDegreesMinutesSecondsToDecimal(gps_directory.get("GPSLatitude", ""), gps_directory.get("GPSLatitudeRef", ""))
-                longitude     = ConvertGpsDegreesMinutesSecondsToDecimal(gps_directory.get("GPSLongitude", ""), gps_directory.get("GPSLongitudeRef", ""))
+            continue
 
-                if latitude is not None:
+        if marker in (0xD9, 0xDA) or len(segment_header) < 4:
 
-                    properties["GPSLatitude"] = f"{latitude} ({gps_directory.get("GPSLatitudeRef", "")})"
+            break
 
-                if longitude is not None:
+        segment_length = struct.unpack_from(">H", segment_header, 2)[0]
 
-                    properties["GPSLongitude"] = f"{longitude} ({gps_directory.get("GPSLongitudeRef", "")})"
+        if segment_length < 2:
 
-                if "GPSAltitude" in gps_directory:
+            break
 
-                    properties["GPSAltitude"] = f"{gps_directory["GPSAltitude"]} Meters {"(Below Sea Level)" if gps_directory.get("GPSAltitudeRef") == 1 else "(Above Sea Level)"}"
+        if marker in JPEG_FRAME_MARKERS:
 
-                if "GPSDateStamp" in gps_directory:
+            if frame_header is None:
 
-                    properties["GPSDate"] = gps_directory["GPSDateStamp"]
+                frame_header = source.Slice(offset + 4, 6)
 
-        offset += 2 + segment_length
+            offset += 2 + segment_length
 
-    offset = 2
+            continue
 
-    while offset < len(filebytes) - 1:
+        if marker not in (0xE0, 0xE1):
 
-        if filebytes[offset] != 0xFF:
+            offset += 2 + segment_length
 
-            break
+            continue
 
-        marker = filebytes[offset + 1]
+        segment_data = source.Slice(offset + 4, segment_length - 2)
 
-        if marker in range(0xC0, 0xC4):
+        if marker == 0xE0 and segment_data[:4] == b"JFIF":
 
-            if offset + 9 < len(filebytes):
+            if len(segment_data) >= 12:
 
-                precision                 = filebytes[offset + 4]
-                height                    = struct.unpack_from(">H", filebytes, offset + 5)[0]
-                width                     = struct.unpack_from(">H", filebytes, offset + 7)[0]
-                components                = filebytes[offset + 9]
-                properties["ImageWidth"]  = width
-                properties["ImageHeight"] = height
-                properties["ColorDepth"]  = f"{precision}-bit"
-                properties["Components"]  = {1: "Grayscale", 3: "YCbCr (color)", 4: "CMYK"}.get(components, str(components))
+                density_unit_byte         = segment_data[7]
+                properties["Format"]      = "JFIF"
+                properties["JFIFVersion"] = f"{segment_data[5]}.{segment_data[6]:02d}"
+                properties["XDensity"]    = struct.unpack_from(">H", segment_data, 8)[0]
+                properties["YDensity"]    = struct.unpack_from(">H", segment_data, 10)[0]
 
-            break
+                if density_unit_byte == 1:
 
-        if marker in (0xD8, 0xD9):
+                    properties["DensityUnit"] = "DPI"
 
-            offset += 2
+                elif density_unit_byte == 2:
 
-            continue
+                    properties["DensityUnit"] = "DPCM"
 
-        if offset + 4 > len(filebytes):
+        elif marker == 0xE1 and segment_data[:4] == b"Exif":
 
-            break
+            ReadExif(segment_data[6:], properties)
+
+        offset += 2 + segment_length
+
+    if frame_header is not None and len(frame_header) == 6:
 
-        segment_length  = struct.unpack_from(">H", filebytes, offset + 2)[0]
-        offset         += 2 + segment_length
+        precision                 = frame_header[0]
+        height                    = struct.unpack_from(">H", frame_header, 1)[0]
+        width                     = struct.unpack_from(">H", frame_header, 3)[0]
+        components                = frame_header[5]
+        properties["ImageWidth"]  = width
+        properties["ImageHeight"] = height
+        properties["ColorDepth"]  = f"{precision}-bit"
+        properties["Components"]  = {1: "Grayscale", 3: "YCbCr (color)", 4: "CMYK"}.get(components, str(components))
 
     return properties
 
+def InflateChunk(chunkbytes, limit=PNG_TEXT_LIMIT):
 
-def ReadPNG(filepath):
+    import zlib
 
-    filebytes = common.read(filepath)
+    try:
+
+        return zlib.decompressobj().decompress(chunkbytes, limit)
+
+    except zlib.error:
+
+        return b""
+
+def ReadPNG(context, stop_at_idat=False):
+
+    source     = common.source(context)
     properties = {}
 
-    if filebytes[:8] != b"\x89PNG\r\n\x1a\n":
+    if source[:8] != b"\x89PNG\r\n\x1a\n":
 
         return properties
 
     offset = 8
 
-    while offset < len(filebytes) - 8:
+    while offset + 8 <= source.size:
 
         try:
 
-            chunk_length = struct.unpack_from(">I", filebytes, offset)[0]
-            chunktype   = filebytes[offset + 4: offset + 8].decode("ascii", errors="replace")
-            chunk_data   = filebytes[offset + 8: offset + 8 + chunk_length]
+            chunk_length, chunktype = source.Unpack(">I4s", offset)
+            chunktype               = chunktype.decode("ascii", errors="replace")
+
+            if chunktype == "IEND" or (chunktype == "IDAT" and stop_at_idat):
+
+                break
+
+            if chunktype not in PNG_CHUNKS:
+
+                offset += 12 + chunk_length
+
+                continue
+
+            chunk_data = source.Slice(offset + 8, min(chunk_length, PNG_CHUNK_LIMIT))
+
+            if chunktype in PNG_TEXT_CHUNKS:
+
+                chunk_data = chunk_data.tobytes()
 
             if chunktype == "IHDR" and chunk_length >= 13:
 
@@ -338,6 +374,19 @@ def ReadPNG(filepath):
 
                         properties[key] = value
 
+            elif chunktype == "zTXt":
+
+                first_null = chunk_data.find(b"\x00")
+
+                if first_null != -1 and chunk_data[first_null + 1: first_null + 2] == b"\x00":
+
+                    key   = common.decode(chunk_data[:first_null])
+                    value = common.decode(InflateChunk(chunk_data[first_null + 2:]))
+
+                    if key and value:
+
+                        properties[key] = value
+
             elif chunktype == "iTXt":
 
                 first_null = chunk_data.find(b"\x00")
@@ -346,6 +395,7 @@ def ReadPNG(filepath):
 
                     key             = common.decode(chunk_data[:first_null])
                     remainingbytes = chunk_data[first_null + 1:]
+                    compressed      = remainingbytes[:1] == b"\x01"
                     second_null     = remainingbytes.find(b"\x00", 2)
 
                     if second_null != -1:
@@ -354,12 +404,27 @@ def ReadPNG(filepath):
 
                         if third_null != -1:
 
-                            value = common.decode(remainingbytes[third_null + 1:])
+                            textbytes = remainingbytes[third_null + 1:]
+                            value     = common.decode(InflateChunk(textbytes) if compressed else textbytes)
 
                             if key and value:
 
                                 properties[key] = value
 
+            elif chunktype == "iCCP":
+
+                first_null = chunk_data.find(b"\x00")
+
+                if first_null != -1:
+
+                    properties["ICCProfile"] = common.decode(chunk_data[:first_null])
+                    profile_header           = InflateChunk(chunk_data[first_null + 2:], 128)
+
+                    if len(profile_header) >= 20:
+
+                        properties["ICCProfileSize"]       = struct.unpack_from(">I", profile_header, 0)[0]
+                        properties["ICCProfileColorSpace"] = common.decode(profile_header[16:20]).strip()
+
             elif chunktype == "pHYs" and chunk_length >= 9:
 
                 pixels_per_unit_x = struct.unpack_from(">I", chunk_data, 0)[0]
@@ -402,15 +467,15 @@ def ReadPNG(filepath):
 
     return properties
 
-def Read(filepath, filetype):
+def Read(context, filetype):
 
     if filetype in ("JPEG", "JPG"):
 
-        return ReadJPEG(filepath)
+        return ReadJPEG(context)
 
     if filetype == "PNG":
 
-        return ReadPNG(filepath)
+        return ReadPNG(context)
 
     return {}
 
@@ -0,0 +1,505 @@
+import os
+import time
+
+from . import nyaruhodo_audio  as audio
+from . import nyaruhodo_common as common
+from . import nyaruhodo_image  as image
+from . import nyaruhodo_riff   as riff
+
+RESET            = "\033[0m"
+RED              = "\033[91m"
+TOP_LEVEL_BOXES  = {b"ftyp", b"moov", b"mdat", b"meta", b"free", b"skip", b"wide", b"pnot", b"uuid"}
+BOX_DEPTH_LIMIT  = 8
+BOX_COUNT_LIMIT  = 65536
+ITEM_LIMIT       = 4096
+EXIF_LIMIT       = 1048576
+TEXT_LIMIT       = 1024
+MAC_EPOCH_OFFSET = 2082844800
+HANDLER_TYPES    = {b"vide": "Video", b"soun": "Audio", b"text": "Text", b"sbtl": "Subtitle", b"subt": "Subtitle", b"meta": "Metadata", b"tmcd": "Timecode", b"hint": "Hint"}
+SAMPLE_CODECS    = {
+    b"avc1": "H.264",
+    b"avc3": "H.264",
+    b"hvc1": "H.265",
+    b"hev1": "H.265",
+    b"av01": "AV1",
+    b"vp09": "VP9",
+    b"mp4v": "MPEG-4 Visual",
+    b"apcn": "ProRes 422",
+    b"apch": "ProRes 422 HQ",
+    b"jpeg": "Motion JPEG",
+    b"mp4a": "AAC",
+    b"ac-3": "AC-3",
+    b"ec-3": "E-AC-3",
+    b"Opus": "Opus",
+    b"fLaC": "FLAC",
+    b"alac": "ALAC",
+    b"samr": "AMR",
+    b"sowt": "PCM",
+    b"twos": "PCM",
+    b"lpcm": "PCM",
+}
+ITEM_TYPES       = {b"hvc1": "HEVC", b"av01": "AV1", b"jpeg": "JPEG", b"grid": "Grid", b"iden": "Identity", b"iovl": "Overlay"}
+ILST_TAGS        = {
+    b"\xa9nam": "Title",
+    b"\xa9ART": "Artist",
+    b"aART":    "AlbumArtist",
+    b"\xa9alb": "Album",
+    b"\xa9day": "Year",
+    b"\xa9gen": "Genre",
+    b"\xa9wrt": "Composer",
+    b"\xa9cmt": "Comment",
+    b"\xa9too": "Encoder",
+    b"cprt":    "Copyright",
+    b"desc":    "Description",
+    b"trkn":    "Track",
+    b"disk":    "Disc",
+}
+MDTA_KEYS        = {
+    "com.apple.quicktime.make":             "Make",
+    "com.apple.quicktime.model":            "Model",
+    "com.apple.quicktime.software":         "Software",
+    "com.apple.quicktime.creationdate":     "CreationDate",
+    "com.apple.quicktime.location.ISO6709": "GPSCoordinates",
+}
+USER_DATA_TAGS   = {b"\xa9xyz": "GPSCoordinates", b"\xa9mak": "Make", b"\xa9mod": "Model", b"\xa9swr": "Software"}
+
+def IterateBoxes(source, offset, end):
+
+    for _ in range(BOX_COUNT_LIMIT):
+
+        if offset + 8 > end:
+
+            return
+
+        box_size, box_type = source.Unpack(">I4s", offset)
+        header_size        = 8
+
+        if box_size == 1 and offset + 16 <= end:
+
+            box_size    = source.UnpackValue(">Q", offset + 8)
+            header_size = 16
+
+        elif box_size == 0:
+
+            box_size = end - offset
+
+        if box_size < header_size:
+
+            return
+
+        yield box_type, offset + header_size, min(box_size, end - offset) - header_size
+
+        offset += box_size
+
+def ReadSizedInteger(source, offset, size):
+
+    return int.from_bytes(source.Bytes(offset, size), "big") if size else 0
+
+def FormatTimestamp(seconds):
+
+    if seconds <= MAC_EPOCH_OFFSET:
+
+        return None
+
+    return time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime(seconds - MAC_EPOCH_OFFSET))
+
+def FormatLanguage(packed):
+
+    language = "".join(chr(((packed >> shift) & 0x1F) + 0x60) for shift in (10, 5, 0))
+
+    return language if language.isalpha() and language != "und" else None
+
+def ReadFileType(source, data_offset, data_size, properties):
+
+    if data_size < 8:
+
+        return
+
+    major_brand, minor_version = source.Unpack(">4sI", data_offset)
+    compatible_brands          = [source.Bytes(offset, 4) for offset in range(data_offset + 8, data_offset + data_size - 3, 4)]
+    properties["MajorBrand"]   = riff.FormatFourCC(major_brand)
+    properties["MinorVersion"] = minor_version
+
+    if compatible_brands:
+
+        properties["CompatibleBrands"] = ", ".join(riff.FormatFourCC(brand) for brand in compatible_brands[:16])
+
+def ReadTrack(source, offset, end, track, depth=0):
+
+    for box_type, data_offset, data_size in IterateBoxes(source, offset, end):
+
+        if box_type in (b"mdia", b"minf", b"stbl") and depth < BOX_DEPTH_LIMIT:
+
+            ReadTrack(source, data_offset, data_offset + data_size, track, depth + 1)
+
+        elif box_type == b"tkhd" and data_size >= 84:
+
+            size_offset = data_offset + (88 if source[data_offset] == 1 else 76)
+
+            if size_offset + 8 <= data_offset + data_size:
+
+                width, height   = source.Unpack(">II", size_offset)
+                track["width"]  = width >> 16
+                track["height"] = height >> 16
+
+        elif box_type == b"mdhd" and data_size >= 24:
+
+            if source[data_offset] == 1 and data_size >= 36:
+
+                timescale, duration, language = source.Unpack(">IQH", data_offset + 20)
+
+            else:
+
+                timescale, duration, language = source.Unpack(">IIH", data_offset + 12)
+
+            track["timescale"] = timescale
+            track["duration"]  = duration
+            track["language"]  = FormatLanguage(language)
+
+        elif box_type == b"hdlr" and data_size >= 12:
+
+            track["handler"] = source.Bytes(data_offset + 8, 4)
+
+        elif box_type == b"stsd" and data_size >= 16:
+
+            entry_offset   = data_offset + 16
+            track["codec"] = source.Bytes(data_offset + 12, 4)
+
+            if track.get("handler") == b"vide" and data_size >= 44:
+
+                track["sample_width"], track["sample_height"] = source.Unpack(">HH", entry_offset + 24)
+
+            elif track.get("handler") == b"soun" and data_size >= 44:
+
+                track["channels"]    = source.UnpackValue(">H", entry_offset + 16)
+                track["sample_rate"] = source.UnpackValue(">I", entry_offset + 24) >> 16
+
+        elif box_type in (b"stsz", b"stz2") and data_size >= 12:
+
+            track["sample_count"] = source.UnpackValue(">I", data_offset + 8)
+
+    return track
+
+def ReadKeys(source, data_offset, data_size):
+
+    keys     = {}
+    position = data_offset + 8
+    end      = data_offset + data_size
+
+    for index in range(1, min(source.UnpackValue(">I", data_offset + 4), ITEM_LIMIT) + 1):
+
+        if position + 8 > end:
+
+            break
+
+        key_size = source.UnpackValue(">I", position)
+
+        if key_size < 8:
+
+            break
+
+        keys[index] = source.Bytes(position + 8, min(key_size, TEXT_LIMIT) - 8).decode("utf-8", errors="replace")
+        position   += key_size
+
+    return keys
+
+def ReadItemList(source, data_offset, data_size, keys, properties):
+
+    for item_type, item_offset, item_size in IterateBoxes(source, data_offset, data_offset + data_size):
+
+        field_label = ILST_TAGS.get(item_type) or MDTA_KEYS.get(keys.get(int.from_bytes(item_type, "big"), ""))
+
+        if not field_label:
+
+            continue
+
+        for value_box, value_offset, value_size in IterateBoxes(source, item_offset, item_offset + item_size):
+
+            if value_box != b"data" or value_size < 8:
+
+                continue
+
+            value_type = source.UnpackValue(">I", value_offset) & 0xFFFFFF
+            valuebytes = source.Bytes(value_offset + 8, min(value_size - 8, TEXT_LIMIT))
+
+            if field_label in ("Track", "Disc") and len(valuebytes) >= 6:
+
+                number, total           = int.from_bytes(valuebytes[2:4], "big"), int.from_bytes(valuebytes[4:6], "big")
+                properties[field_label] = f"{number}/{total}" if total else number
+
+            elif value_type == 1 and common.decode(valuebytes):
+
+                properties[field_label] = common.decode(valuebytes)
+
+            break
+
+def ReadItemLocation(source, data_offset, item_id, idat_offset):
+
+    version                      = source[data_offset]
+    offset_size, length_size     = source[data_offset + 4] >> 4, source[data_offset + 4] & 0x0F
+    base_offset_size, index_size = source[data_offset + 5] >> 4, source[data_offset + 5] & 0x0F if version in (1, 2) else 0
+    item_count, position         = (source.UnpackValue(">H", data_offset + 6), data_offset + 8) if version < 2 else (source.UnpackValue(">I", data_offset + 6), data_offset + 10)
+
+    for _ in range(min(item_count, ITEM_LIMIT)):
+
+        current_id           = ReadSizedInteger(source, position, 2 if version < 2 else 4)
+        position            += 2 if version < 2 else 4
+        construction_method  = 0
+
+        if version in (1, 2):
+
+            construction_method  = source.UnpackValue(">H", position) & 0x0F
+            position            += 2
+
+        base_offset   = ReadSizedInteger(source, position + 2, base_offset_size)
+        position     += 2 + base_offset_size
+        extent_count  = source.UnpackValue(">H", position)
+        position     += 2
+        extents       = []
+
+        for _ in range(extent_count):
+
+            position      += index_size
+            extent_offset  = ReadSizedInteger(source, position, offset_size)
+            extent_length  = ReadSizedInteger(source, position + offset_size, length_size)
+            position      += offset_size + length_size
+            extents.append((base_offset + extent_offset, extent_length))
+
+        if current_id != item_id:
+
+            continue
+
+        if construction_method == 1 and idat_offset is not None:
+
+            return [(idat_offset + extent_offset, extent_length) for extent_offset, extent_length in extents]
+
+        return extents if construction_method == 0 else None
+
+    return None
+
+def ReadImageItems(source, boxes, properties):
+
+    items       = {}
+    primary_id  = None
+    idat_offset = boxes[b"idat"][0] if b"idat" in boxes else None
+
+    if b"pitm" in boxes:
+
+        pitm_offset = boxes[b"pitm"][0]
+        primary_id  = ReadSizedInteger(source, pitm_offset + 4, 2 if source[pitm_offset] == 0 else 4)
+
+    iinf_offset, iinf_size = boxes[b"iinf"]
+    entry_offset           = iinf_offset + (6 if source[iinf_offset] == 0 else 8)
+
+    for box_type, data_offset, data_size in IterateBoxes(source, entry_offset, iinf_offset + iinf_size):
+
+        if box_type != b"infe" or data_size < 12 or source[data_offset] < 2 or len(items) >= ITEM_LIMIT:
+
+            continue
+
+        id_size        = 2 if source[data_offset] == 2 else 4
+        item_id        = ReadSizedInteger(source, data_offset + 4, id_size)
+        items[item_id] = source.Bytes(data_offset + 6 + id_size, 4)
+
+    properties["ItemCount"] = len(items)
+
+    if primary_id in items:
+
+        properties["Compression"] = ITEM_TYPES.get(items[primary_id], riff.FormatFourCC(items[primary_id]))
+
+    item_properties = []
+    associations    = {}
+
+    if b"iprp" in boxes:
+
+        iprp_offset, iprp_size = boxes[b"iprp"]
+
+        for box_type, data_offset, data_size in IterateBoxes(source, iprp_offset, iprp_offset + iprp_size):
+
+            if box_type == b"ipco":
+
+                item_properties = list(IterateBoxes(source, data_offset, data_offset + data_size))
+
+            elif box_type == b"ipma" and data_size >= 8:
+
+                version, flags = source[data_offset], source.UnpackValue(">I", data_offset) & 0xFFFFFF
+                position       = data_offset + 8
+
+                for _ in range(min(source.UnpackValue(">I", data_offset + 4), ITEM_LIMIT)):
+
+                    item_id                = ReadSizedInteger(source, position, 2 if version < 1 else 4)
+                    position              += 2 if version < 1 else 4
+                    association_count      = source[position]
+                    position              += 1
+                    index_size             = 2 if flags & 1 else 1
+                    index_mask             = 0x7FFF if flags & 1 else 0x7F
+                    associations[item_id]  = [ReadSizedInteger(source, position + index * index_size, index_size) & index_mask for index in range(association_count)]
+                    position              += association_count * index_size
+
+    for index in associations.get(primary_id, range(1, len(item_properties) + 1)):
+
+        if not 1 <= index <= len(item_properties):
+
+            continue
+
+        box_type, data_offset, data_size = item_properties[index - 1]
+
+        if box_type == b"ispe" and data_size >= 12 and "ImageWidth" not in properties:
+
+            properties["ImageWidth"], properties["ImageHeight"] = source.Unpack(">II", data_offset + 4)
+
+        elif box_type == b"irot" and data_size >= 1:
+
+            properties["Rotation"] = f"{(source[data_offset] & 0x03) * 90} degrees"
+
+    exif_id = next((item_id for item_id, item_type in items.items() if item_type == b"Exif"), None)
+
+    if exif_id is None or b"iloc" not in boxes:
+
+        return
+
+    extents = ReadItemLocation(source, boxes[b"iloc"][0], exif_id, idat_offset)
+
+    if not extents:
+
+        return
+
+    exifbytes = b"".join(source.Bytes(extent_offset, min(extent_length or source.size - extent_offset, EXIF_LIMIT)) for extent_offset, extent_length in extents)[:EXIF_LIMIT]
+
+    if len(exifbytes) >= 4:
+
+        image.ReadExif(exifbytes[4 + int.from_bytes(exifbytes[:4], "big"):], properties)
+
+def ReadMetadata(source, offset, end, properties):
+
+    if source.Bytes(offset + 4, 4) != b"hdlr":
+
+        offset += 4
+
+    boxes = {}
+
+    for box_type, data_offset, data_size in IterateBoxes(source, offset, end):
+
+        boxes.setdefault(box_type, (data_offset, data_size))
+
+    if b"ilst" in boxes:
+
+        keys = ReadKeys(source, *boxes[b"keys"]) if b"keys" in boxes else {}
+        ReadItemList(source, *boxes[b"ilst"], keys, properties)
+
+    if b"iinf" in boxes:
+
+        ReadImageItems(source, boxes, properties)
+
+def ReadUserData(source, offset, end, properties):
+
+    for box_type, data_offset, data_size in IterateBoxes(source, offset, end):
+
+        if box_type == b"meta":
+
+            ReadMetadata(source, data_offset, data_offset + data_size, properties)
+
+        elif box_type in USER_DATA_TAGS and data_size >= 4:
+
+            text_size = min(source.UnpackValue(">H", data_offset), data_size - 4, TEXT_LIMIT)
+            value     = common.decode(source.Bytes(data_offset + 4, text_size))
+
+            if value:
+
+                properties[USER_DATA_TAGS[box_type]] = value
+
+def ReadMovie(source, offset, end, properties):
+
+    tracks = []
+
+    for box_type, data_offset, data_size in IterateBoxes(source, offset, end):
+
+        if box_type == b"mvhd" and data_size >= 20:
+
+            if source[data_offset] == 1 and data_size >= 32:
+
+                creation_time, _, timescale, duration = source.Unpack(">QQIQ", data_offset + 4)
+
+            else:
+
+                creation_time, _, timescale, duration = source.Unpack(">IIII", data_offset + 4)
+
+            properties["CreationDate"] = FormatTimestamp(creation_time)
+
+            if timescale and duration not in (0, 0xFFFFFFFF, 0xFFFFFFFFFFFFFFFF):
+
+                properties["Duration"] = audio.FormatDuration(duration / timescale)
+
+        elif box_type == b"trak":
+
+            tracks.append(ReadTrack(source, data_offset, data_offset + data_size, {}))
+
+        elif box_type == b"udta":
+
+            ReadUserData(source, data_offset, data_offset + data_size, properties)
+
+        elif box_type == b"meta":
+
+            ReadMetadata(source, data_offset, data_offset + data_size, properties)
+
+    return tracks
+
+def ReadTracks(tracks, properties):
+
+    properties["TrackCount"] = len(tracks)
+    properties["TrackTypes"] = ", ".join(HANDLER_TYPES.get(track.get("handler"), "Other") for track in tracks)
+    video                    = next((track for track in tracks if track.get("handler") == b"vide"), None)
+    sound                    = next((track for track in tracks if track.get("handler") == b"soun"), None)
+
+    if video:
+
+        properties["VideoCodec"] = SAMPLE_CODECS.get(video.get("codec"), riff.FormatFourCC(video.get("codec", b"")))
+        properties["Width"]      = video.get("width") or video.get("sample_width")
+        properties["Height"]     = video.get("height") or video.get("sample_height")
+
+        if video.get("sample_count") and video.get("duration") and video.get("timescale"):
+
+            frame_rate              = video["sample_count"] * video["timescale"] / video["duration"]
+            properties["FrameRate"] = f"{frame_rate:.3f}".rstrip("0").rstrip(".") + " fps"
+
+    if sound:
+
+        properties["AudioCodec"]      = SAMPLE_CODECS.get(sound.get("codec"), riff.FormatFourCC(sound.get("codec", b"")))
+        properties["AudioChannels"]   = sound.get("channels")
+        properties["AudioSampleRate"] = f"{sound.get('sample_rate') or sound.get('timescale')} Hz"
+        properties["Language"]        = sound.get("language")
+
+def Read(context, filetype):
+
+    properties = {}
+
+    try:
+
+        source = common.source(context)
+
+        if source.size < 8 or source.Bytes(4, 4) not in TOP_LEVEL_BOXES:
+
+            return properties
+
+        for box_type, data_offset, data_size in IterateBoxes(source, 0, source.size):
+
+            if box_type == b"ftyp":
+
+                ReadFileType(source, data_offset, data_size, properties)
+
+            elif box_type == b"moov":
+
+                ReadTracks(ReadMovie(source, data_offset, data_offset + data_size, properties), properties)
+
+            elif box_type == b"meta":
+
+                ReadMetadata(source, data_offset, data_offset + data_size, properties)
+
+    except Exception as exception:
+
+        exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+        print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+
+    return properties
+
+read = Read
@@ -1,10 +1,17 @@
+import codecs
 import html.parser
 import os
 import re
 import xml.etree.ElementTree
 
-RESET = "\033[0m"
-RED   = "\033[91m"
+from . import nyaruhodo_common as common
+
+RESET           = "\033[0m"
+RED             = "\033[91m"
+CHUNK_SIZE      = 65536
+HTML_CHUNK_SIZE = 4096
+HTML_LIMIT      = 1048576
+SVG_ATTRIBUTES  = [("width", "Width"), ("height", "Height"), ("viewBox", "ViewBox")]
 
 class HTMLPropertiesParser(html.parser.HTMLParser):
 
@@ -14,6 +21,7 @@ class HTMLPropertiesParser(html.parser.HTMLParser):
         self.collected_properties = {}
         self.title                = None
         self.inside_title         = False
+        self.finished             = False
 
     def handle_starttag(self, element, attrs):
 
@@ -38,11 +46,15 @@ class HTMLPropertiesParser(html.parser.HTMLParser):
 
             self.inside_title = True
 
+        elif element == "body":
+
+            self.finished = True
+
     def handle_data(self, data):
 
-        if self.inside_title and self.title is None:
+        if self.inside_title:
 
-            self.title = data.strip()
+            self.title = (self.title or "") + data
 
     def handle_endtag(self, element):
 
@@ -50,22 +62,29 @@ class HTMLPropertiesParser(html.parser.HTMLParser):
 
             self.inside_title = False
 
-def ReadHTML(filepath):
+        elif element == "head":
+
+            self.finished = True
+
+def ReadHTML(context):
 
     properties = {}
 
     try:
 
-        with open(filepath, "r", encoding="utf-8", errors="replace") as file:
+        source      = common.source(context)
+        decoder     = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        page_parser = HTMLPropertiesParser()
+        offset      = 0
 
-            page_content = file.read(32768)
+        while offset < min(source.size, HTML_LIMIT) and not page_parser.finished:
 
-        page_parser = HTMLPropertiesParser()
-        page_parser.feed(page_content)
+            page_parser.feed(decoder.decode(source.Slice(offset, HTML_CHUNK_SIZE)))
+            offset += HTML_CHUNK_SIZE
 
-        if page_parser.title:
+        if page_parser.title and page_parser.title.strip():
 
-            properties["Title"] = page_parser.title
+            properties["Title"] = " ".join(page_parser.title.split())
 
         for key, value in page_parser.collected_properties.items():
 
@@ -80,15 +99,13 @@ def ReadHTML(filepath):
 
     return properties
 
-def ReadXML(filepath):
+def ReadXML(context):
 
     properties = {}
 
     try:
 
-        with open(filepath, "r", encoding="utf-8", errors="replace") as file:
-
-            xml_header = file.read(512)
+        xml_header = context.Read(0, 512).decode("utf-8", errors="replace")
 
         declaration_match = re.search(r"<\?xml[^?]*\?>", xml_header)
 
@@ -105,10 +122,51 @@ def ReadXML(filepath):
 
                     properties[declaration_attribute.capitalize()] = declaration_attribute_match.group(1)
 
-        xml_tree                  = xml.etree.ElementTree.parse(filepath)
-        xml_root                  = xml_tree.getroot()
-        properties["RootElement"] = xml_root.tag.split("}")[-1]
-        properties["ChildCount"]  = len(list(xml_root))
+        source      = common.source(context)
+        xml_parser  = xml.etree.ElementTree.XMLPullParser(events=("start", "end"))
+        xml_root    = None
+        depth       = 0
+        child_count = 0
+        offset      = 0
+
+        while offset < source.size:
+
+            xml_parser.feed(source.Slice(offset, CHUNK_SIZE))
+            offset += CHUNK_SIZE
+
+            for event, element in xml_parser.read_events():
+
+                if event == "start":
+
+                    depth += 1
+
+                    if depth == 1:
+
+                        xml_root                  = element
+                        properties["RootElement"] = element.tag.split("}")[-1]
+
+                        if properties["RootElement"] == "svg":
+
+                            for attribute_name, field_label in SVG_ATTRIBUTES:
+
+                                if element.get(attribute_name):
+
+                                    properties[field_label] = element.get(attribute_name).strip()
+
+                    elif depth == 2:
+
+                        child_count += 1
+
+                else:
+
+                    depth -= 1
+
+                    if depth == 1:
+
+                        xml_root.clear()
+
+        xml_parser.close()
+        properties["ChildCount"] = child_count
 
     except Exception as exception:
 
@@ -117,15 +175,15 @@ def ReadXML(filepath):
 
     return properties
 
-def Read(filepath, filetype):
+def Read(context, filetype):
 
     if filetype in ("HTML", "HTM"):
 
-        return ReadHTML(filepath)
+        return ReadHTML(context)
 
     if filetype in ("XML", "SVG"):
 
-        return ReadXML(filepath)
+        return ReadXML(context)
 
     return {}
 
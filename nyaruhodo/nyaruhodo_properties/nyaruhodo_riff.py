@@ -0,0 +1,337 @@
+import os
+
+from . import nyaruhodo_audio  as audio
+from . import nyaruhodo_common as common
+from . import nyaruhodo_image  as image
+
+RESET            = "\033[0m"
+RED              = "\033[91m"
+RIFF_CONTAINERS  = {b"hdrl", b"strl", b"INFO", b"odml"}
+RIFF_DEPTH_LIMIT = 4
+RIFF_CHUNK_LIMIT = 1048576
+INFO_TEXT_LIMIT  = 1024
+WAVE_FORMATS     = {
+    0x0001: "PCM",
+    0x0002: "Microsoft ADPCM",
+    0x0003: "IEEE Float",
+    0x0006: "A-law",
+    0x0007: "Mu-law",
+    0x0011: "IMA ADPCM",
+    0x0031: "GSM 6.10",
+    0x0050: "MPEG Audio",
+    0x0055: "MPEG Layer III",
+    0x00FF: "AAC",
+    0x0161: "Windows Media Audio",
+    0x2000: "AC-3",
+    0xFFFE: "Extensible",
+}
+INFO_TAGS        = {
+    b"INAM": "Title",
+    b"IART": "Artist",
+    b"IPRD": "Album",
+    b"ITRK": "Track",
+    b"IGNR": "Genre",
+    b"ICRD": "CreationDate",
+    b"ICMT": "Comment",
+    b"ICOP": "Copyright",
+    b"IENG": "Engineer",
+    b"ISBJ": "Subject",
+    b"IKEY": "Keywords",
+    b"ISFT": "Software",
+}
+WEBP_FEATURES    = [(0x20, "ICC Profile"), (0x10, "Alpha"), (0x08, "EXIF"), (0x04, "XMP"), (0x02, "Animation")]
+
+def IterateChunks(source, offset, end):
+
+    while offset + 8 <= end:
+
+        chunk_id, chunk_size = source.Unpack("<4sI", offset)
+
+        yield chunk_id, offset + 8, min(chunk_size, end - offset - 8)
+
+        offset += 8 + chunk_size + (chunk_size & 1)
+
+def WalkChunks(source, offset, end, parent=b"", depth=0):
+
+    for chunk_id, data_offset, chunk_size in IterateChunks(source, offset, end):
+
+        if chunk_id == b"LIST" and chunk_size >= 4:
+
+            list_type = source.Bytes(data_offset, 4)
+
+            if list_type in RIFF_CONTAINERS and depth < RIFF_DEPTH_LIMIT:
+
+                yield from WalkChunks(source, data_offset + 4, data_offset + chunk_size, list_type, depth + 1)
+
+            continue
+
+        yield parent, chunk_id, data_offset, chunk_size
+
+def FormatFourCC(fourcc):
+
+    text = fourcc.decode("latin1").strip("\x00 ")
+
+    return text if text.isprintable() else fourcc.hex().upper()
+
+def ReadInfoTag(source, chunk_id, data_offset, chunk_size, properties):
+
+    if chunk_id in INFO_TAGS and chunk_size:
+
+        value = common.decode(source.Slice(data_offset, min(chunk_size, INFO_TEXT_LIMIT)))
+
+        if value:
+
+            properties[INFO_TAGS[chunk_id]] = value
+
+def ReadWave(source, end):
+
+    properties  = {}
+    tags        = {}
+    byte_rate   = 0
+    sample_rate = 0
+    data_size   = None
+    sample_size = None
+
+    for parent, chunk_id, data_offset, chunk_size in WalkChunks(source, 12, end):
+
+        if chunk_id == b"fmt " and chunk_size >= 16:
+
+            format_tag, channels, sample_rate, byte_rate, _, bits_per_sample = source.Unpack("<HHIIHH", data_offset)
+
+            if format_tag == 0xFFFE and chunk_size >= 40:
+
+                format_tag = source.UnpackValue("<H", data_offset + 24)
+
+            properties["Format"]     = WAVE_FORMATS.get(format_tag, f"0x{format_tag:04X}")
+            properties["SampleRate"] = f"{sample_rate} Hz"
+            properties["Channels"]   = channels
+
+            if bits_per_sample:
+
+                properties["BitsPerSample"] = bits_per_sample
+
+        elif chunk_id == b"fact" and chunk_size >= 4:
+
+            sample_size = source.UnpackValue("<I", data_offset)
+
+        elif chunk_id == b"data":
+
+            data_size = chunk_size
+
+        elif parent == b"INFO":
+
+            ReadInfoTag(source, chunk_id, data_offset, chunk_size, tags)
+
+    if properties.get("Format") != "PCM" and sample_size and sample_rate:
+
+        duration = sample_size / sample_rate
+
+    elif data_size is not None and byte_rate:
+
+        duration = data_size / byte_rate
+
+    else:
+
+        duration = None
+
+    if duration:
+
+        properties["Duration"] = audio.FormatDuration(duration)
+
+    if byte_rate:
+
+        properties["Bitrate"] = f"{round(byte_rate * 8 / 1000)} kbps"
+
+    properties.update(tags)
+
+    return properties
+
+def ReadAVI(source, end):
+
+    properties   = {}
+    tags         = {}
+    stream_type  = None
+    total_frames = 0
+    frame_rate   = 0.0
+
+    for parent, chunk_id, data_offset, chunk_size in WalkChunks(source, 12, end):
+
+        if chunk_id == b"avih" and chunk_size >= 40:
+
+            microseconds, _, _, _, total_frames, _, stream_count, _, width, height = source.Unpack("<10I", data_offset)
+
+            properties["Width"]       = width
+            properties["Height"]      = height
+            properties["StreamCount"] = stream_count
+
+            if microseconds:
+
+                frame_rate = 1000000 / microseconds
+
+        elif chunk_id == b"strh" and chunk_size >= 48:
+
+            stream_type, handler = source.Unpack("<4s4s", data_offset)
+            scale, rate          = source.Unpack("<II", data_offset + 20)
+
+            if stream_type == b"vids" and "VideoCodec" not in properties:
+
+                if handler.strip(b"\x00 "):
+
+                    properties["VideoCodec"] = FormatFourCC(handler)
+
+                if scale and rate:
+
+                    frame_rate = rate / scale
+
+        elif chunk_id == b"strf" and stream_type == b"vids" and chunk_size >= 40:
+
+            compression = source.Bytes(data_offset + 16, 4)
+
+            if compression.strip(b"\x00 "):
+
+                properties["VideoCodec"] = FormatFourCC(compression)
+
+        elif chunk_id == b"strf" and stream_type == b"auds" and chunk_size >= 16 and "AudioFormat" not in properties:
+
+            format_tag, channels, sample_rate = source.Unpack("<HHI", data_offset)
+            properties["AudioFormat"]         = WAVE_FORMATS.get(format_tag, f"0x{format_tag:04X}")
+            properties["AudioChannels"]       = channels
+            properties["AudioSampleRate"]     = f"{sample_rate} Hz"
+
+        elif chunk_id == b"dmlh" and chunk_size >= 4:
+
+            total_frames = max(total_frames, source.UnpackValue("<I", data_offset))
+
+        elif parent == b"INFO":
+
+            ReadInfoTag(source, chunk_id, data_offset, chunk_size, tags)
+
+    if frame_rate:
+
+        properties["FrameRate"] = f"{frame_rate:.3f}".rstrip("0").rstrip(".") + " fps"
+
+        if total_frames:
+
+            properties["FrameCount"] = total_frames
+            properties["Duration"]   = audio.FormatDuration(total_frames / frame_rate)
+
+    properties.update(tags)
+
+    return properties
+
+def ReadWebPBitstream(source, chunk_id, data_offset, chunk_size, properties):
+
+    if chunk_id == b"VP8 " and chunk_size >= 10:
+
+        properties["Compression"] = "Lossy (VP8)"
+
+        if source.Bytes(data_offset + 3, 3) == b"\x9d\x01\x2a":
+
+            properties.setdefault("ImageWidth", source.UnpackValue("<H", data_offset + 6) & 0x3FFF)
+            properties.setdefault("ImageHeight", source.UnpackValue("<H", data_offset + 8) & 0x3FFF)
+
+    elif chunk_id == b"VP8L" and chunk_size >= 5:
+
+        properties["Compression"] = "Lossless (VP8L)"
+
+        if source[data_offset] == 0x2F:
+
+            bits = source.UnpackValue("<I", data_offset + 1)
+            properties.setdefault("ImageWidth", (bits & 0x3FFF) + 1)
+            properties.setdefault("ImageHeight", ((bits >> 14) & 0x3FFF) + 1)
+
+def ReadWebP(source, end):
+
+    properties  = {}
+    frame_count = 0
+    duration    = 0
+
+    for _, chunk_id, data_offset, chunk_size in WalkChunks(source, 12, end):
+
+        if chunk_id == b"VP8X" and chunk_size >= 10:
+
+            flags                     = source[data_offset]
+            properties["ImageWidth"]  = int.from_bytes(source.Bytes(data_offset + 4, 3), "little") + 1
+            properties["ImageHeight"] = int.from_bytes(source.Bytes(data_offset + 7, 3), "little") + 1
+            features                  = [label for bit, label in WEBP_FEATURES if flags & bit]
+
+            if features:
+
+                properties["Features"] = ", ".join(features)
+
+        elif chunk_id in (b"VP8 ", b"VP8L"):
+
+            ReadWebPBitstream(source, chunk_id, data_offset, chunk_size, properties)
+
+        elif chunk_id == b"ANIM" and chunk_size >= 6:
+
+            loop_count              = source.UnpackValue("<H", data_offset + 4)
+            properties["LoopCount"] = loop_count if loop_count else "Infinite"
+
+        elif chunk_id == b"ANMF" and chunk_size >= 16:
+
+            frame_count += 1
+            duration    += int.from_bytes(source.Bytes(data_offset + 12, 3), "little")
+
+            if "Compression" not in properties:
+
+                for frame_chunk_id, frame_offset, frame_size in IterateChunks(source, data_offset + 16, data_offset + chunk_size):
+
+                    ReadWebPBitstream(source, frame_chunk_id, frame_offset, frame_size, properties)
+
+        elif chunk_id == b"EXIF":
+
+            exifbytes = source.Slice(data_offset, min(chunk_size, RIFF_CHUNK_LIMIT))
+            exifbytes = exifbytes[6:] if exifbytes[:6] == b"Exif\x00\x00" else exifbytes
+            image.ReadExif(exifbytes, properties)
+
+        elif chunk_id == b"ICCP":
+
+            properties["ICCProfile"] = f"{chunk_size:,} bytes"
+
+        elif chunk_id == b"XMP ":
+
+            properties["XMP"] = f"{chunk_size:,} bytes"
+
+    if frame_count:
+
+        properties["FrameCount"] = frame_count
+        properties["Duration"]   = f"{duration / 1000:.2f} s"
+
+    return properties
+
+def Read(context, filetype):
+
+    properties = {}
+
+    try:
+
+        source = common.source(context)
+
+        if source.size < 12 or source[:4] != b"RIFF":
+
+            return properties
+
+        form_type = source.Bytes(8, 4)
+        end       = min(8 + source.UnpackValue("<I", 4), source.size)
+
+        if form_type == b"WAVE":
+
+            properties = ReadWave(source, end)
+
+        elif form_type == b"AVI ":
+
+            properties = ReadAVI(source, end)
+
+        elif form_type == b"WEBP":
+
+            properties = ReadWebP(source, end)
+
+    except Exception as exception:
+
+        exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+        print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+
+    return properties
+
+read = Read
@@ -1,25 +1,33 @@
-import json
 import os
 
+from .. import nyaruhodo_artifact as artifact
+
+SOURCES = [os.path.join(os.path.dirname(__file__), "..", "..", "data", "properties.json")]
+
 def LookupTables():
 
-    with open(os.path.join(os.path.dirname(__file__), "..", "..", "data", "properties.json"), "r", encoding="utf-8") as file:
+    import json
+
+    with open(SOURCES[0], "r", encoding="utf-8") as file:
 
         properties = json.load(file)
 
-    LookupTables = {}
-    key_tables   = [
+    LookupTables  = {}
+    key_tables    = [
         "EXIF TAGS",
         "GPS TAGS",
         "ORIENTATION",
         "RESOLUTION",
         "PE MACHINES",
         "PE SUBSYSTEMS",
+        "PE RESOURCE TYPES",
         "PE CHARACTERISTICS",
         "ELF TYPES",
         "ELF MACHINES",
         "ELF OSABI",
+        "ELF SEGMENT TYPES",
     ]
+    nested_tables = ["PE ORDINALS"]
 
     for table_key, table_value in properties.items():
 
@@ -27,13 +35,21 @@ def LookupTables():
 
             LookupTables[table_key] = {int(key): value for key, value in table_value.items()}
 
+        elif table_key in nested_tables:
+
+            LookupTables[table_key] = {name: {int(key): value for key, value in table.items()} for name, table in table_value.items()}
+
         else:
 
             LookupTables[table_key] = table_value
 
     return LookupTables
 
-LOOKUP_TABLES      = LookupTables()
+def CompileLookupTables(rebuild=False):
+
+    return artifact.LoadSection("tables", SOURCES, LookupTables, rebuild)
+
+LOOKUP_TABLES      = CompileLookupTables()
 EXIF_TAGS          = LOOKUP_TABLES["EXIF TAGS"]
 GPS_TAGS           = LOOKUP_TABLES["GPS TAGS"]
 ORIENTATION        = LOOKUP_TABLES["ORIENTATION"]
@@ -44,7 +60,10 @@ ID3v1_GENRES       = LOOKUP_TABLES["ID3v1 GENRES"]
 PE_MACHINES        = LOOKUP_TABLES["PE MACHINES"]
 PE_SUBSYSTEMS      = LOOKUP_TABLES["PE SUBSYSTEMS"]
 PE_CHARACTERISTICS = LOOKUP_TABLES["PE CHARACTERISTICS"]
+PE_RESOURCE_TYPES  = LOOKUP_TABLES["PE RESOURCE TYPES"]
 ELF_TYPES          = LOOKUP_TABLES["ELF TYPES"]
 ELF_MACHINES       = LOOKUP_TABLES["ELF MACHINES"]
 ELF_OSABI          = LOOKUP_TABLES["ELF OSABI"]
+ELF_SEGMENT_TYPES  = LOOKUP_TABLES["ELF SEGMENT TYPES"]
+PE_ORDINALS        = LOOKUP_TABLES["PE ORDINALS"]
 XML_NAMESPACES     = LOOKUP_TABLES["XML NAMESPACES"]
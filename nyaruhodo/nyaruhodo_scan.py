@@ -0,0 +1,143 @@
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import time
+
+from . import nyaruhodo_batch as batch
+
+RESET      = "\033[0m"
+RED        = "\033[91m"
+BLUE       = "\033[94m"
+SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+def ParseSize(size_string):
+
+    normalised = size_string.strip().upper().rstrip("B")
+
+    try:
+
+        if normalised and normalised[-1] in SIZE_UNITS:
+
+            size = int(float(normalised[:-1]) * SIZE_UNITS[normalised[-1]])
+
+        else:
+
+            size = int(normalised)
+
+    except (ValueError, OverflowError):
+
+        raise argparse.ArgumentTypeError(f"invalid size '{size_string}' (expected e.g. 500K, 100M, 2G)")
+
+    if size < 0:
+
+        raise argparse.ArgumentTypeError(f"invalid size '{size_string}' (must not be negative)")
+
+    return size
+
+def MatchesAny(relative_path, name, patterns):
+
+    return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern) for pattern in patterns)
+
+def WalkDirectory(root, include=(), exclude=(), max_size=None, statistics=None):
+
+    directories = [root]
+
+    while directories:
+
+        directory = directories.pop()
+
+        try:
+
+            with os.scandir(directory) as entries:
+
+                for entry in entries:
+
+                    relative_path = os.path.relpath(entry.path, root)
+
+                    if exclude and MatchesAny(relative_path, entry.name, exclude):
+
+                        continue
+
+                    try:
+
+                        if entry.is_dir(follow_symlinks=False):
+
+                            directories.append(entry.path)
+
+                            continue
+
+                        if not entry.is_file(follow_symlinks=False):
+
+                            continue
+
+                        if include and not MatchesAny(relative_path, entry.name, include):
+
+                            continue
+
+                        filesize = entry.stat(follow_symlinks=False).st_size
+
+                    except OSError as exception:
+
+                        exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+                        print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}", file=sys.stderr)
+
+                        continue
+
+                    if max_size is not None and filesize > max_size:
+
+                        if statistics is not None:
+
+                            statistics["skipped"] += 1
+
+                        continue
+
+                    if statistics is not None:
+
+                        statistics["bytes"] += filesize
+
+                    yield entry.path
+
+        except OSError as exception:
+
+            exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+            print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}", file=sys.stderr)
+
+def Scan(arguments):
+
+    statistics = {"files": 0, "bytes": 0, "skipped": 0, "errors": 0}
+    filepaths  = WalkDirectory(arguments.directory, arguments.include, arguments.exclude, arguments.max_size, statistics)
+    started    = time.perf_counter()
+
+    try:
+
+        for filepath, analysis, metadata in batch.AnalyseFiles(filepaths, workers=arguments.workers, timeout=arguments.timeout):
+
+            record = {"path": filepath, **analysis}
+
+            if metadata:
+
+                record["metadata"] = metadata
+
+            if "error" in analysis:
+
+                statistics["errors"] += 1
+
+            statistics["files"] += 1
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        sys.stdout.flush()
+
+    except BrokenPipeError:
+
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+
+        return 1
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"==> {BLUE}INFO{RESET} [ {os.path.basename(__file__)} ]: {statistics['files']:,} FILES ({statistics['bytes'] / 1048576:,.1f} MB) IN {elapsed:.2f}s, {statistics['files'] / elapsed:,.1f} FILES/s, {statistics['bytes'] / 1048576 / elapsed:,.1f} MB/s, {statistics['errors']:,} ERRORS, {statistics['skipped']:,} SKIPPED", file=sys.stderr)
+
+    return 0
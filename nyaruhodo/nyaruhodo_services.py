@@ -8,7 +8,7 @@ RESET               = "\033[0m"
 RED                 = "\033[91m"
 VIRUSTOTAL_ENDPOINT = "https://www.virustotal.com/api/v3/files/"
 
-def VirusTotalLookup(filepath, virustotal_api_key=None):
+def VirusTotalLookup(filepath, virustotal_api_key=None, context=None):
 
     if not virustotal_api_key:
 
@@ -23,15 +23,22 @@ def VirusTotalLookup(filepath, virustotal_api_key=None):
 
     try:
 
-        hashdigest = hashlib.sha256()
+        if context is not None:
 
-        with open(filepath, "rb") as file:
+            filehash = context.Hash()
 
-            for datablock in iter(lambda: file.read(4096), b""):
+        else:
 
-                hashdigest.update(datablock)
+            hashdigest = hashlib.sha256()
+
+            with open(filepath, "rb") as file:
+
+                for datablock in iter(lambda: file.read(4096), b""):
+
+                    hashdigest.update(datablock)
+
+            filehash = hashdigest.hexdigest()
 
-        filehash = hashdigest.hexdigest()
         apirequest = urllib.request.Request(VIRUSTOTAL_ENDPOINT + filehash, headers={"x-apikey": virustotal_api_key})
 
         try:
@@ -1,14 +1,19 @@
-import json
 import os
 
-RESET = "\033[0m"
-RED   = "\033[91m"
+RESET   = "\033[0m"
+RED     = "\033[91m"
+SOURCES = [
+    os.path.join(os.path.dirname(__file__), "..", "data", "signatures.json"),
+    os.path.join(os.path.dirname(__file__), "..", "data", "properties.json"),
+]
 
 def LoadSignatures():
 
+    import json
+
     try:
 
-        with open(os.path.join(os.path.dirname(__file__), "..", "data", "signatures.json"), "r", encoding="latin-1") as file:
+        with open(SOURCES[0], "r", encoding="latin-1") as file:
 
             file = json.load(file)
 
@@ -24,11 +29,105 @@ def LoadSignatures():
     for item in file:
 
         signature             = item.get("signature", "")
+        signature_offset      = item.get("signature_offset", 0)
+        signature_mask        = item.get("signature_mask")
         signature_filetype    = item.get("signature_filetype", "")
         signature_description = item.get("signature_description", "")
 
         if signature and signature_filetype:
 
-            signatures[bytes.fromhex(signature)] = (signature_filetype, signature_description)
+            signature_mask = bytes.fromhex(signature_mask) if signature_mask else None
+
+            if signature_mask is not None and len(signature_mask) != len(bytes.fromhex(signature)):
+
+                print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: SIGNATURE MASK LENGTH MISMATCH ({signature.upper()})")
+
+                continue
+
+            signatures[(int(signature_offset), bytes.fromhex(signature), signature_mask)] = (signature_filetype, signature_description)
 
     return signatures
+
+def SignatureVersion():
+
+    import hashlib
+
+    hashdigest = hashlib.sha256()
+
+    for source in SOURCES:
+
+        try:
+
+            with open(source, "rb") as file:
+
+                hashdigest.update(file.read())
+
+        except OSError as exception:
+
+            exception_string = str(exception).split("]")[-1].strip() if "]" in str(exception) else str(exception)
+            print(f"==> {RED}ERROR{RESET} [ {os.path.basename(__file__)} ]: {exception_string.upper()}")
+
+    return hashdigest.hexdigest()[:16]
+
+def CompileSignatures(signatures):
+
+    signature_index = {}
+
+    for (offset, signature, mask), (filetype, description) in signatures.items():
+
+        offset_entry    = signature_index.setdefault(offset, [0, {}, []])
+        offset_entry[0] = max(offset_entry[0], len(signature))
+        _, signature_trie, masked_signatures = offset_entry
+
+        if mask is not None:
+
+            mask_value = int.from_bytes(mask, "big")
+            masked_signatures.append((signature, mask_value, int.from_bytes(signature, "big") & mask_value, filetype, description))
+
+            continue
+
+        node = signature_trie
+
+        for byte in signature:
+
+            node = node.setdefault(byte, {})
+
+        node[None] = (signature, filetype, description)
+
+    return {offset: tuple(signature_index[offset]) for offset in sorted(signature_index)}
+
+def MatchSignature(signature_index, read):
+
+    match = None
+
+    for offset, (length, signature_trie, masked_signatures) in signature_index.items():
+
+        window = read(offset, length)
+
+        if not window:
+
+            break
+
+        node = signature_trie
+
+        for byte in window:
+
+            node = node.get(byte)
+
+            if node is None:
+
+                break
+
+            if None in node and (match is None or len(node[None][0]) > len(match[1])):
+
+                match = (offset,) + node[None]
+
+        for signature, mask_value, masked_value, filetype, description in masked_signatures:
+
+            if len(window) >= len(signature) and int.from_bytes(window[:len(signature)], "big") & mask_value == masked_value:
+
+                if match is None or len(signature) > len(match[1]):
+
+                    match = (offset, signature, filetype, description)
+
+    return match
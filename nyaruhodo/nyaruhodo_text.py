@@ -0,0 +1,320 @@
+import codecs
+import re
+
+SAMPLE_SIZE    = 8192
+LINE_LIMIT     = 64
+TEXT_BYTES     = bytes(range(0x20, 0x100)) + b"\t\n\r\f\b\x1b"
+CONTROL_LIMIT  = 0.01
+BYTE_ORDER     = [
+    (codecs.BOM_UTF32_LE, "utf-32-le", "UTF-32 LE"),
+    (codecs.BOM_UTF32_BE, "utf-32-be", "UTF-32 BE"),
+    (codecs.BOM_UTF8,     "utf-8",     "UTF-8 BOM"),
+    (codecs.BOM_UTF16_LE, "utf-16-le", "UTF-16 LE"),
+    (codecs.BOM_UTF16_BE, "utf-16-be", "UTF-16 BE"),
+]
+DELIMITERS     = {",": ("CSV", "Comma-Separated Values File"), "\t": ("TSV", "Tab-Separated Values File"), ";": ("CSV", "Comma-Separated Values File"), "|": ("CSV", "Comma-Separated Values File")}
+JSON_START     = re.compile(r"(?:\{\s*(?:\"|\})|\[\s*(?:[\{\[\"\-\d\]]|true|false|null))")
+XML_START      = re.compile(r"(?:\s*<!--.*?-->)*\s*<[A-Za-z_][\w:.\-]*[\s>/]", re.DOTALL)
+HTML_START     = re.compile(r"(?:\s*<!--.*?-->)*\s*<(?:!doctype\s+html[\s>]|([A-Za-z][\w\-]*)[\s>/])", re.IGNORECASE | re.DOTALL)
+HTML_ELEMENTS  = {
+    "a", "abbr", "address", "area", "article", "aside", "audio", "b", "base", "bdi", "bdo", "blockquote", "body", "br", "button",
+    "canvas", "caption", "center", "cite", "code", "col", "colgroup", "data", "datalist", "dd", "del", "details", "dfn", "dialog",
+    "dir", "div", "dl", "dt", "em", "embed", "fieldset", "figcaption", "figure", "font", "footer", "form", "frame", "frameset",
+    "h1", "h2", "h3", "h4", "h5", "h6", "head", "header", "hgroup", "hr", "html", "i", "iframe", "img", "input", "ins", "kbd",
+    "label", "legend", "li", "link", "main", "map", "mark", "menu", "meta", "meter", "nav", "noscript", "object", "ol", "optgroup",
+    "option", "output", "p", "param", "picture", "pre", "progress", "q", "rp", "rt", "ruby", "s", "samp", "script", "search",
+    "section", "select", "slot", "small", "source", "span", "strong", "style", "sub", "summary", "sup", "table", "tbody", "td",
+    "template", "textarea", "tfoot", "th", "thead", "time", "title", "tr", "track", "u", "ul", "var", "video", "wbr",
+}
+YAML_LINE      = re.compile(r"\s*(?:-\s+)?[\w\"'.\- ]+:(?:\s|$)|\s*-\s+\S")
+YAML_ITEM      = re.compile(r"\s*-\s+\S")
+NUMBER         = re.compile(r"\s*[-+]?(?:\d+(?:[.,]\d*)?|\.\d+)(?:[eE][-+]?\d+)?\s*$")
+SOURCE_PATTERNS = [
+    ("PY",   "Python Source File",  re.compile(r"\s*(?:def \w+\(|class \w+.*:$|import \w|from [\w.]+ import |if __name__ ==|print\()")),
+    ("JS",   "JavaScript Source File", re.compile(r"\s*(?:function\b|const |let |var |import .+ from |export |module\.exports|require\(|document\.|window\.)")),
+    ("C",    "C Source File",       re.compile(r"\s*(?:#include\s*[<\"]|#define |#ifn?def |int main\s*\(|typedef |struct \w+\s*\{)")),
+    ("JAVA", "Java Source File",    re.compile(r"\s*(?:package [\w.]+;|import [\w.*]+;|public (?:final |abstract )?(?:class|interface|enum) )")),
+    ("PS1",  "PowerShell Script",   re.compile(r"\s*(?:\$\w+\s*=|function \w+-\w+|param\s*\(|Write-(?:Host|Output)|(?:Get|Set|New|Invoke)-\w+|\[System\.)", re.IGNORECASE)),
+    ("VBS",  "VBScript File",       re.compile(r"\s*(?:Dim |Set \w+\s*=\s*CreateObject|Sub \w+|End Sub|Function \w+\(|End Function|WScript\.|On Error Resume Next)", re.IGNORECASE)),
+    ("BAT",  "Windows Batch File",  re.compile(r"\s*(?:@echo off|set \w+=|goto :?\w+|call \S+|rem |if exist |:\w+$)", re.IGNORECASE)),
+    ("SH",   "Shell Script",        re.compile(r"\s*(?:echo |export \w+=|fi$|then$|done$|esac$|\w+=\$\(|if \[)")),
+]
+
+def DetectEncoding(buffer):
+
+    for byte_order_mark, encoding, label in BYTE_ORDER:
+
+        if buffer.startswith(byte_order_mark):
+
+            return encoding, label, len(byte_order_mark)
+
+    sample     = buffer[:4096]
+    half_count = len(sample) // 2
+
+    if half_count >= 4:
+
+        even_nulls = sample[0::2].count(0)
+        odd_nulls  = sample[1::2].count(0)
+
+        if odd_nulls > half_count * 0.4 and even_nulls < half_count * 0.05:
+
+            return "utf-16-le", "UTF-16 LE", 0
+
+        if even_nulls > half_count * 0.4 and odd_nulls < half_count * 0.05:
+
+            return "utf-16-be", "UTF-16 BE", 0
+
+    return "utf-8", None, 0
+
+def DecodeText(buffer, complete):
+
+    encoding, label, skip = DetectEncoding(buffer)
+    buffer                = buffer[skip:]
+
+    if encoding.startswith("utf-8"):
+
+        control_count = len(buffer.translate(None, TEXT_BYTES))
+
+        if buffer and control_count > len(buffer) * CONTROL_LIMIT:
+
+            return None, None, 0.0
+
+        try:
+
+            return codecs.getincrementaldecoder("utf-8")().decode(buffer, final=complete), label, 1.0 - control_count / max(len(buffer), 1)
+
+        except UnicodeDecodeError:
+
+            return buffer.decode("latin-1"), "Latin-1", 0.6
+
+    text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(buffer, final=complete)
+
+    return text, label, 1.0 - text.count("�") / max(len(text), 1)
+
+def SplitFields(line, delimiter):
+
+    if '"' not in line:
+
+        return line.split(delimiter), False
+
+    fields = [""]
+    quoted = False
+
+    for character in line:
+
+        if character == '"':
+
+            quoted = not quoted
+
+        elif character == delimiter and not quoted:
+
+            fields.append("")
+
+            continue
+
+        fields[-1] += character
+
+    return fields, any(field.strip().startswith('"') for field in fields)
+
+def HasHeader(rows):
+
+    header, data = rows[0], rows[1:]
+
+    if not data or len(set(header)) != len(header) or any(not field.strip() or NUMBER.match(field) for field in header):
+
+        return False
+
+    return any(sum(1 for row in data if NUMBER.match(row[index])) >= max(1, len(data) // 2) for index in range(len(header)))
+
+def ClassifyDelimited(lines):
+
+    best_match = None
+
+    for delimiter, (filetype, description) in DELIMITERS.items():
+
+        rows, quoted = [], False
+
+        for line in lines:
+
+            fields, quoted_fields = SplitFields(line, delimiter)
+            quoted                = quoted or quoted_fields
+            rows.append(fields)
+
+        common = len(rows[0]) - 1
+
+        if common < 1 or any(len(row) != common + 1 for row in rows):
+
+            continue
+
+        evidence = quoted or HasHeader(rows)
+
+        if common < 2 and not evidence:
+
+            continue
+
+        if best_match is None or (evidence, common) > best_match[0]:
+
+            best_match = ((evidence, common), filetype, description)
+
+    if best_match is None:
+
+        return None
+
+    (evidence, common), filetype, description = best_match
+
+    if common < 2:
+
+        return filetype, description, 0.6
+
+    return filetype, description, 0.95 if evidence else 0.8
+
+def ClassifyYAML(lines):
+
+    content_lines = [line for line in lines if not line.lstrip().startswith("#")]
+
+    if not content_lines or sum(1 for line in content_lines if YAML_LINE.match(line)) < max(2, 0.8 * len(content_lines)):
+
+        return None
+
+    listed = any(YAML_ITEM.match(line) for line in content_lines)
+    nested = any(previous.rstrip().endswith(":") and line[:1] in " \t" for previous, line in zip(content_lines, content_lines[1:]))
+
+    return ("YAML", "YAML Document", 0.7) if listed or nested else None
+
+def IsWellFormedXML(text, complete):
+
+    import xml.etree.ElementTree
+
+    parser = xml.etree.ElementTree.XMLPullParser(("start", "end"))
+    depth  = 0
+    roots  = 0
+
+    try:
+
+        parser.feed(text)
+
+        if complete:
+
+            parser.close()
+
+        for event, _ in parser.read_events():
+
+            roots += 1 if event == "start" and depth == 0 else 0
+            depth += 1 if event == "start" else -1
+
+    except xml.etree.ElementTree.ParseError:
+
+        return False
+
+    return roots == 1
+
+def ClassifySource(lines):
+
+    best_match = None
+
+    for filetype, description, pattern in SOURCE_PATTERNS:
+
+        hits = sum(1 for line in lines if pattern.match(line))
+
+        if hits >= 2 and (best_match is None or hits > best_match[0]):
+
+            best_match = (hits, filetype, description)
+
+    if best_match is None:
+
+        return None
+
+    return best_match[1], best_match[2], round(min(0.9, 0.4 + best_match[0] / len(lines)), 2)
+
+def ClassifyStructure(text, complete):
+
+    stripped = text.lstrip()
+    head     = stripped[:512].lower()
+
+    if head.startswith("<?xml"):
+
+        return ("SVG", "Scalable Vector Graphics", 0.95) if "<svg" in stripped[:4096].lower() else ("XML", "XML Document", 0.95)
+
+    if head.startswith("<?php"):
+
+        return "PHP", "PHP Script", 0.95
+
+    if head.startswith("<svg"):
+
+        return "SVG", "Scalable Vector Graphics", 0.9
+
+    html_match = HTML_START.match(head)
+
+    if html_match and (html_match.group(1) is None or html_match.group(1) in HTML_ELEMENTS):
+
+        return "HTML", "HTML Document", 0.9 if head.startswith(("<!doctype", "<html")) else 0.7
+
+    if XML_START.match(stripped) and IsWellFormedXML(stripped, complete):
+
+        return "XML", "XML Document", 0.7
+
+    if stripped.startswith("#!"):
+
+        return "SCRIPT", "Script with Shebang", 0.95
+
+    if JSON_START.match(stripped):
+
+        lines = [line.strip() for line in stripped.splitlines() if line.strip()]
+
+        if not complete and len(lines) > 1:
+
+            lines = lines[:-1]
+
+        if len(lines) >= 2 and all(line.startswith("{") and line.endswith("}") for line in lines):
+
+            return "NDJSON", "Newline-Delimited JSON File", 0.9
+
+        closing = "}" if stripped[0] == "{" else "]"
+
+        return "JSON", "JavaScript Object Notation File", 0.9 if not complete or stripped.rstrip().endswith(closing) else 0.6
+
+    if head.startswith(("%yaml", "---\n", "---\r")):
+
+        return "YAML", "YAML Document", 0.9
+
+    return None
+
+def ClassifyText(buffer, complete=False):
+
+    text, encoding_label, text_ratio = DecodeText(buffer, complete)
+
+    if text is None:
+
+        return None
+
+    classification = ClassifyStructure(text, complete)
+
+    if classification is None:
+
+        lines = text.splitlines()
+
+        if not complete and len(lines) > 1:
+
+            lines = lines[:-1]
+
+        lines = [line for line in lines[:LINE_LIMIT] if line.strip()]
+
+        if len(lines) >= 2:
+
+            classification = ClassifyDelimited(lines) or ClassifySource(lines)
+
+            if classification is None:
+
+                classification = ClassifyYAML(lines)
+
+    if classification is None:
+
+        classification = ("TXT", "Text Document", 0.6)
+
+    filetype, description, confidence = classification
+
+    if encoding_label:
+
+        description = f"{description} ({encoding_label})"
+
+    return filetype, description, round(confidence * min(1.0, 0.5 + text_ratio / 2), 2)
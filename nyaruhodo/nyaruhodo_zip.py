@@ -0,0 +1,216 @@
+import struct
+
+END_SIGNATURE           = b"PK\x05\x06"
+ZIP64_END_SIGNATURE     = b"PK\x06\x06"
+ZIP64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+CENTRAL_SIGNATURE       = b"PK\x01\x02"
+LOCAL_SIGNATURE         = b"PK\x03\x04"
+END_SEARCH_SIZES        = (4096, 22 + 65535)
+CHUNK_SIZE              = 65536
+CENTRAL_HEADER          = struct.Struct("<4sHHHHHHIIIHHHHHII")
+LOCAL_HEADER            = struct.Struct("<4sHHHHHIIIHH")
+
+def FindCentralDirectory(read, size):
+
+    for search_size in END_SEARCH_SIZES:
+
+        tail_offset = max(size - search_size, 0)
+        tail        = read(tail_offset, size - tail_offset)
+        position    = tail.rfind(END_SIGNATURE)
+
+        while position != -1:
+
+            if position + 22 <= len(tail):
+
+                entry_count, directory_size, directory_offset, comment_length = struct.unpack_from("<HIIH", tail, position + 10)
+
+                if position + 22 + comment_length <= len(tail):
+
+                    break
+
+            position = tail.rfind(END_SIGNATURE, 0, position)
+
+        if position != -1 or tail_offset == 0:
+
+            break
+
+    if position == -1:
+
+        return None
+
+    end_offset    = tail_offset + position
+    directory_end = end_offset
+    zip64         = False
+
+    if (entry_count == 0xFFFF or directory_size == 0xFFFFFFFF or directory_offset == 0xFFFFFFFF) and end_offset >= 20:
+
+        locator = read(end_offset - 20, 20)
+
+        if locator[:4] == ZIP64_LOCATOR_SIGNATURE:
+
+            zip64_offset = struct.unpack_from("<Q", locator, 8)[0]
+            zip64_record = read(zip64_offset, 56)
+
+            if len(zip64_record) == 56 and zip64_record[:4] == ZIP64_END_SIGNATURE:
+
+                entry_count, directory_size, directory_offset = struct.unpack_from("<QQQ", zip64_record, 32)
+                directory_end                                 = zip64_offset
+                zip64                                         = True
+
+    prefix_size = max(directory_end - directory_size - directory_offset, 0)
+
+    return {
+        "entry_count":      entry_count,
+        "directory_offset": directory_offset + prefix_size,
+        "directory_size":   directory_size,
+        "prefix_size":      prefix_size,
+        "end_offset":       end_offset,
+        "zip64":            zip64,
+    }
+
+def ReadZip64Extra(extra, compressed_size, file_size, local_offset):
+
+    offset = 0
+
+    while offset + 4 <= len(extra):
+
+        header_id, data_size = struct.unpack_from("<HH", extra, offset)
+        data_offset          = offset + 4
+
+        if header_id == 0x0001:
+
+            values = []
+
+            for field_value in (file_size, compressed_size, local_offset):
+
+                if field_value == 0xFFFFFFFF and data_offset + 8 <= offset + 4 + data_size:
+
+                    values.append(struct.unpack_from("<Q", extra, data_offset)[0])
+                    data_offset += 8
+
+                else:
+
+                    values.append(field_value)
+
+            return values[1], values[0], values[2]
+
+        offset += 4 + data_size
+
+    return compressed_size, file_size, local_offset
+
+def IterateCentralDirectory(read, directory):
+
+    buffer          = b""
+    buffer_position = 0
+    read_offset     = directory["directory_offset"]
+    read_end        = read_offset + directory["directory_size"]
+
+    while True:
+
+        if len(buffer) - buffer_position < CENTRAL_HEADER.size and read_offset < read_end:
+
+            chunk           = read(read_offset, min(CHUNK_SIZE, read_end - read_offset))
+            buffer          = buffer[buffer_position:] + chunk
+            buffer_position = 0
+            read_offset    += len(chunk)
+
+            if not chunk:
+
+                return
+
+        if len(buffer) - buffer_position < CENTRAL_HEADER.size:
+
+            return
+
+        header = CENTRAL_HEADER.unpack_from(buffer, buffer_position)
+
+        if header[0] != CENTRAL_SIGNATURE:
+
+            return
+
+        _, _, _, flags, method, _, _, _, compressed_size, file_size, name_length, extra_length, comment_length, _, _, _, local_offset = header
+        record_size = CENTRAL_HEADER.size + name_length + extra_length + comment_length
+
+        while len(buffer) - buffer_position < record_size and read_offset < read_end:
+
+            chunk           = read(read_offset, min(max(CHUNK_SIZE, record_size), read_end - read_offset))
+            buffer          = buffer[buffer_position:] + chunk
+            buffer_position = 0
+            read_offset    += len(chunk)
+
+            if not chunk:
+
+                return
+
+        if len(buffer) - buffer_position < record_size:
+
+            return
+
+        name_offset = buffer_position + CENTRAL_HEADER.size
+        namebytes   = buffer[name_offset: name_offset + name_length]
+        name        = namebytes.decode("utf-8" if flags & 0x800 else "cp437", errors="replace")
+
+        if 0xFFFFFFFF in (compressed_size, file_size, local_offset):
+
+            compressed_size, file_size, local_offset = ReadZip64Extra(buffer[name_offset + name_length: name_offset + name_length + extra_length], compressed_size, file_size, local_offset)
+
+        buffer_position += record_size
+
+        yield name, flags, method, compressed_size, file_size, local_offset + directory["prefix_size"]
+
+def LocalDataOffset(read, local_offset):
+
+    header = read(local_offset, LOCAL_HEADER.size)
+
+    if len(header) < LOCAL_HEADER.size or header[:4] != LOCAL_SIGNATURE:
+
+        return None
+
+    name_length, extra_length = LOCAL_HEADER.unpack(header)[9:11]
+
+    return local_offset + LOCAL_HEADER.size + name_length + extra_length
+
+def ReadMember(read, local_offset, method, compressed_size, limit=4096):
+
+    data_offset = LocalDataOffset(read, local_offset)
+
+    if data_offset is None:
+
+        return None
+
+    if method == 0:
+
+        return read(data_offset, min(compressed_size, limit))
+
+    if method != 8:
+
+        return None
+
+    import zlib
+
+    decompressor = zlib.decompressobj(-15)
+    output       = bytearray()
+    offset       = 0
+
+    try:
+
+        while offset < compressed_size and len(output) < limit and not decompressor.eof:
+
+            chunk = read(data_offset + offset, min(CHUNK_SIZE, compressed_size - offset))
+
+            if not chunk:
+
+                break
+
+            offset += len(chunk)
+            output += decompressor.decompress(chunk, limit - len(output))
+
+    except zlib.error:
+
+        return bytes(output) if output else None
+
+    return bytes(output)
+
+def ReadStoredMember(read, local_offset, compressed_size, limit=4096):
+
+    return ReadMember(read, local_offset, 0, compressed_size, limit)
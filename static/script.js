@@ -368,7 +368,11 @@ document.addEventListener("DOMContentLoaded", function() {
                     <div class="result-field">
                         <span class="result-field-label">Description</span>
                         <span class="result-field-value">${escapeHtml(result.description)}</span>
-                    </div>
+                    </div>${result.content_class ? `
+                    <div class="result-field">
+                        <span class="result-field-label">Content</span>
+                        <span class="result-field-value">${escapeHtml(result.content_class)} (entropy ${escapeHtml(String(result.entropy))})</span>
+                    </div>` : ""}
                 </div>`;
 
         if (result.virustotal) {
@@ -385,6 +389,12 @@ document.addEventListener("DOMContentLoaded", function() {
             markup += `</tbody></table></div></div>`;
         }
 
+        if (result.members && result.members.length > 0) {
+            markup += `<div class="card result-metadata-card"><h4 class="result-section-heading">Archive Members</h4><div class="table-container"><table class="metadata-table"><tbody>`;
+            markup += buildMemberRows(result.members, 0);
+            markup += `</tbody></table></div>${result.members_truncated ? `<p>Analysis stopped at the member limit; later members were not inspected.</p>` : ""}</div>`;
+        }
+
         content.innerHTML = markup;
         container.classList.remove("is-hidden");
 
@@ -394,6 +404,28 @@ document.addEventListener("DOMContentLoaded", function() {
         }
     }
 
+    function buildMemberRows(members, depth) {
+        let markup = "";
+        for (const member of members) {
+            let status;
+            if (member.error) {
+                status = member.error;
+            } else if (member.detected_filetype === "UNKNOWN") {
+                status = "Unknown";
+            } else if (member.mismatch) {
+                status = `${member.detected_filetype} (Extension Mismatch)`;
+            } else {
+                status = member.detected_filetype;
+            }
+            const size = member.size !== undefined ? ` · ${formatFileSize(member.size)}` : "";
+            markup += `<tr><td class="metadata-label">${"&nbsp;".repeat(depth * 4)}${escapeHtml(member.filename)}</td><td class="metadata-value">${escapeHtml(status)}${size}</td></tr>`;
+            if (member.members) {
+                markup += buildMemberRows(member.members, depth + 1);
+            }
+        }
+        return markup;
+    }
+
     function buildVirusTotalMarkup(virustotal) {
         if (virustotal.error) {
             return `<div class="result-box unknown result-box-spaced"><h4>VirusTotal</h4><p>${escapeHtml(virustotal.error)}</p></div>`;
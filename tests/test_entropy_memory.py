@@ -0,0 +1,50 @@
+import tracemalloc
+
+import pytest
+
+from nyaruhodo import nyaruhodo_context
+from nyaruhodo import nyaruhodo_entropy as entropy
+
+FILE_SIZES = [2 * 1048576, 16 * 1048576, 128 * 1048576]
+
+def PeakMemory(filepath):
+
+    with nyaruhodo_context.AnalysisContext(str(filepath)) as context:
+
+        tracemalloc.start()
+
+        try:
+
+            entropy.Analyse(context.Map())
+
+            return tracemalloc.get_traced_memory()[1]
+
+        finally:
+
+            tracemalloc.stop()
+
+@pytest.mark.parametrize("backend", ["numpy", "counter"])
+def test_analyse_peak_memory_is_flat(tmp_path, monkeypatch, backend):
+
+    if backend == "numpy":
+
+        monkeypatch.setattr(entropy, "NUMPY", pytest.importorskip("numpy"))
+
+    else:
+
+        monkeypatch.setattr(entropy, "NUMPY", False)
+
+    peaks = []
+
+    for file_size in FILE_SIZES:
+
+        filepath = tmp_path / f"sample-{file_size}.bin"
+
+        with open(filepath, "wb") as file:
+
+            file.truncate(file_size)
+
+        peaks.append(PeakMemory(filepath))
+
+    assert max(peaks) < 4 * entropy.CHUNK_SIZE
+    assert peaks[-1] < peaks[0] + entropy.CHUNK_SIZE
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+ROOT          = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["xml.etree", "html.parser", "sqlite3", "zipfile", "datetime"]
+IMPORT_BUDGET = 50000
+SCRIPT        = """
+import sys
+
+import nyaruhodo
+
+print(nyaruhodo.core.FindFileType(sys.argv[1])[0])
+print(",".join(sorted(name for name in sys.modules if name.startswith("nyaruhodo.nyaruhodo_properties."))))
+print(",".join(sorted(name for name in sys.argv[2:] if name in sys.modules)))
+"""
+
+def test_find_file_type_loads_no_property_readers(tmp_path):
+
+    sample = tmp_path / "sample.png"
+    sample.write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(64))
+
+    result                   = subprocess.run([sys.executable, "-c", SCRIPT, str(sample), *HEAVY_MODULES], cwd=ROOT, capture_output=True, text=True, check=True)
+    filetype, readers, heavy = result.stdout.splitlines()[-3:]
+
+    assert filetype == "PNG"
+    assert readers == ""
+    assert heavy == ""
+
+def test_import_time_is_within_budget():
+
+    result     = subprocess.run([sys.executable, "-X", "importtime", "-c", "import nyaruhodo"], cwd=ROOT, capture_output=True, text=True, check=True)
+    cumulative = [int(line.split("|")[1]) for line in result.stderr.splitlines() if line.split("|")[-1].strip() == "nyaruhodo"]
+
+    assert cumulative
+    assert cumulative[-1] < IMPORT_BUDGET
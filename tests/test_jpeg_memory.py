@@ -0,0 +1,62 @@
+import struct
+import tracemalloc
+
+from nyaruhodo import nyaruhodo_context
+from nyaruhodo.nyaruhodo_properties import nyaruhodo_image as image
+
+SCAN_SIZES   = [1048576, 16 * 1048576, 128 * 1048576]
+MEMORY_LIMIT = 65536 + 16384
+
+def Segment(marker, segmentbytes):
+
+    return bytes([0xFF, marker]) + struct.pack(">H", len(segmentbytes) + 2) + segmentbytes
+
+def WriteJPEG(filepath, scan_size):
+
+    tiffbytes = b"MM\x00\x2a\x00\x00\x00\x08" + struct.pack(">H", 1) + struct.pack(">HHII", 0x0112, 3, 1, 1 << 16) + bytes(4)
+
+    with open(filepath, "wb") as file:
+
+        file.write(b"\xff\xd8")
+        file.write(Segment(0xE0, b"JFIF\x00\x01\x02\x01\x00\x48\x00\x48\x00\x00"))
+        file.write(Segment(0xE1, b"Exif\x00\x00" + tiffbytes))
+        file.write(Segment(0xC0, b"\x08" + struct.pack(">HH", 480, 640) + b"\x03" + bytes(9)))
+        file.write(Segment(0xDA, b"\x03" + bytes(10)))
+        file.truncate(file.tell() + scan_size)
+        file.seek(0, 2)
+        file.write(b"\xff\xd9")
+
+def PeakMemory(filepath):
+
+    tracemalloc.start()
+
+    try:
+
+        with nyaruhodo_context.AnalysisContext(str(filepath)) as context:
+
+            properties = image.ReadJPEG(context)
+
+        return properties, tracemalloc.get_traced_memory()[1]
+
+    finally:
+
+        tracemalloc.stop()
+
+def test_read_jpeg_peak_memory_is_flat(tmp_path):
+
+    peaks = []
+
+    for scan_size in SCAN_SIZES:
+
+        filepath = tmp_path / f"sample-{scan_size}.jpg"
+        WriteJPEG(filepath, scan_size)
+        properties, peak = PeakMemory(filepath)
+
+        assert properties["ImageWidth"] == 640
+        assert properties["ImageHeight"] == 480
+        assert properties["JFIFVersion"] == "1.02"
+
+        peaks.append(peak)
+
+    assert max(peaks) < MEMORY_LIMIT
+    assert peaks[-1] < peaks[0] + 4096